@@ -0,0 +1,60 @@
+""" Benchmark: rdflib's default Memory store against CompactStore
+
+Loads Wikidata-shaped triples into a Graph backed by each store and reports the memory held per triple, the load rate
+and the lookup rate for the pattern shapes that SlurpyGraph generates.
+
+Run with `python -m benchmarks.bench_compact_store`
+"""
+import gc
+import random
+import time
+import tracemalloc
+from typing import Callable, List
+
+from rdflib import Graph
+from rdflib.store import Store
+
+from benchmarks.bench_map_type import wikidata_rows
+from sparqlslurper import SlurpyGraph, CompactStore, RDFTriple
+
+NTRIPLES = 200000
+NLOOKUPS = 20000
+
+
+def measure(name: str, store_factory: Callable[[], Store], triples: List[RDFTriple]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    g = Graph(store=store_factory())
+    for triple in triples:
+        g.add(triple)
+    load = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rnd = random.Random(17)
+    sample = rnd.sample(triples, NLOOKUPS)
+    rates = []
+    for shape in ((0, ), (0, 1), (1, 2), (0, 1, 2)):
+        patterns = [tuple(t[i] if i in shape else None for i in range(3)) for t in sample]
+        start = time.perf_counter()
+        for pattern in patterns:
+            for _ in g.triples(pattern):
+                pass
+        rates.append(NLOOKUPS / (time.perf_counter() - start))
+    print(f"{name:<14} {current / len(g):16.1f} {len(g) / load:14,.0f} " + ' '.join(f"{r:12,.0f}" for r in rates))
+
+
+def main() -> None:
+    # Use the interned terms that a SlurpyGraph would produce, so that both stores share them
+    triples = list(dict.fromkeys(SlurpyGraph("http://example.org/sparql")._map_rows((None, None, None),
+                                                                                   wikidata_rows(NTRIPLES))))
+    print(f"{len(triples):,} triples, {NLOOKUPS:,} lookups per shape")
+    print(f"{'store':<14} {'bytes / triple':>16} {'adds / sec':>14} " +
+          ' '.join(f"{shape + ' / sec':>12}" for shape in ('s??', 'sp?', '?po', 'spo')))
+    measure("Memory", lambda: Graph().store, triples)
+    measure("CompactStore", CompactStore, triples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+""" Benchmark: converting Wikidata-shaped SPARQL result rows into triples
+
+Compares the original per-row `_map_type` conversion (a new term per value) with the interned, batched `_map_rows`
+path for throughput (first pass) and memory allocated (second pass, i.e. with a warm term cache).
+
+Run with `python -m benchmarks.bench_map_type`
+"""
+import random
+import time
+import tracemalloc
+from typing import Dict, List, Callable
+
+from rdflib import URIRef, Literal, BNode
+
+from sparqlslurper import SlurpyGraph, RDFTriple, QueryTriple
+
+WD = "http://www.wikidata.org/entity/"
+WDT = "http://www.wikidata.org/prop/direct/"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+NROWS = 200000
+
+
+def wikidata_rows(n: int, seed: int = 42) -> List[Dict]:
+    """ Rows for a `(None, None, None)`-shaped slurp of Wikidata items: a few hundred properties, a long tail of
+    items, and typed literals for dates, quantities and identifiers """
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        kind = rnd.random()
+        if kind < 0.6:
+            o = {'type': 'uri', 'value': f"{WD}Q{int(rnd.paretovariate(1.2)) % 100000}"}
+        elif kind < 0.75:
+            o = {'type': 'literal', 'datatype': f"{XSD}dateTime",
+                 'value': f"{rnd.randint(1800, 2020)}-01-01T00:00:00Z"}
+        elif kind < 0.85:
+            o = {'type': 'literal', 'datatype': f"{XSD}decimal", 'value': str(rnd.randint(0, 500))}
+        else:
+            o = {'type': 'literal', 'value': f"ID{rnd.randint(0, 1000000)}"}
+        rows.append({'s': {'type': 'uri', 'value': f"{WD}Q{i // 40}"},
+                     'p': {'type': 'uri', 'value': f"{WDT}P{int(rnd.paretovariate(1.0)) % 300}"},
+                     'o': o})
+    return rows
+
+
+def legacy_map_type(node: Dict, node_id: Dict = None):
+    """ The original `_map_type` """
+    return URIRef(node['value']) if node['type'] == 'uri' else \
+        BNode(node['value']) if node['type'] == 'bnode' else \
+        Literal(node['value'], datatype=node.get('datatype'))
+
+
+def legacy_map_rows(pattern: QueryTriple, rows: List[Dict]) -> List[RDFTriple]:
+    """ The original row by row conversion in `triples()` """
+    rval = []
+    for row in rows:
+        rval.append(RDFTriple(pattern[0] if pattern[0] is not None else legacy_map_type(row['s'], row.get('sid', None)),
+                              pattern[1] if pattern[1] is not None else legacy_map_type(row['p']),
+                              pattern[2] if pattern[2] is not None else legacy_map_type(row['o'], row.get('oid', None))))
+    return rval
+
+
+def measure(name: str, convert: Callable[[], List[RDFTriple]]) -> None:
+    start = time.perf_counter()
+    triples = convert()
+    elapsed = time.perf_counter() - start
+    del triples
+    tracemalloc.start()
+    triples = convert()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<20} {len(triples) / elapsed:14,.0f} {current / len(triples):16.1f} {peak / 2 ** 20:12.1f}")
+
+
+def main() -> None:
+    rows = wikidata_rows(NROWS)
+    pattern = (None, None, None)
+    print(f"{NROWS:,} rows")
+    print(f"{'path':<20} {'rows / sec':>14} {'bytes / triple':>16} {'peak (MB)':>12}")
+    measure("per-row (original)", lambda: legacy_map_rows(pattern, rows))
+    g = SlurpyGraph("http://example.org/sparql")
+    measure("interned batch", lambda: g._map_rows(pattern, rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+""" Micro-benchmark: cost of `already_resolved` as the number of resolved patterns grows
+
+Run with `python -m benchmarks.bench_resolved_patterns`
+"""
+import random
+import time
+from typing import List
+
+from rdflib import Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, QueryTriple, ResolvedPatterns
+
+EX = Namespace("http://example.org/")
+
+SIZES = [100, 1000, 10000, 100000]
+LINEAR_LIMIT = 10000            # The linear scan gets too slow to be worth timing past this
+LOOKUPS = 2000
+
+
+def gen_patterns(n: int) -> List[QueryTriple]:
+    """ Generate n patterns spread across the wild card shapes a tree walker typically produces """
+    rval = []
+    for i in range(n):
+        shape = i % 4
+        if shape == 0:
+            rval.append((EX[f"s{i}"], None, None))
+        elif shape == 1:
+            rval.append((EX[f"s{i}"], EX[f"p{i % 50}"], None))
+        elif shape == 2:
+            rval.append((None, EX[f"p{i % 50}"], EX[f"o{i}"]))
+        else:
+            rval.append((EX[f"s{i}"], EX[f"p{i % 50}"], Literal(i)))
+    return rval
+
+
+def linear_already_resolved(resolved_nodes: List[QueryTriple], pattern: QueryTriple) -> bool:
+    """ The original `already_resolved` scan """
+    for resolved_node in resolved_nodes:
+        if resolved_node != (None, None, None) and \
+                (pattern[0] == resolved_node[0] or resolved_node[0] is None) and \
+                (pattern[1] == resolved_node[1] or resolved_node[1] is None) and \
+                (pattern[2] == resolved_node[2] or resolved_node[2] is None):
+            return True
+    return False
+
+
+def time_lookups(check, probes: List[QueryTriple]) -> float:
+    """ Return the mean number of microseconds per lookup """
+    start = time.perf_counter()
+    for probe in probes:
+        check(probe)
+    return (time.perf_counter() - start) / len(probes) * 1e6
+
+
+def main() -> None:
+    rnd = random.Random(42)
+    print(f"{'patterns':>10} {'indexed (us)':>14} {'linear (us)':>14}")
+    for n in SIZES:
+        patterns = gen_patterns(n)
+        g = SlurpyGraph("http://example.org/sparql")
+        g.resolved_nodes = ResolvedPatterns(patterns)
+        # Half hits, half misses
+        probes = [(p[0] or EX.x, p[1] or EX.y, p[2] or EX.z) for p in rnd.sample(patterns, min(n, LOOKUPS // 2))]
+        probes += [(EX[f"miss{i}"], EX.p1, None) for i in range(LOOKUPS - len(probes))]
+        indexed = time_lookups(g.already_resolved, probes)
+        if n <= LINEAR_LIMIT:
+            linear = f"{time_lookups(lambda p: linear_already_resolved(patterns, p), probes):14.2f}"
+        else:
+            linear = f"{'-':>14}"
+        print(f"{n:10} {indexed:14.2f} {linear}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+""" Benchmark: decoding SPARQL SELECT results in each supported format
+
+Encodes the same Wikidata-shaped results as SPARQL JSON, SPARQL TSV and RDF4J binary results, then reports the size of
+each document, the rate at which it is decoded into bindings and the rate for decoding plus building the triples.
+
+Run with `python -m benchmarks.bench_result_formats`
+"""
+import io
+import json
+import time
+from typing import Callable, Dict, Iterable, List
+
+from benchmarks.bench_map_type import wikidata_rows
+from sparqlslurper import SlurpyGraph, JSONResultDecoder, TSVResultDecoder, BinaryResultDecoder
+from tests.local_endpoint import encode_tsv, encode_binary
+
+NROWS = 200000
+
+
+def measure(name: str, body: bytes, decode: Callable[[io.BytesIO], Iterable[Dict]]) -> None:
+    start = time.perf_counter()
+    rows = list(decode(io.BytesIO(body)))
+    decoded = time.perf_counter() - start
+    g = SlurpyGraph("http://example.org/sparql")
+    start = time.perf_counter()
+    g._map_rows((None, None, None), list(decode(io.BytesIO(body))))
+    mapped = time.perf_counter() - start
+    print(f"{name:<16} {len(body) / 2 ** 20:10.1f} {len(rows) / decoded:14,.0f} {len(rows) / mapped:14,.0f}")
+
+
+def json_document(body: io.BytesIO) -> List[Dict]:
+    """ The non-streaming JSON path -- the whole document at once """
+    return json.loads(body.read().decode('utf-8'))['results']['bindings']
+
+
+def main() -> None:
+    results = {'head': {'vars': ['s', 'p', 'o']}, 'results': {'bindings': wikidata_rows(NROWS)}}
+    json_body = json.dumps(results).encode('utf-8')
+    print(f"{NROWS:,} rows")
+    print(f"{'format':<16} {'size (MB)':>10} {'rows / sec':>14} {'+ map / sec':>14}")
+    measure("JSON", json_body, json_document)
+    measure("JSON streamed", json_body, JSONResultDecoder().decode)
+    measure("TSV", encode_tsv(results), TSVResultDecoder().decode)
+    measure("binary", encode_binary(results), BinaryResultDecoder().decode)
+
+
+if __name__ == '__main__':
+    main()
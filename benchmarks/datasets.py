@@ -0,0 +1,59 @@
+""" Synthetic, deterministic datasets for the benchmark scenarios """
+import random
+
+from rdflib import Graph, Namespace, Literal, BNode, RDF, XSD
+from rdflib.collection import Collection
+
+EX = Namespace("http://example.org/")
+
+
+def crawl_graph(nsubjects: int = 500, fanout: int = 3, nprops: int = 8, seed: int = 42) -> Graph:
+    """ Subjects with a handful of literal properties, each linking to `fanout` other subjects.  Reachable in full
+    from EX.s0 """
+    rnd = random.Random(seed)
+    g = Graph()
+    for i in range(nsubjects):
+        s = EX[f"s{i}"]
+        g.add((s, RDF.type, EX[f"Class{i % 5}"]))
+        for j in range(nprops):
+            g.add((s, EX[f"p{j}"], Literal(rnd.randint(0, 10000), datatype=XSD.integer)))
+        # Guarantee reachability with a link to the next subject, then add random links
+        g.add((s, EX.link, EX[f"s{(i + 1) % nsubjects}"]))
+        for _ in range(fanout - 1):
+            g.add((s, EX.link, EX[f"s{rnd.randrange(nsubjects)}"]))
+    return g
+
+
+def wide_graph(nsubjects: int = 5000) -> Graph:
+    """ Many subjects sharing one type and predicate -- patterns such as `(None, RDF.type, EX.Thing)` are wide """
+    g = Graph()
+    for i in range(nsubjects):
+        s = EX[f"w{i}"]
+        g.add((s, RDF.type, EX.Thing))
+        g.add((s, EX.value, Literal(f"value {i}")))
+    return g
+
+
+def bnode_graph(nroots: int = 50, list_len: int = 10) -> Graph:
+    """ Roots with nested blank node structures: an RDF list and a two level blank node record """
+    g = Graph()
+    for i in range(nroots):
+        root = EX[f"r{i}"]
+        head = BNode()
+        Collection(g, head, [Literal(f"item {i}.{j}") for j in range(list_len)])
+        g.add((root, EX.items, head))
+        record = BNode()
+        inner = BNode()
+        g.add((root, EX.record, record))
+        g.add((record, EX.code, Literal(f"code{i}")))
+        g.add((record, EX.detail, inner))
+        g.add((inner, EX.value, Literal(i)))
+    return g
+
+
+# Dataset builders, taking a scale factor (1.0 is the default size)
+DATASETS = {
+    'crawl': lambda scale: crawl_graph(nsubjects=max(int(500 * scale), 1)),
+    'wide': lambda scale: wide_graph(nsubjects=max(int(5000 * scale), 1)),
+    'bnode': lambda scale: bnode_graph(nroots=max(int(50 * scale), 1)),
+}
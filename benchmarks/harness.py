@@ -0,0 +1,170 @@
+""" Off-line benchmark harness.
+
+Serves the synthetic datasets through a local stand-in SPARQL endpoint (running in its own process, so that its
+memory and CPU don't pollute the client measurements) and runs repeatable scenarios against SlurpyGraph and
+GraphDBSlurpyGraph, reporting the queries issued, wall time, throughput and peak memory of each.
+
+Run with `python -m benchmarks.harness [--latency SECS] [--scale FACTOR] [--scenario NAME ...]`
+"""
+import argparse
+import multiprocessing
+import time
+import tracemalloc
+from typing import Callable, List, NamedTuple, Optional, Type
+
+from rdflib import RDF
+from rdflib.collection import Collection
+
+from benchmarks.datasets import DATASETS, EX
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+
+class Scenario(NamedTuple):
+    name: str
+    dataset: str
+    run: Callable[[SlurpyGraph], None]
+    graphdb_only: bool = False
+
+
+class ScenarioResult(NamedTuple):
+    scenario: str
+    graph: str
+    queries: int
+    triples: int
+    wall: float
+    peak_mb: float
+
+    @property
+    def throughput(self) -> float:
+        return self.triples / self.wall if self.wall else 0.0
+
+
+def cold_crawl(g: SlurpyGraph) -> None:
+    """ Breadth first walk of every subject reachable from EX.s0 """
+    seen = {EX.s0}
+    todo = [EX.s0]
+    while todo:
+        s = todo.pop(0)
+        for o in g.objects(s, EX.link):
+            if o not in seen:
+                seen.add(o)
+                todo.append(o)
+        _ = list(g.predicate_objects(s))
+
+
+def repeated_lookups(g: SlurpyGraph, passes: int = 5) -> None:
+    """ A validator style access pattern -- the same (s, p, ?) lookups over and over """
+    for _ in range(passes):
+        for i in range(50):
+            for j in range(4):
+                _ = g.value(EX[f"s{i}"], EX[f"p{j}"])
+
+
+def wide_patterns(g: SlurpyGraph) -> None:
+    _ = list(g.subjects(RDF.type, EX.Thing))
+    _ = list(g.triples((None, EX.value, None)))
+
+
+def bnode_walk(g: SlurpyGraph) -> None:
+    """ Follow every root into its RDF list and nested records """
+    i = 0
+    while True:
+        root = EX[f"r{i}"]
+        items = g.value(root, EX['items'])
+        if items is None:
+            break
+        _ = list(Collection(g, items))
+        record = g.value(root, EX.record)
+        _ = g.value(g.value(record, EX.detail), EX.value)
+        i += 1
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('cold crawl', 'crawl', cold_crawl),
+    Scenario('repeated lookups', 'crawl', repeated_lookups),
+    Scenario('wide patterns', 'wide', wide_patterns),
+    Scenario('bnode heavy', 'bnode', bnode_walk, graphdb_only=True),
+]
+
+
+def _serve(dataset: str, scale: float, latency: float, graphdb: bool, url_queue, stop_event) -> None:
+    with LocalSPARQLEndpoint(DATASETS[dataset](scale), latency=latency, graphdb=graphdb) as ep:
+        url_queue.put(ep.url)
+        stop_event.wait()
+
+
+class EndpointProcess:
+    """ Run a LocalSPARQLEndpoint serving one of the datasets in a child process """
+    def __init__(self, dataset: str, scale: float = 1.0, latency: float = 0.0, graphdb: bool = False) -> None:
+        ctx = multiprocessing.get_context('spawn')
+        self._queue = ctx.Queue()
+        self._stop = ctx.Event()
+        self._process = ctx.Process(target=_serve, args=(dataset, scale, latency, graphdb, self._queue, self._stop),
+                                    daemon=True)
+        self.url: Optional[str] = None
+
+    def __enter__(self) -> "EndpointProcess":
+        self._process.start()
+        self.url = self._queue.get(timeout=60)
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+        self._process.join(10)
+
+
+def run_scenario(scenario: Scenario, graph_type: Type[SlurpyGraph], url: str, **graph_kwargs) -> ScenarioResult:
+    """ Run scenario against a fresh graph of graph_type
+
+    :param scenario: scenario to run
+    :param graph_type: SlurpyGraph or a subclass
+    :param url: endpoint URL
+    :param graph_kwargs: additional graph constructor arguments
+    :return: measurements
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    g = graph_type(url, **graph_kwargs)
+    scenario.run(g)
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    g.close()
+    return ScenarioResult(scenario.name, graph_type.__name__, g.total_queries, g.total_triples, wall, peak / 2 ** 20)
+
+
+def run_all(scenarios: List[Scenario], scale: float = 1.0, latency: float = 0.0, **graph_kwargs) \
+        -> List[ScenarioResult]:
+    results = []
+    for scenario in scenarios:
+        for graph_type in (SlurpyGraph, GraphDBSlurpyGraph):
+            graphdb = graph_type is GraphDBSlurpyGraph
+            if scenario.graphdb_only and not graphdb:
+                continue
+            with EndpointProcess(scenario.dataset, scale, latency, graphdb) as ep:
+                results.append(run_scenario(scenario, graph_type, ep.url, **graph_kwargs))
+    return results
+
+
+def report(results: List[ScenarioResult]) -> None:
+    print(f"{'scenario':<18} {'graph':<20} {'queries':>8} {'triples':>8} {'wall (s)':>9} {'triples/s':>10} "
+          f"{'peak (MB)':>10}")
+    for r in results:
+        print(f"{r.scenario:<18} {r.graph:<20} {r.queries:8} {r.triples:8} {r.wall:9.2f} {r.throughput:10.0f} "
+              f"{r.peak_mb:10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Off-line SPARQL slurper benchmarks")
+    parser.add_argument('--latency', type=float, default=0.0, help="Endpoint latency per request in seconds")
+    parser.add_argument('--scale', type=float, default=1.0, help="Dataset size multiplier")
+    parser.add_argument('--scenario', action='append', choices=[s.name for s in SCENARIOS],
+                        help="Scenario(s) to run.  Default: all")
+    opts = parser.parse_args(argv)
+    scenarios = [s for s in SCENARIOS if not opts.scenario or s.name in opts.scenario]
+    report(run_all(scenarios, opts.scale, opts.latency))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,19 @@
+from ._endpoint_pool import EndpointPool, EndpointPolicy, Replica, RoundRobinPolicy, LeastOutstandingPolicy
+from ._memory_budget import MemoryBudget
+from ._metrics import SlurpMetrics, QueryMetrics
+from ._negative_cache import NegativeCache
+from ._query_cache import QueryCache
+from ._compact_store import CompactStore
+from ._resolved_patterns import ResolvedPatterns
+from ._result_formats import ResultDecoder, JSONResultDecoder, TSVResultDecoder, BinaryResultDecoder
+from ._scheduler import RequestScheduler
+from ._snapshot import SnapshotReader
+from ._result_pipeline import ResultSink, ResultPipeline, StreamingTriplePrinter
+from ._term_cache import TermInterner
 from ._slurpygraph import QueryTriple, NodeType, RDFTriple, TM_NS, SlurpyGraph, QueryResultHook, QueryResultPrinter
 from ._graphdb_slurpygraph import GraphDBSlurpyGraph, graphdb_id
+from ._transport import Transport, SPARQLWrapperTransport, PooledHTTPTransport
+from ._widening import WideningPolicy
 from ._user_agent import SlurpyGraphWithAgent, SPARQLWrapperWithAgent
 
 import rdflib_shim                      # rdflib 5 / 6 bridge
@@ -0,0 +1,249 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from rdflib import URIRef
+from rdflib.store import Store
+from rdflib.term import Node
+
+Triple = Tuple[Node, Node, Node]
+Pattern = Tuple[Optional[Node], Optional[Node], Optional[Node]]
+
+# Index entries are a single id or, once there is more than one, an array of ids.  An array that grows past
+# SET_THRESHOLD ids becomes a set, so that membership tests and removals don't scan high fan-out entries
+Ids = Union[int, array, Set[int]]
+SET_THRESHOLD = 32
+
+# Term ids are packed in pairs into a single dictionary key
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+
+def _pair(a: int, b: int) -> int:
+    return (a << ID_BITS) | b
+
+
+def _no_contexts() -> Iterator:
+    return iter(())
+
+
+class CompactStore(Store):
+    """ A dictionary encoded, in memory rdflib store.
+
+    Every term is stored once and referred to by an integer id.  Each of the SPO, POS and OSP indices maps a pair of
+    ids (packed into one int) to an id -- or to an array of 32 bit ids if there is more than one, or a set of them if
+    there are many -- and three more maps take a single id to the ids it is paired with, so every triple costs a few
+    ints and array slots rather than several nested dictionary entries.
+
+    Lookups are fastest for the patterns that SlurpyGraph generates (`(s, ?, ?)`, `(s, p, ?)`, `(?, p, o)`, ...).
+
+    Like rdflib's SimpleMemory store, it is not context aware.  Terms are reference counted: when the last triple that
+    uses a term is removed, the term is dropped and its id is reused, so a store that is trimmed by a SlurpyGraph
+    memory budget doesn't accumulate the terms of evicted triples.
+
+    Usage::
+
+        g = SlurpyGraph(endpoint, store=CompactStore())
+    """
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration: Optional[str] = None, identifier: Optional[Node] = None) -> None:
+        super().__init__(configuration)
+        self.identifier = identifier
+        self._ids: Dict[Node, int] = {}
+        self._terms: List[Optional[Node]] = []
+        # Number of triple positions that refer to each term id, and the ids of dropped terms
+        self._refs = array('I')
+        self._free: List[int] = []
+        # Second level indices -- (s, p) -> objects, (p, o) -> subjects, (o, s) -> predicates
+        self._spo: Dict[int, Ids] = {}
+        self._pos: Dict[int, Ids] = {}
+        self._osp: Dict[int, Ids] = {}
+        # First level indices -- s -> predicates, p -> objects, o -> subjects
+        self._sp: Dict[int, Ids] = {}
+        self._po: Dict[int, Ids] = {}
+        self._os: Dict[int, Ids] = {}
+        self._len = 0
+        self._namespace: Dict[str, URIRef] = {}
+        self._prefix: Dict[URIRef, str] = {}
+
+    def _id(self, term: Node) -> int:
+        """ Return the id of term, allocating one if needed """
+        term_id = self._ids.get(term)
+        if term_id is None:
+            if self._free:
+                term_id = self._free.pop()
+                self._terms[term_id] = term
+            else:
+                term_id = len(self._terms)
+                if term_id > ID_MASK:
+                    raise OverflowError("CompactStore: too many terms")
+                self._terms.append(term)
+                self._refs.append(0)
+            self._ids[term] = term_id
+        return term_id
+
+    def _release(self, term_id: int) -> None:
+        """ Drop a reference to term_id, freeing the id if it was the last one """
+        self._refs[term_id] -= 1
+        if not self._refs[term_id]:
+            del self._ids[self._terms[term_id]]
+            self._terms[term_id] = None
+            self._free.append(term_id)
+
+    @staticmethod
+    def _append(index: Dict[int, Ids], key: int, value: int) -> None:
+        values = index.get(key)
+        if values is None:
+            index[key] = value
+        elif isinstance(values, int):
+            index[key] = array('I', (values, value))
+        elif isinstance(values, set):
+            values.add(value)
+        elif len(values) >= SET_THRESHOLD:
+            index[key] = set(values)
+            index[key].add(value)
+        else:
+            values.append(value)
+
+    @staticmethod
+    def _discard(index: Dict[int, Ids], key: int, value: int) -> bool:
+        """ Remove value from index[key], returning True if that left the entry empty """
+        values = index[key]
+        if isinstance(values, int):
+            del index[key]
+            return True
+        values.remove(value)
+        if not values:
+            del index[key]
+            return True
+        return False
+
+    @staticmethod
+    def _values(index: Dict[int, Ids], key: int) -> Union[Tuple[int, ...], array]:
+        """ Return a copy of the ids in index[key] """
+        values = index.get(key)
+        return () if values is None else (values, ) if isinstance(values, int) else \
+            tuple(values) if isinstance(values, set) else values[:]
+
+    @staticmethod
+    def _contains(index: Dict[int, Ids], key: int, value: int) -> bool:
+        values = index.get(key)
+        return values is not None and (values == value if isinstance(values, int) else value in values)
+
+    def add(self, triple: Triple, context=None, quoted: bool = False) -> None:
+        s, p, o = (self._id(t) for t in triple)
+        if self._contains(self._spo, _pair(s, p), o):
+            return
+        for term_id in (s, p, o):
+            self._refs[term_id] += 1
+        # A new (s, p) pair also means a new (s, p) entry in the first level index and so on
+        if _pair(s, p) not in self._spo:
+            self._append(self._sp, s, p)
+        self._append(self._spo, _pair(s, p), o)
+        if _pair(p, o) not in self._pos:
+            self._append(self._po, p, o)
+        self._append(self._pos, _pair(p, o), s)
+        if _pair(o, s) not in self._osp:
+            self._append(self._os, o, s)
+        self._append(self._osp, _pair(o, s), p)
+        self._len += 1
+        super().add(triple, context, quoted)
+
+    def remove(self, triple_pattern: Pattern, context=None) -> None:
+        for triple, _ in list(self.triples(triple_pattern)):
+            s, p, o = (self._ids[t] for t in triple)
+            if self._discard(self._spo, _pair(s, p), o):
+                self._discard(self._sp, s, p)
+            if self._discard(self._pos, _pair(p, o), s):
+                self._discard(self._po, p, o)
+            if self._discard(self._osp, _pair(o, s), p):
+                self._discard(self._os, o, s)
+            for term_id in (s, p, o):
+                self._release(term_id)
+            self._len -= 1
+            super().remove(triple, context)
+
+    def _ids_triples(self, s: Optional[int], p: Optional[int], o: Optional[int]) -> Iterator[Tuple[int, int, int]]:
+        """ Generate the id triples matching a pattern of ids.  Index entries are copied before they are iterated
+        over, so the store can be changed while a caller is working through the results """
+        values = self._values
+        if s is not None:
+            if p is not None:
+                if o is not None:
+                    if self._contains(self._spo, _pair(s, p), o):
+                        yield s, p, o
+                else:
+                    for o in values(self._spo, _pair(s, p)):
+                        yield s, p, o
+            elif o is not None:
+                for p in values(self._osp, _pair(o, s)):
+                    yield s, p, o
+            else:
+                for p in values(self._sp, s):
+                    for o in values(self._spo, _pair(s, p)):
+                        yield s, p, o
+        elif p is not None:
+            if o is not None:
+                for s in values(self._pos, _pair(p, o)):
+                    yield s, p, o
+            else:
+                for o in values(self._po, p):
+                    for s in values(self._pos, _pair(p, o)):
+                        yield s, p, o
+        elif o is not None:
+            for s in values(self._os, o):
+                for p in values(self._osp, _pair(o, s)):
+                    yield s, p, o
+        else:
+            for sp in list(self._spo):
+                s, p = sp >> ID_BITS, sp & ID_MASK
+                for o in values(self._spo, sp):
+                    yield s, p, o
+
+    def triples(self, triple_pattern: Pattern, context=None) -> Iterator[Tuple[Triple, Iterator]]:
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+            else:
+                term_id = self._ids.get(term)
+                if term_id is None:
+                    return
+                ids.append(term_id)
+        terms = self._terms
+        for s, p, o in self._ids_triples(*ids):
+            yield (terms[s], terms[p], terms[o]), _no_contexts()
+
+    def __len__(self, context=None) -> int:
+        return self._len
+
+    def contexts(self, triple: Optional[Triple] = None) -> Iterator:
+        return _no_contexts()
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace, self._prefix.get(bound_namespace))
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            namespace = bound_namespace if bound_namespace is not None else namespace
+            prefix = bound_prefix if bound_prefix is not None else prefix
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        return self._prefix.get(namespace)
+
+    def namespaces(self) -> Iterator[Tuple[str, URIRef]]:
+        return iter(list(self._namespace.items()))
@@ -0,0 +1,122 @@
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class Replica:
+    """ One endpoint of a pool, along with its health and usage statistics """
+    def __init__(self, endpoint: str, parameters: List[Tuple[str, str]]) -> None:
+        """ Create a replica
+
+        :param endpoint: Endpoint URL without its parameters
+        :param parameters: Parameters to send with every request to this endpoint
+        """
+        self.endpoint = endpoint
+        self.parameters = parameters
+        self.outstanding = 0
+        self.queries = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.total_latency = 0.0
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.queries if self.queries else 0.0
+
+    def stats(self) -> Dict:
+        return dict(endpoint=self.endpoint, queries=self.queries, failures=self.failures,
+                    outstanding=self.outstanding, mean_latency=self.mean_latency, healthy=self.healthy)
+
+
+class EndpointPolicy:
+    """ Chooses the replica for the next request """
+    def choose(self, candidates: Sequence[Replica]) -> Replica:
+        """ Return one of candidates, of which there is at least one """
+        raise NotImplementedError()
+
+
+class RoundRobinPolicy(EndpointPolicy):
+    """ Take the candidates in turn """
+    def __init__(self) -> None:
+        self._counter = itertools.count()
+
+    def choose(self, candidates: Sequence[Replica]) -> Replica:
+        return candidates[next(self._counter) % len(candidates)]
+
+
+class LeastOutstandingPolicy(EndpointPolicy):
+    """ Take the candidate with the fewest requests in progress, breaking ties on mean latency """
+    def choose(self, candidates: Sequence[Replica]) -> Replica:
+        return min(candidates, key=lambda r: (r.outstanding, r.mean_latency))
+
+
+class EndpointPool:
+    """ A set of replicated endpoints that share the load of a SlurpyGraph.
+
+    A replica that fails `max_failures` times in a row is taken out of rotation for `cooldown` seconds, after which it
+    is given another chance.  If every replica is down, the one due back first is used anyway.
+    """
+    def __init__(self, replicas: List[Replica], policy: Optional[EndpointPolicy] = None, max_failures: int = 3,
+                 cooldown: float = 30.0) -> None:
+        """ Create a pool
+
+        :param replicas: endpoints in the pool
+        :param policy: how to spread the requests.  Default: round robin
+        :param max_failures: consecutive failures before a replica is taken out of rotation
+        :param cooldown: seconds that a failing replica stays out of rotation
+        """
+        if not replicas:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.replicas = replicas
+        self.policy = policy if policy is not None else RoundRobinPolicy()
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: Sequence[Replica] = ()) -> Optional[Replica]:
+        """ Choose a replica for a request
+
+        :param exclude: replicas that have already been tried for this request
+        :return: chosen replica, None if every replica has been excluded
+        """
+        with self._lock:
+            candidates = [r for r in self.replicas if r not in exclude]
+            if not candidates:
+                return None
+            healthy = [r for r in candidates if r.healthy]
+            replica = self.policy.choose(healthy) if healthy else min(candidates, key=lambda r: r.down_until)
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica: Replica, latency: float, ok: bool) -> None:
+        """ Record the outcome of a request to replica
+
+        :param replica: replica returned by `acquire`
+        :param latency: seconds that the request took
+        :param ok: False means that the replica failed the request
+        """
+        with self._lock:
+            replica.outstanding -= 1
+            if ok:
+                replica.queries += 1
+                replica.total_latency += latency
+                replica.consecutive_failures = 0
+            else:
+                replica.failures += 1
+                replica.consecutive_failures += 1
+                if replica.consecutive_failures >= self.max_failures:
+                    replica.down_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> List[Dict]:
+        """ Return the usage and health of each replica """
+        with self._lock:
+            return [r.stats() for r in self.replicas]
+
+    def __len__(self) -> int:
+        return len(self.replicas)
@@ -1,27 +1,114 @@
-from typing import Tuple
+from typing import Any, Tuple, List, Optional, Dict, Union
 
-from sparqlslurper import SlurpyGraph, TM_NS
+from rdflib import RDF
+from rdflib.query import Result
+
+from sparqlslurper import SlurpyGraph, TM_NS, QueryTriple, NodeType, RDFTriple
+from sparqlslurper._resolved_patterns import pattern_shape
 
 graphdb_id = "<http://www.ontotext.com/owlim/entity#id>"
 
 
 class GraphDBSlurpyGraph(SlurpyGraph):
+    def __init__(self, endpoint: Union[str, List[str]], *args, **kwargs) -> None:
+        super().__init__(endpoint, *args, **kwargs)
+        # Fetch the concise bounded description of every blank node object as soon as it shows up in a result
+        self.prefetch_closures = False
+
+    def _gen_s_o(self, p: Optional[NodeType], is_s: bool) -> Tuple[str, str]:
+        """ Return the text for subject or object p and any identifier translation that it needs """
+        return self._gen_node(p, '?s' if is_s else '?o')
+
+    def _gen_node(self, node: Optional[NodeType], var: str) -> Tuple[str, str]:
+        if node is None:
+            return var, f' {var} {graphdb_id} {var}id . '
+        elif str(node).startswith(str(TM_NS)):
+            bnode_id = str(node)[len(str(TM_NS)):]
+            return var, f' {var} {graphdb_id} {bnode_id} . '
+        else:
+            return self._repr_element(node), ''
+
+    def _node_vars(self, var: str) -> List[str]:
+        return [var, f'{var}id']
+
+    def _pushdown_query(self, query_object: Any, initNs: Optional[Dict[str, Any]],
+                        initBindings: Optional[Dict]) -> Optional[Result]:
+        """ Whole queries aren't pushed down -- the blank nodes in their results couldn't be given identifiers """
+        return None
 
     def gen_query(self,  pattern, gquery: str, gqueryend: str) -> str:
         """ Generate a query that includes the identifiers of any variables and adds identifier translation for
         any URI's
         """
-        def gen_s_o(p: str, is_s: bool) -> Tuple[str, str]:
-            tgt = '?s' if is_s else '?o'
-            if p is None:
-                return tgt, f' {tgt} {graphdb_id} {tgt}id . '
-            elif str(p).startswith(str(TM_NS)):
-                bnode_id = str(p)[len(str(TM_NS)):]
-                return tgt, f' {tgt} {graphdb_id} {bnode_id} . '
-            else:
-                return self._repr_element(p), ''
-
-        subj, s_add = gen_s_o(pattern[0], True)
+        subj, s_add = self._gen_s_o(pattern[0], True)
         pred = self._repr_element(pattern[1]) if pattern[1] is not None else '?p'
-        obj, o_add = gen_s_o(pattern[2], False)
+        obj, o_add = self._gen_s_o(pattern[2], False)
         return f"SELECT ?s ?p ?o ?sid ?oid {{{gquery}{subj} {pred} {obj} . {s_add}{o_add} {gqueryend}}}"
+
+    def gen_ask_query(self, pattern: RDFTriple, gquery: str, gqueryend: str) -> str:
+        """ Translate blank node identifiers in an ASK query """
+        subj, s_add = self._gen_s_o(pattern[0], True)
+        obj, o_add = self._gen_s_o(pattern[2], False)
+        return f"ASK {{{gquery}{subj} {self._repr_element(pattern[1])} {obj} . {s_add}{o_add} {gqueryend}}}"
+
+    def _values_term(self, position: int, node: NodeType) -> Tuple[str, str]:
+        """ Bind the GraphDB identifier rather than the node itself for TM_NS subjects and objects """
+        if position != 1 and str(node).startswith(str(TM_NS)):
+            return ('?sid', '?oid')[position // 2], str(node)[len(str(TM_NS)):]
+        return super()._values_term(position, node)
+
+    def gen_values_query(self, patterns: List[QueryTriple], gquery: str, gqueryend: str) -> str:
+        values_vars = ' '.join(self._values_key(patterns[0]))
+        rows = ' '.join('(' + ' '.join(self._values_term(i, pattern[i])[1] for i in pattern_shape(pattern)) + ')'
+                        for pattern in patterns)
+        return f"SELECT ?s ?p ?o ?sid ?oid {{VALUES ({values_vars}) {{{rows}}} " \
+               f"{gquery}?s ?p ?o . ?s {graphdb_id} ?sid . ?o {graphdb_id} ?oid . {gqueryend}}}"
+
+    @staticmethod
+    def _is_bnode_id(node: NodeType) -> bool:
+        return str(node).startswith(str(TM_NS))
+
+    def gen_closure_query(self, roots: List[NodeType], gquery: str, gqueryend: str) -> str:
+        """ Generate a query for the descriptions of the blank nodes in roots and of any RDF list that they start """
+        ids = ' '.join(str(root)[len(str(TM_NS)):] for root in roots)
+        return f"SELECT ?s ?p ?o ?sid ?oid {{VALUES ?rootid {{{ids}}} {gquery}?root {graphdb_id} ?rootid . " \
+               f"?root <{RDF.rest}>* ?s . FILTER(isBlank(?s)) ?s ?p ?o . ?s {graphdb_id} ?sid . " \
+               f"?o {graphdb_id} ?oid . {gqueryend}}}"
+
+    def _prefetch_closures(self, triples: List[RDFTriple]) -> None:
+        """ Resolve the blank node objects in triples, and the blank nodes that they reach in turn, a level at a time.
+        RDF lists are fetched whole, so the number of queries depends on the nesting depth rather than on the number of
+        blank nodes
+        """
+        frontier = list(dict.fromkeys(t.o for t in triples if self._is_bnode_id(t.o) and
+                                      not self.already_resolved((t.o, None, None))))
+        while frontier:
+            found: List[RDFTriple] = []
+            for i in range(0, len(frontier), self.prefetch_chunk_size):
+                roots = frontier[i:i + self.prefetch_chunk_size]
+                added: List[RDFTriple] = []
+                super()._slurp(self.gen_closure_query(roots, *self._graph_clauses()), (None, None, None), added,
+                               shape='closure')
+                described: Dict[NodeType, List[RDFTriple]] = {root: [] for root in roots}
+                for triple in added:
+                    described.setdefault(triple.s, []).append(triple)
+                self._record_resolved([(s, None, None) for s in described], added)
+                found += added
+            frontier = list(dict.fromkeys(t.o for t in found if self._is_bnode_id(t.o) and
+                                          not self.already_resolved((t.o, None, None))))
+
+    def _slurp(self, query: str, pattern: QueryTriple, added: Optional[List[RDFTriple]] = None,
+               shape: Optional[str] = None, store: bool = True) -> None:
+        if not self.prefetch_closures or not store:
+            # The closures of triples that are held back are prefetched by _keep, if they are kept
+            super()._slurp(query, pattern, added, shape, store)
+            return
+        triples = added if added is not None else []
+        start = len(triples)
+        super()._slurp(query, pattern, triples, shape, store)
+        self._prefetch_closures(triples[start:])
+
+    def _keep(self, query: str, triples: List[RDFTriple]) -> None:
+        super()._keep(query, triples)
+        if self.prefetch_closures:
+            self._prefetch_closures(triples)
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from rdflib.term import Node
+
+Pattern = Tuple[Optional[Node], Optional[Node], Optional[Node]]
+Triple = Tuple[Node, Node, Node]
+
+# Approximate cost, in bytes, of holding one triple in an rdflib Memory store (its entries in the spo, pos and osp
+# indices and the context maps), not counting the text of the terms themselves
+TRIPLE_OVERHEAD = 600
+
+
+def triple_size(triple: Triple) -> int:
+    """ Return the approximate number of bytes that triple occupies in the graph """
+    return TRIPLE_OVERHEAD + sum(len(term) for term in triple)
+
+
+class MemoryBudget:
+    """ Least recently used accounting of the triples loaded by each resolved pattern.
+
+    A triple can be loaded by more than one pattern (e.g. `(s, None, None)` and `(None, p, None)`), so each triple
+    is reference counted and its size is only charged once.  Evicting a pattern returns the triples that no remaining
+    pattern holds -- the ones that can be removed from the graph without making any other resolved pattern
+    incomplete.
+    """
+    def __init__(self, max_bytes: int) -> None:
+        """ Create a budget
+
+        :param max_bytes: Approximate upper bound on the size of the loaded triples
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._patterns: "OrderedDict[Pattern, List[Triple]]" = OrderedDict()
+        self._refcounts: Dict[Triple, int] = {}
+
+    def record(self, pattern: Pattern, triples: List[Triple]) -> None:
+        """ Record that pattern has been resolved, loading triples.  Pattern becomes the most recently used """
+        if pattern in self._patterns:
+            self._release(self._patterns.pop(pattern))
+        triples = list(dict.fromkeys(triples))
+        for triple in triples:
+            count = self._refcounts.get(triple, 0)
+            if not count:
+                self.size += triple_size(triple)
+            self._refcounts[triple] = count + 1
+        self._patterns[pattern] = triples
+
+    def touch(self, pattern: Pattern) -> None:
+        """ Mark pattern as the most recently used """
+        if pattern in self._patterns:
+            self._patterns.move_to_end(pattern)
+
+    def _release(self, triples: List[Triple]) -> List[Triple]:
+        """ Drop a reference to each of triples, returning the ones that are no longer referenced """
+        freed = []
+        for triple in triples:
+            count = self._refcounts[triple] - 1
+            if count:
+                self._refcounts[triple] = count
+            else:
+                del self._refcounts[triple]
+                self.size -= triple_size(triple)
+                freed.append(triple)
+        return freed
+
+    @property
+    def over_budget(self) -> bool:
+        return self.size > self.max_bytes
+
+    def evict(self) -> Tuple[Optional[Pattern], List[Triple]]:
+        """ Evict the least recently used pattern
+
+        :return: evicted pattern (None if there was nothing to evict) and the triples to remove from the graph
+        """
+        if not self._patterns:
+            return None, []
+        pattern, triples = self._patterns.popitem(last=False)
+        return pattern, self._release(triples)
+
+    def clear(self) -> None:
+        self._patterns.clear()
+        self._refcounts.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def __contains__(self, pattern: Pattern) -> bool:
+        return pattern in self._patterns
@@ -0,0 +1,149 @@
+import bisect
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Callable, Deque, BinaryIO
+
+# Slurp phases, in the order in which they occur
+PHASES = ('schedule', 'network', 'decode', 'map', 'add')
+
+# Histogram bucket upper bounds, in seconds.  The last bucket is unbounded
+BUCKET_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def shape_name(pattern) -> str:
+    """ Return the wild card shape of pattern -- e.g. `s??` or `?po` """
+    return ''.join('spo'[i] if pattern[i] is not None else '?' for i in range(3))
+
+
+@dataclass
+class QueryMetrics:
+    """ What happened while running one query """
+    shape: str
+    query: str
+    started: float = field(default_factory=time.time)
+    cached: bool = False
+    bytes_received: int = 0
+    rows: int = 0
+    timings: Dict[str, float] = field(default_factory=lambda: {phase: 0.0 for phase in PHASES})
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.timings.values())
+
+
+class Histogram:
+    """ Fixed bucket histogram of durations """
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict:
+        return dict(count=self.count, total=self.total, max=self.max,
+                    mean=self.total / self.count if self.count else 0.0,
+                    buckets={(str(b) if i < len(BUCKET_BOUNDS) else 'inf'): c
+                             for i, (b, c) in enumerate(zip(BUCKET_BOUNDS + (None, ), self.counts))})
+
+
+class MeteredReader:
+    """ Wraps a response, charging the time spent reading it to the network phase and counting the bytes """
+    def __init__(self, response: BinaryIO, metrics: QueryMetrics) -> None:
+        self.response = response
+        self.metrics = metrics
+
+    def read(self, size: int = -1) -> bytes:
+        start = time.perf_counter()
+        rval = self.response.read(size)
+        self.metrics.timings['network'] += time.perf_counter() - start
+        self.metrics.bytes_received += len(rval)
+        return rval
+
+    def close(self) -> None:
+        self.response.close()
+
+
+class SlurpMetrics:
+    """ Per query metrics for a SlurpyGraph.
+
+    Keeps the most recent `max_records` QueryMetrics, a histogram of the time spent in each phase, and the number of
+    `triples()` calls that were answered from the graph without going to the endpoint.  Listeners are called with
+    each QueryMetrics as it is completed, which is the hook for exporting to an external monitoring system.
+    """
+    def __init__(self, max_records: Optional[int] = 1000) -> None:
+        self.records: Deque[QueryMetrics] = deque(maxlen=max_records)
+        self.histograms: Dict[str, Histogram] = {phase: Histogram() for phase in PHASES + ('total', )}
+        self.calls = 0
+        self.resolved_calls = 0
+        self.queries = 0
+        self.bytes_received = 0
+        self.rows = 0
+        self.evictions = 0
+        self.evicted_triples = 0
+        self._listeners: List[Callable[[QueryMetrics], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[QueryMetrics], None]) -> Callable[[QueryMetrics], None]:
+        """ Call listener with the metrics of every completed query """
+        self._listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener: Callable[[QueryMetrics], None]) -> None:
+        self._listeners.remove(listener)
+
+    def record_call(self, already_resolved: bool) -> None:
+        """ Record a `triples()` call
+
+        :param already_resolved: True means the call was answered without a query
+        """
+        with self._lock:
+            self.calls += 1
+            if already_resolved:
+                self.resolved_calls += 1
+
+    def record_query(self, metrics: QueryMetrics) -> None:
+        """ Record a completed query and pass it on to the listeners """
+        with self._lock:
+            self.records.append(metrics)
+            self.queries += 1
+            self.bytes_received += metrics.bytes_received
+            self.rows += metrics.rows
+            for phase, elapsed in metrics.timings.items():
+                self.histograms[phase].add(elapsed)
+            self.histograms['total'].add(metrics.elapsed)
+        for listener in list(self._listeners):
+            listener(metrics)
+
+    def record_eviction(self, ntriples: int) -> None:
+        """ Record the eviction of a pattern that freed ntriples triples """
+        with self._lock:
+            self.evictions += 1
+            self.evicted_triples += ntriples
+
+    @property
+    def hit_ratio(self) -> float:
+        """ Fraction of `triples()` calls that were answered from the graph """
+        return self.resolved_calls / self.calls if self.calls else 0.0
+
+    def summary(self) -> Dict:
+        """ Return the aggregate metrics as a (JSON serializable) dictionary """
+        with self._lock:
+            return dict(calls=self.calls, resolved_calls=self.resolved_calls, hit_ratio=self.hit_ratio,
+                        queries=self.queries, rows=self.rows, bytes_received=self.bytes_received,
+                        evictions=self.evictions, evicted_triples=self.evicted_triples,
+                        phases={phase: h.as_dict() for phase, h in self.histograms.items()})
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self.histograms = {phase: Histogram() for phase in PHASES + ('total', )}
+            self.calls = self.resolved_calls = self.queries = self.bytes_received = self.rows = 0
+            self.evictions = self.evicted_triples = 0
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from rdflib.term import Node
+
+Triple = Tuple[Node, Node, Node]
+
+DEFAULT_MAX_NEGATIVES = 1000000
+
+
+class NegativeCache:
+    """ A bounded set of triples that are known not to be in the endpoint.
+
+    Only a 64 bit digest of each triple is kept, so an entry costs a few dozen bytes however long its terms are.  When
+    the set is full the oldest entries are dropped first.
+    """
+    def __init__(self, max_size: Optional[int] = DEFAULT_MAX_NEGATIVES) -> None:
+        """ Create a negative cache
+
+        :param max_size: Maximum number of triples to remember.  None means no limit, zero disables the cache
+        """
+        self.max_size = max_size
+        # A dict rather than a set so that we know which entries are oldest
+        self._digests: Dict[int, None] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(triple: Triple) -> int:
+        return int.from_bytes(hashlib.blake2b('\x00'.join(t.n3() for t in triple).encode(), digest_size=8).digest(),
+                              'little')
+
+    def add(self, triple: Triple) -> None:
+        """ Record that triple is absent """
+        if self.max_size == 0:
+            return
+        digest = self._digest(triple)
+        with self._lock:
+            if digest in self._digests:
+                return
+            if self.max_size is not None:
+                while len(self._digests) >= self.max_size:
+                    del self._digests[next(iter(self._digests))]
+            self._digests[digest] = None
+
+    def discard(self, triple: Triple) -> None:
+        """ Forget that triple is absent """
+        with self._lock:
+            self._digests.pop(self._digest(triple), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._digests.clear()
+
+    def __contains__(self, triple: Triple) -> bool:
+        return bool(self._digests) and self._digest(triple) in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Iterable
+
+
+class QueryCache:
+    """ A persistent, SQLite backed, store of SPARQL query responses.
+
+    Entries are keyed by the endpoint, its extra parameters, the graph name and the query text.  Entries older than
+    `ttl` seconds are ignored and, once the stored responses exceed `max_bytes`, the least recently used are evicted.
+    """
+    def __init__(self, path: str = ':memory:', ttl: Optional[float] = None, max_bytes: Optional[int] = None) -> None:
+        """ Open (or create) a cache
+
+        :param path: SQLite database file.  Default is an in-memory (non-persistent) database
+        :param ttl: Number of seconds that an entry remains valid.  None means forever
+        :param max_bytes: Maximum size of the stored responses.  None means unlimited
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses "
+                           "(key TEXT PRIMARY KEY, created REAL, last_used REAL, size INTEGER, bindings TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(endpoint: str, parameters: Dict[str, List[str]], graph_name: Optional[str], query: str) -> str:
+        """ Generate the key for a query
+
+        :param endpoint: SPARQL endpoint URL
+        :param parameters: additional endpoint parameters (e.g. `SPARQLWrapper.parameters`)
+        :param graph_name: graph name, if any
+        :param query: query text
+        :return: cache key
+        """
+        parms: Iterable[Tuple[str, List[str]]] = sorted((k, list(v)) for k, v in parameters.items())
+        return hashlib.sha256(json.dumps([endpoint, list(parms), graph_name, query]).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """ Return the bindings stored under key
+
+        :param key: cache key
+        :return: bindings if present and not expired, else None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT created, bindings FROM responses WHERE key = ?", (key, )).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[0] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key, ))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[1])
+
+    def put(self, key: str, bindings: List[Dict]) -> None:
+        """ Store the bindings for key, evicting least recently used entries if the cache is full
+
+        :param key: cache key
+        :param bindings: SPARQL JSON result bindings
+        """
+        now = time.time()
+        payload = json.dumps(bindings)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                               (key, now, now, len(payload), payload))
+            if self.max_bytes is not None:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                for old_key, size in self._conn.execute("SELECT key, size FROM responses WHERE key != ? "
+                                                        "ORDER BY last_used", (key, )).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key, ))
+                    total -= size
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """ Remove every entry """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rdflib.term import Node
+
+Pattern = Tuple[Optional[Node], Optional[Node], Optional[Node]]
+
+# Bound positions of each wild card shape that can be indexed: s??, ?p?, ??o, sp?, s?o, ?po, spo
+# The all wild card shape (???) is deliberately absent -- a `(None, None, None)` entry never resolves anything
+Shape = Tuple[int, ...]
+SHAPES: List[Shape] = [(0, ), (1, ), (2, ), (0, 1), (0, 2), (1, 2), (0, 1, 2)]
+
+
+def pattern_shape(pattern: Pattern) -> Shape:
+    """ Return the bound positions of pattern """
+    return tuple(i for i in range(3) if pattern[i] is not None)
+
+
+class ResolvedPatterns(list):
+    """ The list of patterns that have been loaded into a SlurpyGraph.
+
+    Behaves like the original `resolved_nodes` list, but keeps a hash map for every wild card shape so that
+    subsumption checks cost (at most) one dictionary lookup per shape rather than a scan of every resolved pattern.
+    """
+    def __init__(self, patterns: Iterable[Pattern] = ()) -> None:
+        super().__init__()
+        self._index: Dict[Shape, Dict[Tuple[Node, ...], int]] = {}
+        self.extend(patterns)
+
+    def _index_add(self, pattern: Pattern) -> None:
+        shape = pattern_shape(pattern)
+        if shape:
+            keys = self._index.setdefault(shape, {})
+            key = tuple(pattern[i] for i in shape)
+            keys[key] = keys.get(key, 0) + 1
+
+    def _index_remove(self, pattern: Pattern) -> None:
+        shape = pattern_shape(pattern)
+        if shape:
+            keys = self._index[shape]
+            key = tuple(pattern[i] for i in shape)
+            if keys[key] > 1:
+                keys[key] -= 1
+            else:
+                del keys[key]
+                if not keys:
+                    del self._index[shape]
+
+    def _reindex(self) -> None:
+        self._index = {}
+        for pattern in self:
+            self._index_add(pattern)
+
+    # List mutators -- keep the index in step with the list contents
+    def append(self, pattern: Pattern) -> None:
+        super().append(pattern)
+        self._index_add(pattern)
+
+    def extend(self, patterns: Iterable[Pattern]) -> None:
+        for pattern in patterns:
+            self.append(pattern)
+
+    def insert(self, i: int, pattern: Pattern) -> None:
+        super().insert(i, pattern)
+        self._index_add(pattern)
+
+    def remove(self, pattern: Pattern) -> None:
+        super().remove(pattern)
+        self._index_remove(pattern)
+
+    def pop(self, i: int = -1) -> Pattern:
+        pattern = super().pop(i)
+        self._index_remove(pattern)
+        return pattern
+
+    def clear(self) -> None:
+        super().clear()
+        self._index = {}
+
+    def __setitem__(self, i, value) -> None:
+        super().__setitem__(i, value)
+        self._reindex()
+
+    def __delitem__(self, i) -> None:
+        super().__delitem__(i)
+        self._reindex()
+
+    def __iadd__(self, patterns: Iterable[Pattern]) -> "ResolvedPatterns":
+        self.extend(patterns)
+        return self
+
+    def __imul__(self, n: int) -> "ResolvedPatterns":
+        super().__imul__(n)
+        self._reindex()
+        return self
+
+    def covering(self, pattern: Pattern) -> Optional[Pattern]:
+        """ Return a resolved pattern that subsumes pattern
+
+        :param pattern: pattern to check
+        :return: a resolved pattern whose bound elements all match pattern, None if there isn't one
+        """
+        for shape, keys in self._index.items():
+            if all(pattern[i] is not None for i in shape):
+                key = tuple(pattern[i] for i in shape)
+                if key in keys:
+                    rval = [None, None, None]
+                    for i, v in zip(shape, key):
+                        rval[i] = v
+                    return tuple(rval)
+        return None
+
+    def covers(self, pattern: Pattern) -> bool:
+        """ Determine whether pattern is subsumed by any resolved pattern
+
+        :param pattern: pattern to check
+        :return: True if pattern is a subset of a resolved pattern
+        """
+        return self.covering(pattern) is not None
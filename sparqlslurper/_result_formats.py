@@ -0,0 +1,251 @@
+import codecs
+import re
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from sparqlslurper._streaming import iter_json_bindings, DEFAULT_CHUNK_SIZE
+
+JSON_RESULTS = 'application/sparql-results+json'
+TSV_RESULTS = 'text/tab-separated-values'
+BINARY_RESULTS = 'application/x-binary-rdf-results-table'
+
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+
+class ResultDecoder:
+    """ Decodes one SPARQL SELECT results format.
+
+    Whatever the format, the rows come out as SPARQL JSON style bindings (`{var: {'type': ..., 'value': ...}}`), so
+    they go through the same triple building step as JSON results.
+    """
+    content_type = ''
+
+    def decode(self, stream: BinaryIO) -> Iterator[Dict]:
+        """ Yield the bindings in stream as they are read
+
+        :param stream: binary stream positioned at the start of a results document
+        :return: generator of SPARQL JSON style bindings
+        """
+        raise NotImplementedError()
+
+
+class JSONResultDecoder(ResultDecoder):
+    """ application/sparql-results+json -- the format every endpoint supports """
+    content_type = JSON_RESULTS
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+
+    def decode(self, stream: BinaryIO) -> Iterator[Dict]:
+        return iter_json_bindings(stream, self.chunk_size)
+
+
+# Turtle string escapes, as used in TSV results
+TSV_ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+TSV_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def _unescape_match(match: "re.Match") -> str:
+    code = match.group(1) or match.group(2)
+    return chr(int(code, 16)) if code else TSV_ESCAPES.get(match.group(3), match.group(3))
+
+
+def _unescape(text: str) -> str:
+    return TSV_ESCAPE.sub(_unescape_match, text) if '\\' in text else text
+
+
+def tsv_term(field: str) -> Optional[Dict]:
+    """ Convert a TSV results field (an RDF term in Turtle syntax) into a SPARQL JSON style term, None if empty """
+    if not field:
+        return None
+    first = field[0]
+    if first == '<':
+        return {'type': 'uri', 'value': _unescape(field[1:-1])}
+    if first == '"':
+        end = field.rindex('"')
+        node = {'type': 'literal', 'value': _unescape(field[1:end])}
+        if end + 1 < len(field):
+            if field[end + 1] == '@':
+                node['xml:lang'] = field[end + 2:]
+            else:
+                # ^^<datatype>
+                node['datatype'] = _unescape(field[end + 4:-1])
+        return node
+    if field.startswith('_:'):
+        return {'type': 'bnode', 'value': field[2:]}
+    # Turtle shorthand for numbers and booleans
+    datatype = 'boolean' if field in ('true', 'false') else 'double' if 'e' in field or 'E' in field \
+        else 'decimal' if '.' in field else 'integer'
+    return {'type': 'literal', 'value': field, 'datatype': XSD + datatype}
+
+
+class TSVResultDecoder(ResultDecoder):
+    """ text/tab-separated-values -- SPARQL 1.1 TSV results.  Much more compact than JSON and parsed a line at a
+    time """
+    content_type = TSV_RESULTS
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+
+    def decode(self, stream: BinaryIO) -> Iterator[Dict]:
+        text_decoder = codecs.getincrementaldecoder('utf-8')()
+        names: Optional[List[str]] = None
+        pending = ''
+        while True:
+            chunk = stream.read(self.chunk_size)
+            lines = (pending + text_decoder.decode(chunk, final=not chunk)).split('\n')
+            # The last line is incomplete until the stream is exhausted, when it is what follows the final newline
+            pending = lines.pop()
+            if not chunk and pending:
+                lines.append(pending)
+            for line in lines:
+                fields = line.rstrip('\r').split('\t')
+                if names is None:
+                    names = [name.lstrip('?$') for name in fields]
+                    continue
+                row = {}
+                for name, field in zip(names, fields):
+                    if field:
+                        row[name] = tsv_term(field)
+                yield row
+            if not chunk:
+                return
+
+
+# Record markers of the RDF4J binary results format
+BINARY_MAGIC = b'BRTR'
+NULL_RECORD = 0
+REPEAT_RECORD = 1
+NAMESPACE_RECORD = 2
+QNAME_RECORD = 3
+URI_RECORD = 4
+BNODE_RECORD = 5
+PLAIN_LITERAL_RECORD = 6
+LANG_LITERAL_RECORD = 7
+DATATYPE_LITERAL_RECORD = 8
+EMPTY_ROW_RECORD = 9
+TRIPLE_RECORD = 10
+ERROR_RECORD = 126
+TABLE_END_RECORD = 127
+
+INT = struct.Struct('>i')
+SHORT = struct.Struct('>H')
+# Strings are preceded by their length in bytes
+STRING_LENGTH = INT
+
+
+class _BinaryReader:
+    """ Reads the primitive values of the binary results format from a stream, a chunk at a time """
+    def __init__(self, stream: BinaryIO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0
+        self.length = STRING_LENGTH
+
+    def _fill(self, n: int) -> None:
+        while len(self.buf) - self.pos < n:
+            chunk = self.stream.read(max(self.chunk_size, n))
+            if not chunk:
+                raise ValueError("Unexpected end of binary SPARQL results")
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+
+    def bytes(self, n: int) -> bytes:
+        if len(self.buf) - self.pos < n:
+            self._fill(n)
+        self.pos += n
+        return self.buf[self.pos - n:self.pos]
+
+    def byte(self) -> int:
+        if self.pos >= len(self.buf):
+            self._fill(1)
+        self.pos += 1
+        return self.buf[self.pos - 1]
+
+    def int(self) -> int:
+        return INT.unpack(self.bytes(4))[0]
+
+    def string(self) -> bytes:
+        """ Return the (UTF-8 encoded) bytes of the next string """
+        return self.bytes(self.length.unpack(self.bytes(self.length.size))[0])
+
+
+class BinaryResultDecoder(ResultDecoder):
+    """ application/x-binary-rdf-results-table -- RDF4J's (and so GraphDB's) binary results format.
+
+    IRIs are sent as a namespace id plus a local name and a value that is the same as the one in the previous row is
+    sent as a one byte marker, so there is very little to decode.  RDF-star triples are not supported.
+    """
+    content_type = BINARY_RESULTS
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _marker(reader: _BinaryReader, namespaces: Dict[int, str]) -> int:
+        """ Return the next record marker, taking in any namespace declarations on the way """
+        marker = reader.byte()
+        while marker == NAMESPACE_RECORD:
+            ns_id = reader.int()
+            namespaces[ns_id] = reader.string().decode('utf-8')
+            marker = reader.byte()
+        return marker
+
+    def _value(self, reader: _BinaryReader, marker: int, namespaces: Dict[int, str],
+               previous: Optional[Dict]) -> Optional[Dict]:
+        if marker == QNAME_RECORD:
+            ns_id = reader.int()
+            return {'type': 'uri', 'value': namespaces[ns_id] + reader.string().decode('utf-8')}
+        if marker == URI_RECORD:
+            return {'type': 'uri', 'value': reader.string().decode('utf-8')}
+        if marker == PLAIN_LITERAL_RECORD:
+            return {'type': 'literal', 'value': reader.string().decode('utf-8')}
+        if marker == REPEAT_RECORD:
+            return previous
+        if marker == NULL_RECORD:
+            return None
+        if marker == DATATYPE_LITERAL_RECORD:
+            label = reader.string().decode('utf-8')
+            datatype = self._value(reader, self._marker(reader, namespaces), namespaces, None)
+            return {'type': 'literal', 'value': label, 'datatype': datatype['value']}
+        if marker == LANG_LITERAL_RECORD:
+            label = reader.string().decode('utf-8')
+            return {'type': 'literal', 'value': label, 'xml:lang': reader.string().decode('utf-8')}
+        if marker == BNODE_RECORD:
+            return {'type': 'bnode', 'value': reader.string().decode('utf-8')}
+        if marker == TRIPLE_RECORD:
+            raise ValueError("RDF-star triples are not supported")
+        raise ValueError(f"Unknown binary SPARQL results record: {marker}")
+
+    def decode(self, stream: BinaryIO) -> Iterator[Dict]:
+        reader = _BinaryReader(stream, self.chunk_size)
+        if reader.bytes(4) != BINARY_MAGIC:
+            raise ValueError("Not a binary SPARQL results document")
+        if reader.int() == 1:
+            # Version 1 used Java's modified UTF-8 strings, with a two byte length
+            reader.length = SHORT
+        names = [reader.string().decode('utf-8') for _ in range(reader.int())]
+        columns = list(enumerate(names))
+        namespaces: Dict[int, str] = {}
+        previous: List[Optional[Dict]] = [None] * len(names)
+        marker = self._marker
+        value = self._value
+        while True:
+            code = marker(reader, namespaces)
+            if code == TABLE_END_RECORD:
+                return
+            if code == ERROR_RECORD:
+                reader.byte()
+                raise ValueError(f"SPARQL endpoint error: {reader.string().decode('utf-8')}")
+            if code == EMPTY_ROW_RECORD:
+                yield {}
+                continue
+            row = {}
+            for i, name in columns:
+                if i:
+                    code = marker(reader, namespaces)
+                term = previous[i] = value(reader, code, namespaces, previous[i])
+                if term is not None:
+                    row[name] = term
+            yield row
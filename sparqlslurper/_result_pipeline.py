@@ -0,0 +1,124 @@
+import queue
+import sys
+import threading
+from typing import List, Optional, TextIO, Tuple, Union
+
+from rdflib.namespace import NamespaceManager
+from rdflib.term import Node
+
+Triple = Tuple[Node, Node, Node]
+
+# Queue entries: a batch of triples, the text of a query whose results are complete or None to stop the worker
+_Entry = Union[List[Triple], str, None]
+
+
+class ResultSink:
+    """ A long lived receiver of slurped triples.  Unlike a QueryResultHook, one sink serves every query and it is
+    called on the pipeline's worker thread rather than inside `triples()`
+    """
+    def write(self, triples: List[Triple]) -> None:
+        """ Process a batch of triples from the query in progress """
+        pass
+
+    def done(self, query: str) -> None:
+        """ All of the triples for query have been written """
+        pass
+
+    def close(self) -> None:
+        """ The pipeline is shutting down """
+        pass
+
+
+class StreamingTriplePrinter(ResultSink):
+    """ Print each triple as it arrives, one statement per line.
+
+    Without a namespace manager the output is N-Triples.  With one, the terms are abbreviated to prefixed names, which
+    is Turtle (given the prefix declarations).
+    """
+    def __init__(self, out: Optional[TextIO] = None, namespace_manager: Optional[NamespaceManager] = None) -> None:
+        """ Create a printer
+
+        :param out: Where to write.  Default: `sys.stdout` at the time of writing
+        :param namespace_manager: Abbreviate terms using these prefixes
+        """
+        self.out = out
+        self.namespace_manager = namespace_manager
+
+    def write(self, triples: List[Triple]) -> None:
+        nm = self.namespace_manager
+        out = self.out if self.out is not None else sys.stdout
+        out.write(''.join(f"{s.n3(nm)} {p.n3(nm)} {o.n3(nm)} .\n" for s, p, o in triples))
+
+    def done(self, query: str) -> None:
+        (self.out if self.out is not None else sys.stdout).flush()
+
+
+class ResultPipeline:
+    """ Hands slurped triples to a set of sinks on a background thread.
+
+    `triples()` only has to put each batch on a bounded queue, so its latency doesn't depend on what the sinks do.
+    When the queue is full the slurp either waits for the worker to catch up (`block=True`, the default) or drops the
+    batch and counts it in `dropped`.  Errors raised by sinks are kept in `errors` rather than reaching the slurp.
+    """
+    def __init__(self, *sinks: ResultSink, max_batches: int = 100, block: bool = True) -> None:
+        """ Create a pipeline and start its worker
+
+        :param sinks: receivers of the triples, called in order
+        :param max_batches: Maximum number of batches waiting for the worker
+        :param block: True means wait for room in the queue, False means drop batches that don't fit
+        """
+        self.sinks = list(sinks)
+        self.block = block
+        self.dropped = 0
+        self.errors: List[Exception] = []
+        self._queue: "queue.Queue[_Entry]" = queue.Queue(maxsize=max_batches)
+        self._worker: Optional[threading.Thread] = threading.Thread(target=self._run, daemon=True,
+                                                                    name='sparqlslurper-results')
+        self._worker.start()
+
+    def _put(self, entry: _Entry) -> None:
+        if self.block:
+            self._queue.put(entry)
+        else:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self.dropped += 1
+
+    def submit(self, triples: List[Triple]) -> None:
+        """ Queue a batch of triples for the sinks """
+        self._put(triples)
+
+    def query_done(self, query: str) -> None:
+        """ Tell the sinks that all of the triples for query have been submitted """
+        self._put(query)
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                for sink in self.sinks:
+                    try:
+                        if isinstance(entry, str):
+                            sink.done(entry)
+                        else:
+                            sink.write(entry)
+                    except Exception as e:
+                        self.errors.append(e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """ Wait until the worker has processed everything submitted so far """
+        self._queue.join()
+
+    def close(self) -> None:
+        """ Process anything outstanding, close the sinks and stop the worker """
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+            for sink in self.sinks:
+                sink.close()
@@ -0,0 +1,156 @@
+import email.utils
+import http.client
+import random
+import threading
+import time
+import urllib.error
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# HTTP statuses that mean "try again later"
+TRANSIENT_STATUSES = (429, 502, 503, 504)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """ Return the number of seconds that the Retry-After header of an HTTP error asks for, if it has one """
+    headers = getattr(error, 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class _EndpointState:
+    """ Rate limit and concurrency state for one endpoint """
+    def __init__(self, burst: float, max_concurrent: Optional[int]) -> None:
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+
+class RequestScheduler:
+    """ Paces the requests to each endpoint.
+
+    Requests are admitted by a token bucket (`rate` requests per second, bursts of up to `burst`) and at most
+    `max_concurrent` are in progress at once.  Requests that fail with a transient error -- 429, 502, 503 or 504, or a
+    dropped connection -- are retried up to `max_retries` times.  If the endpoint sent a `Retry-After` header, every
+    request to that endpoint waits that long; otherwise the request backs off exponentially, with full jitter.
+
+    One scheduler can be shared by several graphs, in which case they share each endpoint's allowance.
+    """
+    def __init__(self, rate: Optional[float] = None, burst: float = 1, max_concurrent: Optional[int] = None,
+                 max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 60.0) -> None:
+        """ Create a scheduler
+
+        :param rate: Requests per second per endpoint.  None means no rate limit
+        :param burst: Number of requests that can be issued back to back after an idle period
+        :param max_concurrent: Maximum number of requests in progress per endpoint.  None means no limit
+        :param max_retries: Number of times to retry a request that failed with a transient error
+        :param backoff: Base of the exponential backoff, in seconds
+        :param max_backoff: Upper bound on the backoff, in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+        self._endpoints: Dict[str, _EndpointState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, endpoint: str) -> _EndpointState:
+        with self._lock:
+            state = self._endpoints.get(endpoint)
+            if state is None:
+                state = self._endpoints[endpoint] = _EndpointState(self.burst, self.max_concurrent)
+            return state
+
+    def _take_token(self, state: _EndpointState) -> None:
+        """ Wait until the endpoint is not blocked and a token is available """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = state.blocked_until - now
+                if delay <= 0:
+                    if self.rate is None:
+                        return
+                    state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+                    state.updated = now
+                    if state.tokens >= 1:
+                        state.tokens -= 1
+                        return
+                    delay = (1 - state.tokens) / self.rate
+            time.sleep(delay)
+
+    def _retry_delay(self, state: _EndpointState, error: Exception, attempt: int) -> Optional[float]:
+        """ Return how long to wait before retrying after error, None if it isn't worth retrying """
+        if isinstance(error, urllib.error.HTTPError):
+            if error.code not in TRANSIENT_STATUSES:
+                return None
+            with self._lock:
+                self.throttled += 1
+            delay = retry_after(error)
+            if delay is not None:
+                # Everybody waits -- the endpoint asked for it
+                with self._lock:
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                return 0.0
+        elif not isinstance(error, (urllib.error.URLError, ConnectionError, TimeoutError,
+                                    http.client.IncompleteRead)):
+            return None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _record_wait(self, start: float) -> float:
+        """ Charge the time since start to the scheduler's wait time, returning it """
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.wait_time += waited
+        return waited
+
+    def run(self, endpoint: str, request: Callable[[], T]) -> Tuple[T, float]:
+        """ Issue request against endpoint when the rate limit allows, retrying transient failures
+
+        :param endpoint: endpoint URL -- the unit of rate limiting
+        :param request: function that issues the request
+        :return: the request's result and the number of seconds spent waiting to send it
+        """
+        state = self._state(endpoint)
+        waited = 0.0
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            if state.slots is not None:
+                state.slots.acquire()
+            try:
+                self._take_token(state)
+                waited += self._record_wait(start)
+                with self._lock:
+                    self.requests += 1
+                try:
+                    return request(), waited
+                except Exception as e:
+                    delay = self._retry_delay(state, e, attempt)
+                    if delay is None or attempt >= self.max_retries:
+                        raise
+            finally:
+                if state.slots is not None:
+                    state.slots.release()
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            start = time.perf_counter()
+            time.sleep(delay)
+            waited += self._record_wait(start)
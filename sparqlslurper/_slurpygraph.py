@@ -1,9 +1,38 @@
+import asyncio
+import copy
+import io
+import json
+import itertools
+import threading
 import time
-from typing import Dict, NamedTuple, Union, List, Tuple, Optional, Type
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, NamedTuple, Union, List, Tuple, Optional, Type, Iterable, Callable, Any, Iterator, BinaryIO
 from urllib.parse import urlsplit, parse_qsl, urlunsplit
 
 from SPARQLWrapper import SPARQLWrapper, JSON
-from rdflib import Graph, URIRef, Literal, BNode, Namespace
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed, Unauthorized, URITooLong
+from rdflib import Graph, URIRef, Literal, BNode, Namespace, Variable
+from rdflib.plugins.sparql import CUSTOM_EVALS
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.sparql import QueryContext
+from rdflib.paths import Path
+from rdflib.query import Result
+
+from sparqlslurper._endpoint_pool import EndpointPool, EndpointPolicy, Replica
+from sparqlslurper._memory_budget import MemoryBudget
+from sparqlslurper._negative_cache import NegativeCache
+from sparqlslurper._metrics import SlurpMetrics, QueryMetrics, MeteredReader, shape_name
+from sparqlslurper._query_cache import QueryCache
+from sparqlslurper._result_pipeline import ResultPipeline
+from sparqlslurper._result_formats import ResultDecoder, JSON_RESULTS
+from sparqlslurper._resolved_patterns import ResolvedPatterns, pattern_shape
+from sparqlslurper._scheduler import RequestScheduler
+from sparqlslurper._snapshot import PathType, SnapshotReader, write_snapshot
+from sparqlslurper._streaming import iter_json_bindings
+from sparqlslurper._term_cache import TermInterner
+from sparqlslurper._transport import Transport, SPARQLWrapperTransport
+from sparqlslurper._widening import WideningPolicy
 
 QueryTriple = Tuple[Optional[URIRef], Optional[URIRef], Optional[Union[Literal, URIRef]]]
 
@@ -19,36 +48,115 @@ class RDFTriple(NamedTuple):
 
 TM_NS = Namespace("http://www.ontotext.com/tm#")
 
+QUERY_VARS = ('?s', '?p', '?o')
+
+# Number of result rows converted (and added to the graph) at a time
+MAP_BATCH_SIZE = 1000
+
+# Errors that are the query's fault rather than the endpoint's -- another replica won't do any better
+QUERY_ERRORS = (QueryBadFormed, Unauthorized, URITooLong)
+
 
 class SlurpyGraph(Graph):
     """ A Graph that acts as a "cache" for a SPARQL endpoint """
-    def __init__(self, endpoint: str, *args, persistent_bnodes: bool = False, agent: Optional[str] = None,
+    def __init__(self, endpoint: Union[str, List[str]], *args, persistent_bnodes: bool = False,
+                 agent: Optional[str] = None, query_cache: Optional[QueryCache] = None, max_workers: int = 1,
+                 transport: Optional[Transport] = None, memory_budget: Optional[int] = None,
+                 scheduler: Optional[RequestScheduler] = None, endpoint_policy: Optional[EndpointPolicy] = None,
                  **kwargs) -> None:
         """ Create a graph
 
-        :param endpoint: URL of SPARQL endpoint
+        :param endpoint: URL of SPARQL endpoint, or a list of URLs of replicas of the same endpoint.  Each URL can
+        carry its own parameters
         :param persistent_bnodes: BNodes persist across SPARQL calls,
         :param agent: User agent
+        :param query_cache: Persistent store of query responses shared across graphs and processes
+        :param max_workers: Number of queries that `resolve` and `prefetch` can have in flight at once.  Values
+        greater than one also make `triples()` safe to call from multiple threads
+        :param transport: Sends the queries to the endpoint.  Default: SPARQLWrapper's urllib request
+        :param memory_budget: Approximate upper bound, in bytes, on the triples slurped into the graph.  Once it is
+        exceeded the least recently used patterns (and their triples) are evicted, to be fetched again if needed
+        :param scheduler: Rate limits, caps concurrency and retries transient failures of the requests to the endpoint
+        :param endpoint_policy: How queries are spread across a list of endpoints.  Default: round robin
         """
-        endpoint_base, query = self._parse_endpoint_parms(endpoint)
-        self.sparql = SPARQLWrapper(endpoint_base)
-        for k, v in query:
-            self.sparql.addParameter(k, v)
+        self.endpoint_pool: Optional[EndpointPool] = None
+        if isinstance(endpoint, str):
+            endpoint_base, query = self._parse_endpoint_parms(endpoint)
+            self.sparql = SPARQLWrapper(endpoint_base)
+            for k, v in query:
+                self.sparql.addParameter(k, v)
+        else:
+            # self.sparql carries the settings common to all of the replicas
+            self.endpoint_pool = EndpointPool([Replica(*self._parse_endpoint_parms(e)) for e in endpoint],
+                                              endpoint_policy)
+            self.sparql = SPARQLWrapper(self.endpoint_pool.replicas[0].endpoint)
         self.persistent_bnodes = persistent_bnodes
         self.sparql.setReturnFormat(JSON)
-        self.resolved_nodes: List[QueryTriple] = [(None, None, None)]
+        self.terms = TermInterner()
+        self._lock = threading.RLock()
+        self._thread_state = threading.local()
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Patterns whose queries are currently in flight and the (future, owning thread) of each
+        self._in_flight = ResolvedPatterns()
+        self._flights: Dict[QueryTriple, Tuple[Future, int]] = {}
+        self.transport = transport if transport is not None else SPARQLWrapperTransport()
+        self.scheduler = scheduler
+        self.memory_budget = MemoryBudget(memory_budget) if memory_budget else None
+        self.resolved_nodes = [(None, None, None)]
+        self.counts: Dict[QueryTriple, int] = {}
+        self.remote_len = False
         self.debug_slurps = False
+        self.streaming_results = False
+        self.page_size: Optional[int] = None
+        self.progressive_paging = False
+        self.widening: Optional[WideningPolicy] = None
+        self.ask_bound_patterns = False
+        self.negative_cache = NegativeCache()
+        self.result_formats: List[ResultDecoder] = []
+        self.pushdown = False
+        self.pushdown_queries = False
+        self.pushdown_cache = False
         self._query_result_hook: Optional[Type[QueryResultHook]] = None
+        self.result_pipeline: Optional[ResultPipeline] = None
         self.graph_name: Optional[str] = None
         self.total_slurptime = 0.0
         self.total_calls = 0
         self.total_queries = 0
         self.total_triples = 0
+        self.total_evictions = 0
+        self.total_evicted_triples = 0
+        self.total_coalesced = 0
+        self.query_cache = query_cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prefetch_chunk_size = 100
+        self.metrics = SlurpMetrics()
         self.sparql_locked = False
         super().__init__(*args, **kwargs)
         if agent:
             self.sparql.agent = agent
 
+    @property
+    def sparql_locked(self) -> bool:
+        """ True means don't go to the endpoint (e.g. while serializing).  The lock applies to the current thread """
+        return getattr(self._thread_state, 'sparql_locked', False)
+
+    @sparql_locked.setter
+    def sparql_locked(self, locked: bool) -> None:
+        self._thread_state.sparql_locked = locked
+
+    @property
+    def resolved_nodes(self) -> ResolvedPatterns:
+        """ The patterns that have been loaded into the cache """
+        return self._resolved_nodes
+
+    @resolved_nodes.setter
+    def resolved_nodes(self, patterns: List[QueryTriple]) -> None:
+        self._resolved_nodes = patterns if isinstance(patterns, ResolvedPatterns) else ResolvedPatterns(patterns)
+        if self.memory_budget is not None:
+            self.memory_budget.clear()
+
     def _parse_endpoint_parms(self, endpoint: str) -> Tuple[str, List[Tuple[str, str]]]:
         """
         Split the parameters off of endpoint and pass them to SPARQLWrapper via the addParams option
@@ -76,15 +184,34 @@ class SlurpyGraph(Graph):
         :param node_id: permanant identifier of node if applicable
         :return: rdflib type
         """
-        if not self.persistent_bnodes and node['type'] == 'bnode' and node_id is None:
-            raise ValueError("SlurpyGraph cannot process BNodes")
-        return URIRef(node['value']) if node['type'] == 'uri' else \
-            (BNode(node['value']) if node_id is None else TM_NS[node_id['value']]) if node['type'] == 'bnode' else \
-            Literal(node['value'], datatype=node.get('datatype'))
+        node_type = node['type']
+        if node_type == 'uri':
+            return self.terms.uri(node['value'])
+        if node_type == 'bnode':
+            if node_id is None:
+                if not self.persistent_bnodes:
+                    raise ValueError("SlurpyGraph cannot process BNodes")
+                return BNode(node['value'])
+            return self.terms.uri(TM_NS + node_id['value'])
+        return self.terms.literal(node['value'], node.get('datatype'))
+
+    def _map_rows(self, pattern: QueryTriple, rows: Iterable[Dict]) -> List[RDFTriple]:
+        """ Convert a batch of result bindings into triples in a single pass
+
+        :param pattern: supplies the elements that aren't returned in the rows
+        :param rows: SPARQL JSON result bindings
+        :return: list of triples
+        """
+        map_type = self._map_type
+        s, p, o = pattern
+        return [RDFTriple(s if s is not None else map_type(row['s'], row.get('sid')),
+                          p if p is not None else map_type(row['p']),
+                          o if o is not None else map_type(row['o'], row.get('oid')))
+                for row in rows]
 
     @staticmethod
     def _repr_element(node: Union[URIRef, BNode, Literal]) -> str:
-        return f"<{node}>" if isinstance(node, URIRef) else f"_:{node}" if isinstance(node, BNode) else '"{node}"'
+        return f"<{node}>" if isinstance(node, URIRef) else f"_:{node}" if isinstance(node, BNode) else node.n3()
 
     def already_resolved(self, pattern: QueryTriple) -> bool:
         """ Determine whether pattern has already been loaded into the cache.
@@ -96,13 +223,49 @@ class SlurpyGraph(Graph):
         """
         if self.sparql_locked or pattern == (None, None, None):
             return True
-        for resolved_node in self.resolved_nodes:
-            if resolved_node != (None, None, None) and \
-                    (pattern[0] == resolved_node[0] or resolved_node[0] is None) and \
-                    (pattern[1] == resolved_node[1] or resolved_node[1] is None) and\
-                    (pattern[2] == resolved_node[2] or resolved_node[2] is None):
-                return True
-        return False
+        if None not in pattern and pattern in self.negative_cache:
+            return True
+        with self._lock:
+            covering = self.resolved_nodes.covering(pattern)
+            if covering is not None and self.memory_budget is not None:
+                self.memory_budget.touch(covering)
+            return covering is not None
+
+    def _record_resolved(self, patterns: List[QueryTriple], triples: Optional[List[RDFTriple]]) -> None:
+        """ Mark patterns, all of which have the same shape, as resolved and charge each of them with the triples
+        that it loaded
+
+        :param patterns: patterns that have been loaded
+        :param triples: triples loaded by the query (or queries) for patterns.  Only needed with a memory budget
+        """
+        with self._lock:
+            self.resolved_nodes.extend(patterns)
+            if self.memory_budget is not None:
+                shape = pattern_shape(patterns[0])
+                matches: Dict[Tuple[NodeType, ...], List[RDFTriple]] = {}
+                for triple in triples:
+                    matches.setdefault(tuple(triple[i] for i in shape), []).append(triple)
+                for pattern in patterns:
+                    self.memory_budget.record(pattern, matches.get(tuple(pattern[i] for i in shape), []))
+
+    def _enforce_budget(self) -> None:
+        """ Evict the least recently used patterns until the graph is back within its memory budget.  The most
+        recently used pattern is always kept.  The remote counts are dropped along with the evicted patterns """
+        if self.memory_budget is None:
+            return
+        with self._lock:
+            if self.memory_budget.over_budget and len(self.memory_budget) > 1:
+                self.counts.clear()
+            while self.memory_budget.over_budget and len(self.memory_budget) > 1:
+                pattern, freed = self.memory_budget.evict()
+                self.resolved_nodes.remove(pattern)
+                for triple in freed:
+                    self.remove(triple)
+                self.total_evictions += 1
+                self.total_evicted_triples += len(freed)
+                self.metrics.record_eviction(len(freed))
+                if self.debug_slurps:
+                    print(f"EVICTED: {pattern} - {len(freed)} triples")
 
     def gen_query(self, pattern, gquery: str, gqueryend: str) -> str:
         subj = self._repr_element(pattern[0]) if pattern[0] is not None else '?s'
@@ -110,46 +273,763 @@ class SlurpyGraph(Graph):
         obj = self._repr_element(pattern[2]) if pattern[2] is not None else '?o'
         return f"SELECT ?s ?p ?o {{{gquery}{subj} {pred} {obj}{gqueryend}}}"
 
-    def triples(self, pattern: QueryTriple):
-        """ Return the triples that match pattern
+    def gen_ask_query(self, pattern: RDFTriple, gquery: str, gqueryend: str) -> str:
+        """ Generate an ASK query for a fully bound pattern """
+        return f"ASK {{{gquery}{' '.join(self._repr_element(node) for node in pattern)}{gqueryend}}}"
 
-        :param pattern: `(s, p, o)` tuple, with `None` as wild cards
-        :return: Generator for resulting triples
+    def gen_count_query(self, pattern: QueryTriple, gquery: str, gqueryend: str) -> str:
+        """ Generate a query that counts the rows that `gen_query` would return for pattern """
+        return f"SELECT (COUNT(*) AS ?count) {{{self.gen_query(pattern, gquery, gqueryend)}}}"
+
+    def _values_term(self, position: int, node: NodeType) -> Tuple[str, str]:
+        """ Return the VALUES variable and value that bind position to node """
+        return QUERY_VARS[position], self._repr_element(node)
+
+    def _values_key(self, pattern: QueryTriple) -> Tuple[str, ...]:
+        """ Return the VALUES variables for pattern.  Patterns with the same key can share a query """
+        return tuple(self._values_term(i, pattern[i])[0] for i in pattern_shape(pattern))
+
+    def gen_values_query(self, patterns: List[QueryTriple], gquery: str, gqueryend: str) -> str:
+        """ Generate a query that resolves every pattern in patterns, all of which must have the same `_values_key` """
+        values_vars = ' '.join(self._values_key(patterns[0]))
+        rows = ' '.join('(' + ' '.join(self._values_term(i, pattern[i])[1] for i in pattern_shape(pattern)) + ')'
+                        for pattern in patterns)
+        return f"SELECT ?s ?p ?o {{VALUES ({values_vars}) {{{rows}}} {gquery}?s ?p ?o{gqueryend}}}"
+
+    def _gen_node(self, node: Optional[NodeType], var: str) -> Tuple[str, str]:
+        """ Return the text for the subject or object of a pushed down pattern -- var if node is None -- and any
+        clause that it needs """
+        return var if node is None else self._repr_element(node), ''
+
+    def _node_vars(self, var: str) -> List[str]:
+        """ Return the variables to select for subject or object variable var.  Any after the first carry the node's
+        permanent identifier """
+        return [var]
+
+    def gen_bgp_query(self, templates: List[Tuple[Union[NodeType, Variable], ...]], gquery: str,
+                      gqueryend: str) -> str:
+        """ Generate a query for a basic graph pattern -- a SELECT of its variables or, if it has none, an ASK.
+
+        When graph_name is '' each triple pattern gets a graph clause of its own, as each pattern would match in any
+        graph if it were resolved on its own.
+
+        :param templates: triple patterns, with Variables for the unbound elements
         """
-        self.total_calls += 1
+        blocks = []
+        extra: Dict[str, None] = {}
+        constants: Dict[NodeType, str] = {}
+        selected: Dict[str, None] = {}
+        for template in templates:
+            terms = []
+            new_clauses = []
+            for i, node in enumerate(template):
+                if isinstance(node, Variable):
+                    var = node.n3()
+                    text, clause = (var, '') if i == 1 else self._gen_node(None, var)
+                    selected.update(dict.fromkeys([var] if i == 1 else self._node_vars(var)))
+                elif i == 1:
+                    text, clause = self._repr_element(node), ''
+                else:
+                    text, clause = self._gen_node(node, constants.setdefault(node, f"?c{len(constants)}"))
+                terms.append(text)
+                if clause not in extra:
+                    extra[clause] = None
+                    new_clauses.append(clause)
+            blocks.append(' '.join(terms) + ' .' + ''.join(new_clauses))
+        if self.graph_name == '':
+            body = ' '.join(f"graph ?g{i} {{{block}}}" for i, block in enumerate(blocks))
+        else:
+            body = f"{gquery}{' '.join(blocks)}{gqueryend}"
+        where = f"{{{body}}}"
+        return f"SELECT DISTINCT {' '.join(selected)} {where}" if selected else f"ASK {where}"
+
+    def _graph_clauses(self) -> Tuple[str, str]:
+        """ Return the text that opens and closes the graph_name clause of a query """
         if self.graph_name is not None:
             gn = "?g" if not self.graph_name else self.graph_name
-            gquery = f"graph {gn} {{"
-            gqueryend = '}'
+            return f"graph {gn} {{", '}'
+        return '', ''
+
+    def _new_sparql(self) -> SPARQLWrapper:
+        """ Return a private copy of `self.sparql` so that each request has its own query state """
+        sparql = copy.copy(self.sparql)
+        sparql.parameters = {k: list(v) for k, v in self.sparql.parameters.items()}
+        sparql.customHttpHeaders = dict(self.sparql.customHttpHeaders)
+        return sparql
+
+    def _accept_header(self) -> str:
+        """ Return the Accept header that asks for the `result_formats` in order of preference, then JSON """
+        types = [decoder.content_type for decoder in self.result_formats] + [JSON_RESULTS]
+        return ', '.join(f"{t};q={max(1.0 - i / 10, 0.1):.1f}" for i, t in enumerate(types))
+
+    def _result_decoder(self, response: BinaryIO) -> Optional[ResultDecoder]:
+        """ Return the decoder for the format that the endpoint answered in, None meaning JSON """
+        headers = getattr(response, 'headers', None)
+        content_type = headers.get('Content-Type') if headers is not None else None
+        if content_type:
+            media_type = content_type.split(';')[0].strip().lower()
+            for decoder in self.result_formats:
+                if decoder.content_type == media_type:
+                    return decoder
+        return None
+
+    def _query_bindings(self, query: str, metrics: QueryMetrics, stream: bool = True,
+                        ask: bool = False) -> Iterable[Dict]:
+        """ Return the result bindings for query, using the query cache if there is one
+
+        :param query: SELECT or ASK query text.  ASK results are returned as a single empty binding for true and no
+        bindings for false
+        :param metrics: metrics for this query
+        :param stream: False means never stream the results
+        :param ask: query is an ASK query, which is always answered in JSON
+        :return: SPARQL JSON result bindings.  A generator if `streaming_results` (and stream) is set
+        """
+        key = None
+        if self.query_cache is not None:
+            key = self.query_cache.key(self.sparql.endpoint, self.sparql.parameters, self.graph_name, query)
+            start = time.perf_counter()
+            bindings = self.query_cache.get(key)
+            metrics.timings['decode'] += time.perf_counter() - start
+            with self._lock:
+                if bindings is not None:
+                    self.cache_hits += 1
+                    metrics.cached = True
+                    return bindings
+                self.cache_misses += 1
+        sparql = self._new_sparql()
+        sparql.setQuery(query)
+        if self.result_formats and not ask:
+            # Format parameters in the URL would override the Accept header on some endpoints
+            sparql.setOnlyConneg(True)
+            sparql.customHttpHeaders['Accept'] = self._accept_header()
+        start = time.perf_counter()
+        raw_response, waited = self._send(sparql) if self.endpoint_pool is None else self._send_pooled(sparql)
+        metrics.timings['schedule'] += waited
+        decoder = self._result_decoder(raw_response) if self.result_formats else None
+        response = MeteredReader(raw_response, metrics)
+        metrics.timings['network'] += time.perf_counter() - start - waited
+        with self._lock:
+            self.total_queries += 1
+        if self.streaming_results and stream:
+            return self._stream_bindings(response, key, decoder)
+        try:
+            body = response.read()
+        finally:
+            response.close()
+        start = time.perf_counter()
+        if decoder is not None:
+            bindings = list(decoder.decode(io.BytesIO(body)))
         else:
-            gquery = gqueryend = ''
-        if not self.already_resolved(pattern):
-            query = self.gen_query(pattern, gquery, gqueryend)
-            start = time.time()
-            if self.debug_slurps:
-                print(f"SPARQL: ({query})", end="")
-            self.sparql.setQuery(query)
-            resp = self.sparql.query().convert()
-            elapsed = time.time() - start
-            ntriples = len(resp['results']['bindings'])
+            results = json.loads(body.decode('utf-8'))
+            bindings = results['results']['bindings'] if 'results' in results else [{}] if results['boolean'] else []
+        metrics.timings['decode'] += time.perf_counter() - start
+        if key is not None:
+            self.query_cache.put(key, bindings)
+        return bindings
+
+    def _send(self, sparql: SPARQLWrapper) -> Tuple[BinaryIO, float]:
+        """ Send the query in sparql via the scheduler, if there is one, and the transport
+
+        :return: response and the number of seconds spent waiting for the scheduler
+        """
+        if self.scheduler is not None:
+            return self.scheduler.run(sparql.endpoint, lambda: self.transport.query(sparql))
+        return self.transport.query(sparql), 0.0
+
+    def _send_pooled(self, sparql: SPARQLWrapper) -> Tuple[BinaryIO, float]:
+        """ Send the query in sparql to a replica chosen by the endpoint pool, moving on to the next replica if one
+        fails """
+        parameters = sparql.parameters
+        tried: List[Replica] = []
+        while True:
+            replica = self.endpoint_pool.acquire(tried)
+            sparql.endpoint = replica.endpoint
+            sparql.parameters = {k: list(v) for k, v in parameters.items()}
+            for k, v in replica.parameters:
+                sparql.addParameter(k, v)
+            start = time.perf_counter()
+            try:
+                response, waited = self._send(sparql)
+            except QUERY_ERRORS:
+                self.endpoint_pool.release(replica, time.perf_counter() - start, True)
+                raise
+            except Exception:
+                self.endpoint_pool.release(replica, time.perf_counter() - start, False)
+                tried.append(replica)
+                if len(tried) == len(self.endpoint_pool):
+                    raise
+                continue
+            self.endpoint_pool.release(replica, time.perf_counter() - start - waited, True)
+            return response, waited
+
+    def _stream_bindings(self, response, key: Optional[str], decoder: Optional[ResultDecoder] = None) \
+            -> Iterator[Dict]:
+        """ Yield the bindings in response as they arrive, recording them in the query cache once complete
+
+        :param decoder: decoder for the response's format.  Default: JSON
+        """
+        rows: Optional[List[Dict]] = [] if key is not None else None
+        try:
+            for row in (decoder.decode(response) if decoder is not None else iter_json_bindings(response)):
+                if rows is not None:
+                    rows.append(row)
+                yield row
+        finally:
+            response.close()
+        if key is not None:
+            self.query_cache.put(key, rows)
+
+    def _slurp(self, query: str, pattern: QueryTriple, added: Optional[List[RDFTriple]] = None,
+               shape: Optional[str] = None, store: bool = True) -> None:
+        """ Run query and add the resulting triples to the graph
+
+        :param query: SELECT query text
+        :param pattern: supplies the elements that aren't returned by the query
+        :param added: if present, the triples are also appended to this list
+        :param shape: shape to record in the query metrics.  Default: the shape of pattern
+        :param store: if False, the triples are only collected in added -- the caller decides whether to pass them to
+        `_keep`
+        """
+        start = time.time()
+        if self.debug_slurps:
+            print(f"SPARQL: ({query})", end="")
+        metrics = QueryMetrics(shape if shape is not None else shape_name(pattern), query)
+        timings = metrics.timings
+        bindings = self._query_bindings(query, metrics)
+        query_result = self._query_result_hook(self) if self._query_result_hook is not None and store else None
+        ntriples = 0
+        rows = iter(bindings)
+        while True:
+            # Time spent reading a streamed response while pulling rows is network, not decode, time
+            t0 = time.perf_counter()
+            network = timings['network']
+            batch = list(itertools.islice(rows, MAP_BATCH_SIZE))
+            t1 = time.perf_counter()
+            timings['decode'] += t1 - t0 - (timings['network'] - network)
+            if not batch:
+                break
+            triples = self._map_rows(pattern, batch)
+            t2 = time.perf_counter()
+            timings['map'] += t2 - t1
+            if store:
+                self._store(triples, query_result)
+            timings['add'] += time.perf_counter() - t2
+            ntriples += len(triples)
+            if added is not None:
+                added.extend(triples)
+        elapsed = time.time() - start
+        with self._lock:
             self.total_slurptime += elapsed
             self.total_triples += ntriples
-            self.total_queries += 1
-            if self.debug_slurps:
-                print(f" ({round(elapsed, 2)} secs) - {ntriples} triples")
-            query_result = self._query_result_hook(self) if self._query_result_hook is not None else None
-            for row in resp['results']['bindings']:
-                triple = RDFTriple(pattern[0] if pattern[0] is not None else self._map_type(row['s'], row.get('sid', None)),
-                                   pattern[1] if pattern[1] is not None else self._map_type(row['p']),
-                                   pattern[2] if pattern[2] is not None else self._map_type(row['o'], row.get('oid', None)))
+        metrics.rows = ntriples
+        self.metrics.record_query(metrics)
+        if self.debug_slurps:
+            print(f" ({round(elapsed, 2)} secs) - {ntriples} triples")
+        if store:
+            self._query_done(query, query_result)
+
+    def _store(self, triples: List[RDFTriple], query_result: Optional["QueryResultHook"]) -> None:
+        """ Add a batch of query results to the graph and pass them on to the result hooks and the result pipeline """
+        with self._lock:
+            for triple in triples:
                 self.add(triple)
-                if query_result:
-                    query_result.add(triple)
-            if query_result:
-                query_result.done()
-            self.resolved_nodes.append(pattern)
+        if query_result:
+            query_result.add_batch(triples)
+        if self.result_pipeline is not None:
+            self.result_pipeline.submit(triples)
+
+    def _query_done(self, query: str, query_result: Optional["QueryResultHook"]) -> None:
+        """ Tell the result hooks and the result pipeline that all of the results of query have been stored """
+        if query_result:
+            query_result.done()
+        if self.result_pipeline is not None:
+            self.result_pipeline.query_done(query)
+
+    def _keep(self, query: str, triples: List[RDFTriple]) -> None:
+        """ Store the results of a query that was slurped with `store=False`, just as `_slurp` would have
+
+        :param query: query that the triples are the results of
+        :param triples: triples collected by `_slurp`
+        """
+        query_result = self._query_result_hook(self) if self._query_result_hook is not None else None
+        for i in range(0, len(triples), MAP_BATCH_SIZE):
+            self._store(triples[i:i + MAP_BATCH_SIZE], query_result)
+        self._query_done(query, query_result)
+
+    def _budget_list(self) -> Optional[List[RDFTriple]]:
+        """ Return a list to collect the triples loaded by a query in if they are needed for the memory budget """
+        return [] if self.memory_budget is not None else None
+
+    def _ask(self, pattern: RDFTriple) -> None:
+        """ Resolve a fully bound pattern with an ASK query.  A triple that is present is added to the graph, one that
+        isn't is recorded in the negative cache """
+        start = time.time()
+        query = self.gen_ask_query(pattern, *self._graph_clauses())
+        if self.debug_slurps:
+            print(f"SPARQL: ({query})", end="")
+        metrics = QueryMetrics('ask:' + shape_name(pattern), query)
+        present = bool(self._query_bindings(query, metrics, stream=False, ask=True))
+        triple = RDFTriple(*pattern)
+        query_result = self._query_result_hook(self) if self._query_result_hook is not None else None
+        if present:
+            t0 = time.perf_counter()
+            self._store([triple], query_result)
+            metrics.timings['add'] += time.perf_counter() - t0
+            self._record_resolved([triple], [triple])
+        else:
+            self.negative_cache.add(triple)
+        elapsed = time.time() - start
+        with self._lock:
+            self.total_slurptime += elapsed
+            self.total_triples += int(present)
+        metrics.rows = int(present)
+        self.metrics.record_query(metrics)
+        if self.debug_slurps:
+            print(f" ({round(elapsed, 2)} secs) - {'present' if present else 'absent'}")
+        self._query_done(query, query_result)
+
+    def count(self, pattern: QueryTriple = (None, None, None)) -> int:
+        """ Return the number of triples that match pattern without loading them.
+
+        Patterns that have already been resolved are counted locally.  Anything else is counted by the endpoint and the
+        answer is kept in `counts`.
+
+        :param pattern: `(s, p, o)` tuple, with `None` as wild cards
+        :return: number of matching triples
+        """
+        with self._lock:
+            if self.sparql_locked or (pattern != (None, None, None) and self.already_resolved(pattern)):
+                return sum(1 for _ in super().triples(pattern))
+            if pattern in self.counts:
+                return self.counts[pattern]
+        start = time.time()
+        query = self.gen_count_query(pattern, *self._graph_clauses())
+        if self.debug_slurps:
+            print(f"SPARQL: ({query})", end="")
+        metrics = QueryMetrics('count:' + shape_name(pattern), query)
+        bindings = list(self._query_bindings(query, metrics, stream=False))
+        count = int(bindings[0]['count']['value']) if bindings else 0
+        elapsed = time.time() - start
+        with self._lock:
+            self.counts[pattern] = count
+            self.total_slurptime += elapsed
+        metrics.rows = len(bindings)
+        self.metrics.record_query(metrics)
+        if self.debug_slurps:
+            print(f" ({round(elapsed, 2)} secs) - {count} triples")
+        return count
+
+    def __len__(self) -> int:
+        """ Number of triples in the graph -- or, if `remote_len` is set, in the endpoint """
+        return self.count() if self.remote_len else super().__len__()
+
+    def __bool__(self) -> bool:
+        """ True if the graph has any triples in it.  This never queries the endpoint, even if `remote_len` is set """
+        return super().__len__() > 0
+
+    def prefetch(self, patterns: Iterable[QueryTriple], chunk_size: Optional[int] = None) -> None:
+        """ Resolve a batch of patterns, issuing one VALUES query per chunk of patterns with the same shape
+
+        :param patterns: patterns to resolve. Patterns that have already been resolved are skipped
+        :param chunk_size: maximum number of patterns per query.  Default: `prefetch_chunk_size`
+        """
+        chunk_size = chunk_size or self.prefetch_chunk_size
+        groups: Dict[Tuple[str, ...], Dict[QueryTriple, None]] = {}
+        for pattern in patterns:
+            if not self.already_resolved(pattern):
+                groups.setdefault(self._values_key(pattern), {})[pattern] = None
+        chunks = []
+        for group in groups.values():
+            group = list(group)
+            chunks += [group[i:i + chunk_size] for i in range(0, len(group), chunk_size)]
+
+        def prefetch_chunk(chunk: List[QueryTriple]) -> None:
+            added = self._budget_list()
+            self._slurp(self.gen_values_query(chunk, *self._graph_clauses()), (None, None, None), added,
+                        shape='values:' + shape_name(chunk[0]))
+            self._record_resolved(chunk, added)
+        self._run_concurrently(prefetch_chunk, chunks)
+        self._enforce_budget()
+
+    def _paged(self, pattern: QueryTriple) -> bool:
+        """ Determine whether pattern is to be loaded a page at a time """
+        return bool(self.page_size) and None in pattern
+
+    def gen_page_query(self, pattern: QueryTriple, offset: int) -> str:
+        """ Generate the query for the page of pattern's results that starts at offset """
+        order = ' '.join(QUERY_VARS[i] for i in range(3) if pattern[i] is None)
+        return f"{self.gen_query(pattern, *self._graph_clauses())} ORDER BY {order} " \
+               f"LIMIT {self.page_size} OFFSET {offset}"
+
+    def _slurp_page(self, pattern: QueryTriple, offset: int) -> List[RDFTriple]:
+        """ Load one page of pattern, returning the triples that it contained """
+        page: List[RDFTriple] = []
+        self._slurp(self.gen_page_query(pattern, offset), pattern, page)
+        return page
+
+    def _slurp_pages(self, pattern: QueryTriple, read_ahead: bool = False) -> Iterator[List[RDFTriple]]:
+        """ Load pattern a page at a time, yielding each page as it arrives.  The pattern is only marked as resolved
+        once the last page has been loaded.
+
+        :param pattern: pattern to load
+        :param read_ahead: fetch the next page on the worker pool while the current one is being consumed
+        :return: generator of pages
+        """
+        loaded = self._budget_list()
+        offset = 0
+        page = self._slurp_page(pattern, offset)
+        while True:
+            if loaded is not None:
+                loaded.extend(page)
+            more = len(page) >= self.page_size
+            next_page = self._get_executor().submit(self._slurp_page, pattern, offset + self.page_size) \
+                if more and read_ahead and self.max_workers > 1 else None
+            yield page
+            if not more:
+                break
+            offset += self.page_size
+            page = next_page.result() if next_page is not None else self._slurp_page(pattern, offset)
+        self._record_resolved([pattern], loaded)
+
+    def _progressive_triples(self, pattern: QueryTriple) -> Iterator[RDFTriple]:
+        """ Yield the triples matching pattern page by page, as they arrive from the endpoint """
+        seen = set()
+        for page in self._slurp_pages(pattern, read_ahead=True):
+            for triple in page:
+                if triple not in seen:
+                    seen.add(triple)
+                    yield triple
+
+    def _resolve(self, pattern: QueryTriple) -> bool:
+        """ Load pattern into the graph if it isn't already there.  If a query that covers pattern is already in
+        flight, wait for it rather than issuing another one
+
+        :return: True if pattern was already resolved (or was resolved by another caller's query)
+        """
+        coalesced = False
+        future: Optional[Future] = None
+        while True:
+            with self._lock:
+                if self.already_resolved(pattern):
+                    if coalesced:
+                        self.total_coalesced += 1
+                    return True
+                flight = self._in_flight.covering(pattern)
+                if flight is None:
+                    future = Future()
+                    self._in_flight.append(pattern)
+                    self._flights[pattern] = (future, threading.get_ident())
+                    break
+                waiting_on, owner = self._flights[flight]
+                if owner == threading.get_ident():
+                    # The covering query is our own (e.g. a result hook looking at the graph) -- don't wait on it
+                    break
+            # Re-raises the error if the other query failed.  If it succeeded, pattern is now resolved -- unless it has
+            # already been evicted, in which case we go round again
+            waiting_on.result()
+            coalesced = True
+        try:
+            if self.ask_bound_patterns and None not in pattern:
+                self._ask(pattern)
+            elif self._paged(pattern):
+                for _ in self._slurp_pages(pattern):
+                    pass
+            else:
+                added = self._budget_list()
+                self._slurp(self.gen_query(pattern, *self._graph_clauses()), pattern, added)
+                self._record_resolved([pattern], added)
+            if future is not None:
+                future.set_result(None)
+        except BaseException as e:
+            if future is not None:
+                future.set_exception(e)
+            raise
+        finally:
+            if future is not None:
+                with self._lock:
+                    self._in_flight.remove(pattern)
+                    del self._flights[pattern]
+        return False
+
+    def _widen(self, pattern: QueryTriple) -> None:
+        """ Consult the widening policy about pattern, resolving the wider pattern instead if the policy says so """
+        if self.sparql_locked or pattern == (None, None, None):
+            return
+        with self._lock:
+            covering = self.resolved_nodes.covering(pattern)
+        if covering is not None:
+            if self.widening.is_widened(covering):
+                self.widening.record_avoided()
+            return
+        wider = self.widening.widen(pattern)
+        if wider is None:
+            return
+        # Ask for one more triple than we'll accept so that we know whether the result is complete.  The triples are
+        # held back until then -- those of a rejected probe belong to no resolved pattern, so the memory budget would
+        # never evict them
+        added: List[RDFTriple] = []
+        query = f"{self.gen_query(wider, *self._graph_clauses())} LIMIT {self.widening.max_fanout + 1}"
+        self._slurp(query, wider, added, shape='widened:' + shape_name(wider), store=False)
+        if len(added) > self.widening.max_fanout:
+            self.widening.reject(wider)
+        else:
+            self._keep(query, added)
+            self._record_resolved([wider], added)
+            self.widening.accept(wider)
+
+    def resolve(self, patterns: Iterable[QueryTriple]) -> None:
+        """ Resolve patterns, one query per pattern, with up to `max_workers` queries in flight at once
+
+        :param patterns: patterns to resolve
+        """
+        self._run_concurrently(self._resolve, list(dict.fromkeys(patterns)))
+        self._enforce_budget()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sparqlslurper')
+            return self._executor
+
+    def _run_concurrently(self, fn: Callable[[Any], None], items: List[Any]) -> None:
+        """ Apply fn to every element of items using the worker pool if we have more than one worker """
+        if self.max_workers > 1 and len(items) > 1:
+            for _ in self._get_executor().map(fn, items):
+                pass
+        else:
+            for item in items:
+                fn(item)
+
+    def triples(self, pattern: QueryTriple):
+        """ Return the triples that match pattern
+
+        :param pattern: `(s, p, o)` tuple, with `None` as wild cards
+        :return: Generator for resulting triples
+        """
+        if isinstance(pattern[1], Path):
+            # rdflib evaluates the path with calls back to triples()
+            return super().triples(pattern)
+        with self._lock:
+            self.total_calls += 1
+        if self.widening is not None:
+            self._widen(pattern)
+        if self.progressive_paging and self._paged(pattern) and not self.already_resolved(pattern):
+            self.metrics.record_call(False)
+            return self._progressive_triples(pattern)
+        self.metrics.record_call(self._resolve(pattern))
+        if self.memory_budget is not None:
+            return self._budgeted_triples(pattern)
+        if self.max_workers > 1:
+            # Another thread can add to the store while we iterate, so take a snapshot
+            with self._lock:
+                return iter(list(super().triples(pattern)))
         return super().triples(pattern)
 
+    def _budgeted_triples(self, pattern: QueryTriple) -> Iterator[RDFTriple]:
+        """ Return a snapshot of the (resolved) triples matching pattern and then enforce the memory budget.  The
+        snapshot is needed because the caller may well resolve -- and evict -- more patterns while iterating """
+        while True:
+            with self._lock:
+                # Make sure that another thread hasn't evicted pattern in the meantime
+                if self.already_resolved(pattern):
+                    rval = list(super().triples(pattern))
+                    self._enforce_budget()
+                    return iter(rval)
+            self._resolve(pattern)
+
+    async def atriples(self, pattern: QueryTriple) -> List[RDFTriple]:
+        """ Asyncio version of `triples`.  The query runs on the event loop's default executor, and is coalesced with
+        any other (threaded or asyncio) request for the same pattern
+
+        :param pattern: `(s, p, o)` tuple, with `None` as wild cards
+        :return: list of matching triples
+        """
+        def fetch() -> List[RDFTriple]:
+            triples = self.triples(pattern)
+            with self._lock:
+                return list(triples)
+        return await asyncio.get_running_loop().run_in_executor(None, fetch)
+
+    def close(self, *args, **kwargs) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.result_pipeline is not None:
+            self.result_pipeline.close()
+            self.result_pipeline = None
+        super().close(*args, **kwargs)
+
+    def _pushdown_bgp(self, ctx: QueryContext, triples: List[Tuple]) -> Iterator:
+        """ Evaluate a basic graph pattern of a SPARQL query as one query to the endpoint.  Called by the rdflib
+        query evaluator when `pushdown` is set
+
+        :param ctx: evaluation context, supplying the values of the variables bound so far
+        :param triples: triple patterns of the BGP
+        :return: generator of solutions
+        :raises NotImplementedError: if the BGP should be evaluated triple by triple instead -- it has a property
+        path or everything that it needs is already in the cache
+        """
+        templates = []
+        names: Dict[Union[Variable, BNode], Variable] = {}
+        for triple in triples:
+            template = []
+            for i, node in enumerate(triple):
+                value = ctx[node]
+                if value is None:
+                    value = names.setdefault(node, Variable(f"v{len(names)}"))
+                elif i == 1 and not isinstance(value, URIRef):
+                    raise NotImplementedError()
+                template.append(value)
+            templates.append(tuple(template))
+        if self.sparql_locked or \
+                all(self.already_resolved(tuple(None if isinstance(e, Variable) else e for e in template))
+                    for template in templates):
+            raise NotImplementedError()
+        return self._bgp_solutions(ctx, templates, names)
+
+    def _bgp_solutions(self, ctx: QueryContext, templates: List[Tuple[Union[NodeType, Variable], ...]],
+                       names: Dict[Union[Variable, BNode], Variable]) -> Iterator:
+        """ Run the query for a pushed down BGP and generate its solutions """
+        query = self.gen_bgp_query(templates, *self._graph_clauses())
+        if self.debug_slurps:
+            print(f"SPARQL: ({query})")
+        metrics = QueryMetrics('bgp', query)
+        # The result variable (and identifier variable, if any) of each query variable
+        columns = []
+        for node, var in names.items():
+            subject_or_object = any(template[i] == var for template in templates for i in (0, 2))
+            id_vars = self._node_vars(var.n3())[1:] if subject_or_object else []
+            columns.append((node, var, str(var), id_vars[0][1:] if id_vars else None))
+        try:
+            for row in self._query_bindings(query, metrics, stream=bool(names), ask=not names):
+                start = time.perf_counter()
+                solution = ctx.push()
+                values: Dict[Variable, NodeType] = {}
+                for node, var, name, id_name in columns:
+                    solution[node] = values[var] = self._map_type(row[name], row.get(id_name) if id_name else None)
+                metrics.rows += 1
+                if self.pushdown_cache:
+                    with self._lock:
+                        for template in templates:
+                            self.add(RDFTriple(*(values[e] if isinstance(e, Variable) else e for e in template)))
+                metrics.timings['map'] += time.perf_counter() - start
+                yield solution.solution()
+        finally:
+            self.metrics.record_query(metrics)
+
+    def _result_term(self, node: Dict) -> NodeType:
+        """ Return the rdflib term for a value in the results of a pushed down query """
+        if node['type'] == 'bnode':
+            return BNode(node['value'])
+        if 'xml:lang' in node:
+            return Literal(node['value'], lang=node['xml:lang'])
+        return self._map_type(node)
+
+    def _pushdown_query(self, query_object: Any, initNs: Optional[Dict[str, Any]],
+                        initBindings: Optional[Dict]) -> Optional[Result]:
+        """ Send a whole SELECT or ASK query to the endpoint
+
+        :return: query result, None if the query can't be pushed down as a whole
+        """
+        if not isinstance(query_object, str) or initBindings or self.graph_name is not None or self.sparql_locked:
+            return None
+        namespaces = dict(initNs) if initNs is not None else dict(self.namespaces())
+        try:
+            algebra = translateQuery(parseQuery(query_object), initNs=namespaces).algebra
+        except Exception:
+            # Let rdflib report it
+            return None
+        if algebra.name not in ('SelectQuery', 'AskQuery'):
+            return None
+        # The query can use the graph's prefixes without declaring them
+        query = ''.join(f"PREFIX {prefix}: <{namespace}>\n" for prefix, namespace in namespaces.items()) + query_object
+        if self.debug_slurps:
+            print(f"SPARQL: ({query})")
+        metrics = QueryMetrics('query', query)
+        if algebra.name == 'AskQuery':
+            result = Result('ASK')
+            result.askAnswer = bool(self._query_bindings(query, metrics, stream=False, ask=True))
+        else:
+            rows = self._query_bindings(query, metrics, stream=False)
+            start = time.perf_counter()
+            result = Result('SELECT')
+            result.vars = list(algebra['PV'])
+            result.bindings = [{Variable(k): self._result_term(v) for k, v in row.items()} for row in rows]
+            metrics.rows = len(result.bindings)
+            metrics.timings['map'] += time.perf_counter() - start
+        self.metrics.record_query(metrics)
+        return result
+
+    def query(self, query_object, processor='sparql', result='sparql', initNs=None, initBindings=None,
+              use_store_provided=True, **kwargs):
+        """ Evaluate a SPARQL query.  With `pushdown_queries` set, SELECT and ASK queries go to the endpoint whole.
+        Otherwise rdflib evaluates the query, with `pushdown` sending each basic graph pattern to the endpoint as a
+        single query rather than resolving it a triple at a time
+        """
+        if self.pushdown_queries:
+            rval = self._pushdown_query(query_object, initNs, initBindings)
+            if rval is not None:
+                return rval
+        return super().query(query_object, processor, result, initNs, initBindings, use_store_provided, **kwargs)
+
+    def _endpoint_identity(self) -> List[List]:
+        """ Return the endpoint (or replicas) and parameters that the graph is a cache of, in a canonical form """
+        common = [[k, v] for k, values in self.sparql.parameters.items() for v in values]
+        replicas = [(r.endpoint, r.parameters) for r in self.endpoint_pool.replicas] \
+            if self.endpoint_pool is not None else [(self.sparql.endpoint, [])]
+        return sorted([endpoint, sorted(common + [[k, v] for k, v in parameters])]
+                      for endpoint, parameters in replicas)
+
+    def save_snapshot(self, path: PathType) -> None:
+        """ Save the cached triples, the resolved patterns, the graph name and the endpoint identity to a snapshot
+        file that `load_snapshot` can warm start a graph from
+
+        :param path: snapshot file
+        """
+        with self._lock:
+            metadata = dict(slurper=type(self).__name__, endpoint=self._endpoint_identity(),
+                            graph_name=self.graph_name, created=time.time())
+            write_snapshot(path, metadata, super().triples((None, None, None)),
+                           [pattern for pattern in self.resolved_nodes if pattern != (None, None, None)])
+
+    def load_snapshot(self, path: PathType) -> Dict[str, Any]:
+        """ Add the contents of a snapshot saved by `save_snapshot` to the graph.  Patterns that the snapshot resolved
+        won't be queried again.  The triples are streamed from the (memory mapped) file rather than read all at once
+
+        :param path: snapshot file
+        :return: the snapshot's metadata
+        :raises ValueError: if the snapshot is of a different endpoint or graph name or was taken by a different kind of
+        graph.  A graph with no graph name that is still empty takes on the snapshot's graph name
+        """
+        with SnapshotReader(path, self.terms) as snapshot:
+            metadata = snapshot.metadata
+            if metadata['endpoint'] != self._endpoint_identity():
+                raise ValueError(f"Snapshot {path} is of {metadata['endpoint']}, not {self._endpoint_identity()}")
+            if metadata['slurper'] != type(self).__name__:
+                raise ValueError(f"Snapshot {path} was taken by a {metadata['slurper']}, not a {type(self).__name__}")
+            if metadata['graph_name'] != self.graph_name:
+                if self.graph_name is not None or Graph.__len__(self) or \
+                        any(pattern_shape(pattern) for pattern in self.resolved_nodes):
+                    raise ValueError(f"Snapshot {path} is of graph {metadata['graph_name']!r}, not "
+                                     f"{self.graph_name!r}")
+                self.graph_name = metadata['graph_name']
+            loaded = self._budget_list()
+            for batch in snapshot.triple_batches(MAP_BATCH_SIZE):
+                with self._lock:
+                    for triple in batch:
+                        self.add(triple)
+                if loaded is not None:
+                    loaded.extend(batch)
+            shapes: Dict[Tuple[int, ...], List[QueryTriple]] = {}
+            with self._lock:
+                for pattern in snapshot.patterns():
+                    if self.resolved_nodes.covering(pattern) is None:
+                        shapes.setdefault(pattern_shape(pattern), []).append(pattern)
+                for patterns in shapes.values():
+                    self._record_resolved(patterns, loaded)
+            self._enforce_budget()
+        return dict(metadata, triples=snapshot.ntriples, patterns=snapshot.npatterns)
+
     def serialize(self, destination=None, format="xml",
                   base=None, encoding=None, **args):
         self.sparql_locked = True
@@ -165,6 +1045,9 @@ class QueryResultHook:
     QueryResultHook: used for printing and other processing out the outcome of a slurper query
     """
     next_hook = None
+    # Set while add_batch is calling add, so that the batch is passed down the chain whole rather than a triple at a
+    # time
+    _batching = False
 
     def __init__(self, sg: SlurpyGraph) -> None:
         self.chained_hook = self.next_hook(sg) if self.next_hook is not None else None
@@ -174,9 +1057,23 @@ class QueryResultHook:
         Add a triple as a query result
         :param t: triple being added
         """
-        if self.chained_hook is not None:
+        if self.chained_hook is not None and not self._batching:
             self.chained_hook.add(t)
 
+    def add_batch(self, triples: List[RDFTriple]) -> None:
+        """
+        Add a batch of triples as query results.  Override this rather than `add` to avoid a call per triple
+        :param triples: triples being added
+        """
+        self._batching = True
+        try:
+            for t in triples:
+                self.add(t)
+        finally:
+            self._batching = False
+        if self.chained_hook is not None:
+            self.chained_hook.add_batch(triples)
+
     def done(self) -> None:
         """
         All triples were added for this result
@@ -203,3 +1100,14 @@ class QueryResultPrinter(QueryResultHook):
         g_str = self.g.serialize(format="turtle").decode()
         print('RESULTS:\n\t' + '\n\t'.join([l for l in g_str.split('\n')
                                             if self.include_namespaces or (l and not l.startswith('@prefix'))]))
+
+
+def _pushdown_eval(ctx: QueryContext, part) -> Iterator:
+    """ rdflib custom evaluation function that hands the basic graph patterns of queries against a SlurpyGraph with
+    `pushdown` set to the graph """
+    if part.name == 'BGP' and isinstance(ctx.graph, SlurpyGraph) and ctx.graph.pushdown:
+        return ctx.graph._pushdown_bgp(ctx, part.triples)
+    raise NotImplementedError()
+
+
+CUSTOM_EVALS['sparqlslurper'] = _pushdown_eval
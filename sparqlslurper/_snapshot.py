@@ -0,0 +1,202 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from rdflib import Literal, BNode
+from rdflib.term import Node
+
+from sparqlslurper._term_cache import TermInterner
+
+Triple = Tuple[Node, Node, Node]
+Pattern = Tuple[Optional[Node], Optional[Node], Optional[Node]]
+PathType = Union[str, "os.PathLike[str]"]
+
+SNAPSHOT_MAGIC = b'SLSN'
+SNAPSHOT_VERSION = 1
+
+# magic, version, metadata length, triple count, triples offset, pattern count, patterns offset, term count,
+# terms offset
+PRELUDE = struct.Struct('<4sIIQQIQIQ')
+# Triples are fixed width rows of term ids, so the file can be read (or memory mapped) a slice at a time
+TRIPLE = struct.Struct('<3I')
+# Pattern elements are term ids, with -1 for a wild card
+PATTERN = struct.Struct('<3i')
+LENGTH = struct.Struct('<I')
+
+URI_TERM = 0
+BNODE_TERM = 1
+PLAIN_LITERAL_TERM = 2
+TYPED_LITERAL_TERM = 3
+LANG_LITERAL_TERM = 4
+
+WRITE_BATCH_SIZE = 10000
+
+
+def _string(text: str) -> bytes:
+    data = text.encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+def _encode_term(term: Node) -> bytes:
+    if isinstance(term, Literal):
+        if term.language:
+            return bytes((LANG_LITERAL_TERM, )) + _string(str(term)) + _string(term.language)
+        if term.datatype is not None:
+            return bytes((TYPED_LITERAL_TERM, )) + _string(str(term)) + _string(str(term.datatype))
+        return bytes((PLAIN_LITERAL_TERM, )) + _string(str(term))
+    return bytes((BNODE_TERM if isinstance(term, BNode) else URI_TERM, )) + _string(str(term))
+
+
+def write_snapshot(path: PathType, metadata: Dict[str, Any], triples: Iterable[Triple],
+                   patterns: Iterable[Pattern]) -> Tuple[int, int, int]:
+    """ Write a snapshot file.
+
+    The triples are written as they are read, with term ids handed out along the way, so the term table goes at the
+    end.  The file is written under a temporary name and renamed once complete.
+
+    :param path: snapshot file
+    :param metadata: JSON serializable description of the snapshot
+    :param triples: triples to save
+    :param patterns: resolved patterns to save
+    :return: number of triples, patterns and terms written
+    """
+    ids: Dict[Node, int] = {}
+
+    def term_id(term: Node) -> int:
+        rval = ids.get(term)
+        if rval is None:
+            rval = ids[term] = len(ids)
+        return rval
+
+    meta = json.dumps(metadata).encode('utf-8')
+    tmp_path = f"{os.fspath(path)}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PRELUDE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta), 0, 0, 0, 0, 0, 0))
+        f.write(meta)
+
+        triples_offset = f.tell()
+        ntriples = 0
+        batch: List[bytes] = []
+        for s, p, o in triples:
+            batch.append(TRIPLE.pack(term_id(s), term_id(p), term_id(o)))
+            if len(batch) >= WRITE_BATCH_SIZE:
+                f.write(b''.join(batch))
+                ntriples += len(batch)
+                batch = []
+        f.write(b''.join(batch))
+        ntriples += len(batch)
+
+        patterns_offset = f.tell()
+        pattern_rows = [PATTERN.pack(*(term_id(e) if e is not None else -1 for e in pattern)) for pattern in patterns]
+        f.write(b''.join(pattern_rows))
+
+        terms_offset = f.tell()
+        terms = list(ids)
+        del ids
+        for start in range(0, len(terms), WRITE_BATCH_SIZE):
+            f.write(b''.join(_encode_term(term) for term in terms[start:start + WRITE_BATCH_SIZE]))
+
+        f.seek(0)
+        f.write(PRELUDE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta), ntriples, triples_offset,
+                             len(pattern_rows), patterns_offset, len(terms), terms_offset))
+    os.replace(tmp_path, path)
+    return ntriples, len(pattern_rows), len(terms)
+
+
+class SnapshotReader:
+    """ A memory mapped snapshot file.
+
+    Opening a snapshot reads its metadata and term table.  The triples are only read as `triple_batches` is iterated,
+    a batch at a time, so loading a snapshot doesn't hold a second copy of the graph in memory.
+
+    Usage::
+
+        with SnapshotReader(path) as snapshot:
+            for batch in snapshot.triple_batches():
+                ...
+    """
+    def __init__(self, path: PathType, terms: Optional[TermInterner] = None) -> None:
+        """ Open a snapshot
+
+        :param path: snapshot file
+        :param terms: interner for the IRIs and literals in the snapshot
+        """
+        self._file: BinaryIO = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a SlurpyGraph snapshot")
+        try:
+            if len(self._map) < PRELUDE.size or self._map[:4] != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a SlurpyGraph snapshot")
+            magic, version, meta_len, self.ntriples, self._triples_offset, self.npatterns, self._patterns_offset, \
+                self.nterms, self._terms_offset = PRELUDE.unpack_from(self._map, 0)
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"{path}: unsupported snapshot version {version}")
+            self.metadata: Dict[str, Any] = \
+                json.loads(self._map[PRELUDE.size:PRELUDE.size + meta_len].decode('utf-8'))
+            self.terms = self._read_terms(terms if terms is not None else TermInterner(0))
+        except Exception:
+            self.close()
+            raise
+
+    def _read_terms(self, interner: TermInterner) -> List[Node]:
+        buf = self._map
+        pos = self._terms_offset
+        unpack_length = LENGTH.unpack_from
+
+        def string() -> str:
+            nonlocal pos
+            end = pos + LENGTH.size + unpack_length(buf, pos)[0]
+            rval = buf[pos + LENGTH.size:end].decode('utf-8')
+            pos = end
+            return rval
+
+        terms: List[Node] = []
+        for _ in range(self.nterms):
+            kind = buf[pos]
+            pos += 1
+            if kind == URI_TERM:
+                terms.append(interner.uri(string()))
+            elif kind == PLAIN_LITERAL_TERM:
+                terms.append(interner.literal(string()))
+            elif kind == TYPED_LITERAL_TERM:
+                value = string()
+                terms.append(interner.literal(value, string()))
+            elif kind == LANG_LITERAL_TERM:
+                value = string()
+                terms.append(Literal(value, lang=string()))
+            elif kind == BNODE_TERM:
+                terms.append(BNode(string()))
+            else:
+                raise ValueError(f"Corrupt snapshot: unknown term type {kind}")
+        return terms
+
+    def patterns(self) -> List[Pattern]:
+        """ Return the resolved patterns recorded in the snapshot """
+        terms = self.terms
+        return [tuple(terms[e] if e >= 0 else None for e in row)
+                for row in PATTERN.iter_unpack(self._map[self._patterns_offset:
+                                                         self._patterns_offset + self.npatterns * PATTERN.size])]
+
+    def triple_batches(self, batch_size: int = WRITE_BATCH_SIZE) -> Iterator[List[Triple]]:
+        """ Yield the triples in the snapshot, batch_size at a time """
+        terms = self.terms
+        for start in range(0, self.ntriples, batch_size):
+            offset = self._triples_offset + start * TRIPLE.size
+            rows = self._map[offset:offset + min(batch_size, self.ntriples - start) * TRIPLE.size]
+            yield [(terms[s], terms[p], terms[o]) for s, p, o in TRIPLE.iter_unpack(rows)]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -0,0 +1,71 @@
+import codecs
+import json
+import re
+from typing import BinaryIO, Dict, Iterator
+
+BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+WHITESPACE = ' \t\n\r'
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+HEAD_TAIL = 256
+
+
+def iter_json_bindings(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+    """ Incrementally parse a SPARQL JSON results document, yielding each binding as soon as it has been read.
+
+    Only the binding being decoded (plus at most one chunk of look-ahead) is held in memory.
+
+    :param stream: binary stream positioned at the start of an application/sparql-results+json document
+    :param chunk_size: number of bytes to read at a time
+    :return: generator of SPARQL JSON bindings (`{var: {'type': ..., 'value': ...}}`)
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    eof = False
+
+    def more() -> bool:
+        nonlocal buf, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            buf += text_decoder.decode(b'', final=True)
+            return False
+        buf += text_decoder.decode(chunk)
+        return True
+
+    # Skip the head and locate the start of the bindings array
+    while True:
+        match = BINDINGS_START.search(buf)
+        if match:
+            pos = match.end()
+            break
+        # Keep enough of the tail to match a key split across chunks
+        buf = buf[-HEAD_TAIL:]
+        if not more():
+            return
+
+    while True:
+        while pos < len(buf) and (buf[pos] in WHITESPACE or buf[pos] == ','):
+            pos += 1
+        if pos >= len(buf):
+            buf = ''
+            pos = 0
+            if not more():
+                raise ValueError("Unexpected end of SPARQL results")
+            continue
+        if buf[pos] == ']':
+            return
+        try:
+            row, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Binding is incomplete -- drop what has been consumed and read more
+            buf = buf[pos:]
+            pos = 0
+            if not more():
+                raise
+            continue
+        yield row
+        pos = end
@@ -0,0 +1,54 @@
+import threading
+from typing import Dict, Optional, Union
+
+from rdflib import URIRef, Literal
+
+DEFAULT_MAX_TERMS = 100000
+
+
+class TermInterner:
+    """ A bounded cache of rdflib terms, so that the IRIs and literals that recur across result rows (predicates,
+    classes, datatypes, ...) are constructed -- and hashed -- once rather than once per row.
+
+    When the cache is full the oldest entries are dropped first.
+    """
+    def __init__(self, max_size: int = DEFAULT_MAX_TERMS) -> None:
+        """ Create a term cache
+
+        :param max_size: Maximum number of terms to hold.  Zero disables interning
+        """
+        self.max_size = max_size
+        # URIs are keyed by their value, literals by a (value, datatype) tuple
+        self._terms: Dict[Union[str, tuple], Union[URIRef, Literal]] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key: Union[str, tuple], term: Union[URIRef, Literal]) -> None:
+        if self.max_size > 0:
+            with self._lock:
+                while len(self._terms) >= self.max_size:
+                    del self._terms[next(iter(self._terms))]
+                self._terms[key] = term
+
+    def uri(self, value: str) -> URIRef:
+        """ Return the URIRef for value """
+        term = self._terms.get(value)
+        if term is None:
+            term = URIRef(value)
+            self._store(value, term)
+        return term
+
+    def literal(self, value: str, datatype: Optional[str] = None) -> Literal:
+        """ Return the Literal for value and datatype """
+        key = (value, datatype)
+        term = self._terms.get(key)
+        if term is None:
+            term = Literal(value, datatype=datatype)
+            self._store(key, term)
+        return term
+
+    def clear(self) -> None:
+        with self._lock:
+            self._terms.clear()
+
+    def __len__(self) -> int:
+        return len(self._terms)
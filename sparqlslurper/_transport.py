@@ -0,0 +1,186 @@
+import base64
+import http.client
+import threading
+import urllib.error
+import zlib
+from typing import BinaryIO, Dict, Tuple, Optional, List
+from urllib.parse import urlsplit
+
+from SPARQLWrapper import SPARQLWrapper, BASIC
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed, EndPointNotFound, Unauthorized, URITooLong, \
+    EndPointInternalError
+
+# Mirror the way SPARQLWrapper surfaces HTTP errors
+SPARQL_EXCEPTIONS = {400: QueryBadFormed, 401: Unauthorized, 404: EndPointNotFound, 414: URITooLong,
+                     500: EndPointInternalError}
+
+
+class Transport:
+    """ Sends a query to a SPARQL endpoint and returns the raw response.
+
+    The endpoint, its parameters, the return format and the user agent are all taken from the SPARQLWrapper, so the
+    endpoint parameter parsing and user agent handling are the same whichever transport is used.
+    """
+    def query(self, sparql: SPARQLWrapper) -> BinaryIO:
+        """ Issue the query in sparql
+
+        :param sparql: a SPARQLWrapper that has been set up with `setQuery`
+        :return: a readable (binary) response.  The caller is responsible for closing it
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """ Release any resources held by the transport """
+        pass
+
+
+class SPARQLWrapperTransport(Transport):
+    """ The default transport -- one urllib request per query, as issued by SPARQLWrapper itself """
+    def query(self, sparql: SPARQLWrapper) -> BinaryIO:
+        return sparql.query().response
+
+
+class _DecompressingResponse:
+    """ A readable wrapper that decodes a gzip or deflate content-encoding on the fly """
+    def __init__(self, response: http.client.HTTPResponse, encoding: str, on_close) -> None:
+        self.response = response
+        self.headers = response.headers
+        # wbits: 16+ accepts a gzip header, 15 a zlib (deflate) header
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS) \
+            if encoding in ('gzip', 'deflate') else None
+        self._buf = b''
+        self._on_close = on_close
+
+    def read(self, size: int = -1) -> bytes:
+        if self._decompressor is None:
+            return self.response.read() if size is None or size < 0 else self.response.read(size)
+        if size is None or size < 0:
+            rval = self._buf + self._decompressor.decompress(self.response.read()) + self._decompressor.flush()
+            self._buf = b''
+            return rval
+        while len(self._buf) < size:
+            chunk = self.response.read(size)
+            if not chunk:
+                self._buf += self._decompressor.flush()
+                break
+            self._buf += self._decompressor.decompress(chunk)
+        rval, self._buf = self._buf[:size], self._buf[size:]
+        return rval
+
+    def close(self) -> None:
+        if self._on_close is not None:
+            self._on_close(self.response)
+            self._on_close = None
+
+
+class PooledHTTPTransport(Transport):
+    """ A transport that keeps HTTP/1.1 connections alive between queries, asks for compressed responses and POSTs
+    queries that are too long to comfortably fit in a URL.
+
+    Each thread has its own pool of connections (one per scheme, host and port), so the transport can be shared by
+    the workers of a concurrent SlurpyGraph.
+
+    Credentials set on the SPARQLWrapper (`setCredentials`) are sent as BASIC authentication; DIGEST authentication
+    needs the SPARQLWrapperTransport.
+    """
+    def __init__(self, post_threshold: int = 2000, compress: bool = True, timeout: Optional[float] = None) -> None:
+        """ Create a transport
+
+        :param post_threshold: Encoded queries longer than this are sent as POST rather than GET
+        :param compress: Ask for gzip / deflate encoded responses
+        :param timeout: Socket timeout in seconds.  Default: the SPARQLWrapper's timeout, if it has one
+        """
+        self.post_threshold = post_threshold
+        self.compress = compress
+        self.timeout = timeout
+        self._local = threading.local()
+        self._all_connections: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _connection(self, scheme: str, netloc: str, timeout: Optional[float]) -> http.client.HTTPConnection:
+        pool: Optional[Dict[Tuple[str, str], http.client.HTTPConnection]] = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = self._local.pool = {}
+        conn = pool.get((scheme, netloc))
+        if conn is None:
+            conn_type = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = conn_type(netloc, timeout=timeout)
+            pool[(scheme, netloc)] = conn
+            with self._lock:
+                self._all_connections.append(conn)
+                self.connections_opened += 1
+        elif conn.timeout != timeout:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        return conn
+
+    def _discard(self, scheme: str, netloc: str) -> None:
+        conn = getattr(self._local, 'pool', {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+            with self._lock:
+                if conn in self._all_connections:
+                    self._all_connections.remove(conn)
+
+    def query(self, sparql: SPARQLWrapper) -> BinaryIO:
+        url = urlsplit(sparql.endpoint)
+        path = url.path or '/'
+        parms = sparql._getRequestEncodedParameters(("query", sparql.queryString))
+        headers = {'User-Agent': sparql.agent, 'Accept': sparql._getAcceptHeader(), 'Connection': 'keep-alive'}
+        if self.compress:
+            headers['Accept-Encoding'] = 'gzip, deflate'
+        if len(parms) > self.post_threshold:
+            method, target, body = 'POST', path, parms.encode('ascii')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        else:
+            method, target, body = 'GET', f"{path}?{parms}", None
+        if sparql.user and sparql.passwd:
+            if sparql.http_auth != BASIC:
+                raise NotImplementedError(f"PooledHTTPTransport doesn't support {sparql.http_auth} authentication -- "
+                                          f"use SPARQLWrapperTransport")
+            credentials = base64.b64encode(f"{sparql.user}:{sparql.passwd}".encode('utf-8')).decode('ascii')
+            headers['Authorization'] = f"Basic {credentials}"
+        headers.update(sparql.customHttpHeaders)
+        timeout = self.timeout if self.timeout is not None else sparql.timeout or None
+
+        for attempt in range(2):
+            conn = self._connection(url.scheme, url.netloc, timeout)
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                response = conn.getresponse()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server dropped an idle keep-alive connection -- retry once on a fresh one
+                self._discard(url.scheme, url.netloc)
+                if attempt:
+                    raise
+            except Exception:
+                # A request that timed out leaves its response on the connection
+                self._discard(url.scheme, url.netloc)
+                raise
+
+        if response.status >= 400:
+            content = response.read()
+            self._discard(url.scheme, url.netloc)
+            if response.status in SPARQL_EXCEPTIONS:
+                raise SPARQL_EXCEPTIONS[response.status](content)
+            raise urllib.error.HTTPError(sparql.endpoint, response.status, response.reason, response.headers, None)
+
+        def on_close(resp: http.client.HTTPResponse) -> None:
+            # A partially read response leaves the connection unusable
+            if not resp.isclosed():
+                if resp.read(1):
+                    self._discard(url.scheme, url.netloc)
+                else:
+                    resp.close()
+            if resp.will_close:
+                self._discard(url.scheme, url.netloc)
+        return _DecompressingResponse(response, response.getheader('Content-Encoding', '').lower(), on_close)
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._all_connections:
+                conn.close()
+            self._all_connections = []
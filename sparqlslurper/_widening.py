@@ -0,0 +1,97 @@
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from rdflib.term import Node
+
+Pattern = Tuple[Optional[Node], Optional[Node], Optional[Node]]
+
+DEFAULT_MAX_TRACKED = 100000
+
+
+class WideningPolicy:
+    """ Decides when a narrow pattern should be fetched as a wider one.
+
+    Tree walkers tend to ask for `(s, p1, None)`, `(s, p2, None)`, ... for the same subject (or for the same predicate
+    across many subjects).  Once `threshold` unresolved patterns have shared a subject the policy widens the next one
+    to `(s, None, None)`; once they have shared a predicate, to `(None, p, None)`.  The wider pattern then answers the
+    rest of the walk through `already_resolved`.
+
+    The wider query is capped at `max_fanout` triples.  If the cap is hit the wider pattern isn't resolved, the
+    subject (or predicate) is blocked from further widening and the narrow pattern is fetched as usual.
+    """
+    def __init__(self, threshold: int = 3, max_fanout: int = 1000, max_tracked: int = DEFAULT_MAX_TRACKED) -> None:
+        """ Create a policy
+
+        :param threshold: Number of unresolved patterns sharing a subject (predicate) before it is widened
+        :param max_fanout: Largest number of triples a widened pattern may return
+        :param max_tracked: Maximum number of subjects and predicates to keep access counts for
+        """
+        self.threshold = threshold
+        self.max_fanout = max_fanout
+        self.max_tracked = max_tracked
+        self.widened = 0
+        self.rejected = 0
+        self.avoided = 0
+        # Access counts are keyed by the wider pattern that the accesses would be widened to
+        self._counts: Dict[Pattern, int] = {}
+        self._widened: Set[Pattern] = set()
+        self._blocked: Set[Pattern] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _candidates(pattern: Pattern) -> Tuple[Pattern, ...]:
+        """ Return the wider patterns that pattern could be widened to, in order of preference """
+        s, p, o = pattern
+        rval = ()
+        if s is not None and (p is not None or o is not None):
+            rval += ((s, None, None), )
+        if p is not None and (s is not None or o is not None):
+            rval += ((None, p, None), )
+        return rval
+
+    def widen(self, pattern: Pattern) -> Optional[Pattern]:
+        """ Record an access to unresolved pattern, returning the wider pattern to fetch in its place if it has crossed
+        the threshold
+
+        :param pattern: pattern about to be fetched
+        :return: wider pattern or None if pattern should be fetched as is
+        """
+        with self._lock:
+            rval = None
+            for wider in self._candidates(pattern):
+                if wider in self._blocked or wider in self._widened:
+                    continue
+                count = self._counts.get(wider, 0) + 1
+                if count >= self.threshold and rval is None:
+                    rval = wider
+                    self._counts.pop(wider, None)
+                else:
+                    while len(self._counts) >= self.max_tracked:
+                        del self._counts[next(iter(self._counts))]
+                    self._counts[wider] = count
+            return rval
+
+    def accept(self, wider: Pattern) -> None:
+        """ Record that wider was fetched in full """
+        with self._lock:
+            self.widened += 1
+            self._widened.add(wider)
+
+    def reject(self, wider: Pattern) -> None:
+        """ Record that wider exceeded `max_fanout` -- it won't be tried again """
+        with self._lock:
+            self.rejected += 1
+            self._blocked.add(wider)
+
+    def is_widened(self, pattern: Pattern) -> bool:
+        """ Determine whether pattern was resolved by widening """
+        return pattern in self._widened
+
+    def record_avoided(self) -> None:
+        """ Record a call that was answered by a widened pattern rather than a query of its own """
+        with self._lock:
+            self.avoided += 1
+
+    def stats(self) -> Dict[str, int]:
+        """ Return the widening statistics.  `avoided - rejected` is the net number of queries saved """
+        return dict(widened=self.widened, rejected=self.rejected, avoided=self.avoided)
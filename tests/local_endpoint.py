@@ -0,0 +1,271 @@
+""" A local stand-in SPARQL endpoint that serves an rdflib graph, so slurper behavior can be tested off-line """
+import base64
+import gzip
+import json
+import struct
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Optional, NamedTuple, Dict, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from rdflib import Graph, ConjunctiveGraph, URIRef, Literal
+from rdflib.term import Node
+
+GRAPHDB_ID = URIRef("http://www.ontotext.com/owlim/entity#id")
+
+JSON_RESULTS = 'application/sparql-results+json'
+TSV_RESULTS = 'text/tab-separated-values'
+BINARY_RESULTS = 'application/x-binary-rdf-results-table'
+
+
+def _tsv_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\t', '\\t').replace('\n', '\\n')\
+        .replace('\r', '\\r')
+
+
+def _tsv_field(term: Optional[Dict]) -> str:
+    if term is None:
+        return ''
+    if term['type'] == 'uri':
+        return f"<{term['value']}>"
+    if term['type'] == 'bnode':
+        return f"_:{term['value']}"
+    literal = f'"{_tsv_escape(term["value"])}"'
+    if 'xml:lang' in term:
+        return f"{literal}@{term['xml:lang']}"
+    if 'datatype' in term:
+        return f"{literal}^^<{term['datatype']}>"
+    return literal
+
+
+def encode_tsv(results: Dict) -> bytes:
+    """ Encode SPARQL JSON SELECT results as SPARQL 1.1 TSV """
+    names = results['head']['vars']
+    lines = ['\t'.join('?' + name for name in names)]
+    lines += ['\t'.join(_tsv_field(row.get(name)) for name in names) for row in results['results']['bindings']]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def encode_binary(results: Dict) -> bytes:
+    """ Encode SPARQL JSON SELECT results in the RDF4J binary results format (version 4) """
+    out = bytearray(b'BRTR')
+    namespaces: Dict[str, int] = {}
+
+    def write_int(value: int) -> None:
+        out.extend(struct.pack('>i', value))
+
+    def write_string(text: str) -> None:
+        data = text.encode('utf-8')
+        write_int(len(data))
+        out.extend(data)
+
+    def write_iri(iri: str) -> None:
+        split = max(iri.rfind('#'), iri.rfind('/')) + 1
+        if not split:
+            out.append(4)
+            write_string(iri)
+            return
+        namespace = iri[:split]
+        if namespace not in namespaces:
+            namespaces[namespace] = len(namespaces)
+            out.append(2)
+            write_int(namespaces[namespace])
+            write_string(namespace)
+        out.append(3)
+        write_int(namespaces[namespace])
+        write_string(iri[split:])
+
+    names = results['head']['vars']
+    write_int(4)
+    write_int(len(names))
+    for name in names:
+        write_string(name)
+    previous: List[Optional[Dict]] = [None] * len(names)
+    for row in results['results']['bindings']:
+        if not row:
+            out.append(9)
+            continue
+        for i, name in enumerate(names):
+            term = row.get(name)
+            if term is None:
+                out.append(0)
+            elif term == previous[i]:
+                out.append(1)
+            elif term['type'] == 'uri':
+                write_iri(term['value'])
+            elif term['type'] == 'bnode':
+                out.append(5)
+                write_string(term['value'])
+            elif 'xml:lang' in term:
+                out.append(7)
+                write_string(term['value'])
+                write_string(term['xml:lang'])
+            elif 'datatype' in term:
+                out.append(8)
+                write_string(term['value'])
+                write_iri(term['datatype'])
+            else:
+                out.append(6)
+                write_string(term['value'])
+            previous[i] = term
+    out.append(127)
+    return bytes(out)
+
+
+ENCODERS = {TSV_RESULTS: encode_tsv, BINARY_RESULTS: encode_binary}
+
+
+def preferred_format(accept: str, offered: Tuple[str, ...]) -> str:
+    """ Return the results format to answer with, given an Accept header and the formats on offer besides JSON """
+    choices = []
+    for i, entry in enumerate(accept.split(',')):
+        media_type, *params = [part.strip() for part in entry.split(';')]
+        q = next((float(p[2:]) for p in params if p.startswith('q=')), 1.0)
+        if media_type in offered or media_type == JSON_RESULTS:
+            choices.append((-q, i, media_type))
+    return min(choices)[2] if choices else JSON_RESULTS
+
+
+class RequestRecord(NamedTuple):
+    method: str
+    accept_encoding: str
+    user_agent: str
+
+
+class LocalSPARQLEndpoint:
+    """ Serve `graph` as a SPARQL 1.1 protocol endpoint on localhost
+
+    Usage::
+
+        with LocalSPARQLEndpoint(graph) as ep:
+            g = SlurpyGraph(ep.url)
+    """
+    def __init__(self, graph: Graph, latency: float = 0.0, graphdb: bool = False,
+                 result_formats: Tuple[str, ...] = (), credentials: Optional[Tuple[str, str]] = None) -> None:
+        """ Create an endpoint
+
+        :param graph: graph to serve
+        :param latency: seconds to wait before answering each request
+        :param graphdb: emulate GraphDB's `owlim:entity#id` internal identifiers
+        :param result_formats: SELECT results formats, beyond JSON, to answer with if they are asked for
+        :param credentials: user and password that requests must supply with BASIC authentication
+        """
+        self.graphdb = graphdb
+        self.authorization = 'Basic ' + base64.b64encode(':'.join(credentials).encode()).decode() \
+            if credentials else None
+        self.result_formats = result_formats
+        self.content_types: List[str] = []
+        self.ids: Dict[Node, int] = {}
+        if graphdb:
+            # Every node gets an id, just as in GraphDB.  The id triples are filtered back out of the results
+            emulated = Graph()
+            for triple in graph:
+                emulated.add(triple)
+                for node in triple:
+                    self.ids.setdefault(node, len(self.ids) + 1)
+            for node, node_id in self.ids.items():
+                emulated.add((node, GRAPHDB_ID, Literal(node_id)))
+            graph = emulated
+        # Queries are evaluated against the whole store so that `graph ?g {...}` clauses work
+        self.graph = graph if isinstance(graph, ConjunctiveGraph) else ConjunctiveGraph(graph.store)
+        self.latency = latency
+        self.queries: List[str] = []
+        self.requests: List[RequestRecord] = []
+        self.connections = 0
+        # (status, headers) to answer the next requests with instead of evaluating them
+        self.failures: List[Tuple[int, Dict[str, str]]] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/sparql"
+
+    def _evaluate(self, query: str, accept: str = '') -> Tuple[bytes, str]:
+        """ Return the results of query and their content type """
+        with self._lock:
+            self.queries.append(query)
+            body = self.graph.query(query).serialize(format='json')
+        is_select = not query.lstrip().upper().startswith('ASK')
+        content_type = preferred_format(accept, self.result_formats) if is_select else JSON_RESULTS
+        if (self.graphdb and is_select) or content_type != JSON_RESULTS:
+            results = json.loads(body)
+            if self.graphdb and is_select:
+                results['results']['bindings'] = [row for row in results['results']['bindings']
+                                                  if row.get('p', {}).get('value') != str(GRAPHDB_ID)]
+            body = ENCODERS[content_type](results) if content_type != JSON_RESULTS else json.dumps(results).encode()
+        with self._lock:
+            self.content_types.append(content_type)
+        return body, content_type
+
+    def __enter__(self) -> "LocalSPARQLEndpoint":
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self) -> None:
+                super().setup()
+                with endpoint._lock:
+                    endpoint.connections += 1
+
+            def _respond(self, query: Optional[str]) -> None:
+                endpoint.requests.append(RequestRecord(self.command, self.headers.get('Accept-Encoding', ''),
+                                                       self.headers.get('User-Agent', '')))
+                if not query:
+                    self.send_error(400, "Missing query")
+                    return
+                if endpoint.authorization is not None and self.headers.get('Authorization') != endpoint.authorization:
+                    self.send_response(401)
+                    self.send_header('WWW-Authenticate', 'Basic realm="SPARQL"')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                time.sleep(endpoint.latency)
+                with endpoint._lock:
+                    failure = endpoint.failures.pop(0) if endpoint.failures else None
+                if failure is not None:
+                    status, headers = failure
+                    self.send_response(status)
+                    for k, v in headers.items():
+                        self.send_header(k, v)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                try:
+                    body, content_type = endpoint._evaluate(query, self.headers.get('Accept', ''))
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                self._respond(parse_qs(urlsplit(self.path).query).get('query', [None])[0])
+
+            def do_POST(self) -> None:
+                data = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                if self.headers.get('Content-Type', '').startswith('application/sparql-query'):
+                    self._respond(data)
+                else:
+                    self._respond(parse_qs(data).get('query', [None])[0])
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._server.shutdown()
+        self._server.server_close()
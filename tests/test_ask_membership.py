@@ -0,0 +1,123 @@
+import unittest
+from typing import List
+
+from rdflib import Graph, Namespace, Literal, BNode
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, NegativeCache, QueryCache, TM_NS, QueryResultHook, \
+    RDFTriple, ResultPipeline, ResultSink
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class AskMembershipTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(3):
+            g.add((EX[f"s{i}"], EX.p, Literal(i)))
+        return g
+
+    def test_ask(self):
+        """ Fully bound patterns are checked with ASK and absent triples go in the negative cache """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.ask_bound_patterns = True
+            self.assertIn((EX.s1, EX.p, Literal(1)), g)
+            self.assertNotIn((EX.s1, EX.p, Literal(2)), g)
+            self.assertEqual(2, len(ep.queries))
+            self.assertTrue(all(q.startswith('ASK {') for q in ep.queries))
+            self.assertEqual(1, len(g.negative_cache))
+            self.assertEqual(2, len(g.resolved_nodes))
+
+            # Both answers are now known locally
+            self.assertIn((EX.s1, EX.p, Literal(1)), g)
+            self.assertNotIn((EX.s1, EX.p, Literal(2)), g)
+            self.assertEqual(2, len(ep.queries))
+            self.assertEqual(1, g.total_triples)
+            self.assertEqual(['ask:spo', 'ask:spo'], [m.shape for m in g.metrics.records])
+
+            # Patterns with wild cards still SELECT
+            self.assertEqual(Literal(2), g.value(EX.s2, EX.p))
+            self.assertTrue(ep.queries[-1].startswith('SELECT'))
+
+    def test_results(self):
+        """ A triple confirmed by ASK goes to the result hooks and the result pipeline like any other result """
+        hooked: List[RDFTriple] = []
+        piped: List[RDFTriple] = []
+        done: List[str] = []
+
+        class CollectingHook(QueryResultHook):
+            def add_batch(self, triples: List[RDFTriple]) -> None:
+                hooked.extend(triples)
+
+        class CollectingSink(ResultSink):
+            def write(self, triples: List[RDFTriple]) -> None:
+                piped.extend(triples)
+
+            def done(self, query: str) -> None:
+                done.append(query)
+
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.ask_bound_patterns = True
+            g.add_result_hook(CollectingHook)
+            g.result_pipeline = pipeline = ResultPipeline(CollectingSink())
+            self.assertIn((EX.s1, EX.p, Literal(1)), g)
+            self.assertNotIn((EX.s1, EX.p, Literal(2)), g)
+            pipeline.close()
+            self.assertEqual([(EX.s1, EX.p, Literal(1))], hooked)
+            self.assertEqual([(EX.s1, EX.p, Literal(1))], piped)
+            self.assertEqual(ep.queries, done)
+
+    def test_ask_off(self):
+        """ By default fully bound patterns SELECT, as before """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            self.assertNotIn((EX.s1, EX.p, Literal(2)), g)
+            self.assertTrue(ep.queries[0].startswith('SELECT'))
+            self.assertEqual(0, len(g.negative_cache))
+
+    def test_query_cache(self):
+        """ ASK answers can come from the query cache """
+        cache = QueryCache()
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            for _ in range(2):
+                g = SlurpyGraph(ep.url, query_cache=cache)
+                g.ask_bound_patterns = True
+                self.assertIn((EX.s0, EX.p, Literal(0)), g)
+                self.assertNotIn((EX.s0, EX.p, Literal(1)), g)
+            self.assertEqual(2, len(ep.queries))
+            self.assertEqual(2, g.cache_hits)
+
+    def test_graphdb_ask(self):
+        """ GraphDB blank node identifiers are translated in ASK queries """
+        src = Graph()
+        node = BNode()
+        src.add((EX.s, EX.p, node))
+        src.add((node, EX.value, Literal("x")))
+        with LocalSPARQLEndpoint(src, graphdb=True) as ep:
+            g = GraphDBSlurpyGraph(ep.url)
+            g.ask_bound_patterns = True
+            bnode_id = TM_NS[str(ep.ids[node])]
+            self.assertIn((EX.s, EX.p, bnode_id), g)
+            self.assertIn((bnode_id, EX.value, Literal("x")), g)
+            self.assertNotIn((bnode_id, EX.value, Literal("y")), g)
+            self.assertEqual(3, len(ep.queries))
+
+    def test_negative_cache_bounds(self):
+        cache = NegativeCache(max_size=2)
+        triples = [(EX[f"s{i}"], EX.p, Literal(i)) for i in range(3)]
+        for triple in triples:
+            cache.add(triple)
+        self.assertEqual(2, len(cache))
+        self.assertNotIn(triples[0], cache)
+        self.assertIn(triples[2], cache)
+        cache.discard(triples[2])
+        self.assertNotIn(triples[2], cache)
+        # Literals with different datatypes are different triples
+        self.assertNotIn((EX.s1, EX.p, Literal("1")), cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from benchmarks.harness import SCENARIOS, run_all
+
+
+class BenchmarkHarnessTestCase(unittest.TestCase):
+    def test_scenarios(self):
+        """ Every scenario runs against a small version of its dataset """
+        results = run_all(SCENARIOS, scale=0.02)
+        self.assertEqual(2 * len(SCENARIOS) - 1, len(results))
+        for result in results:
+            self.assertGreater(result.queries, 0, result.scenario)
+            self.assertGreater(result.triples, 0, result.scenario)
+            self.assertGreater(result.peak_mb, 0, result.scenario)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal, BNode, RDF, OWL
+from rdflib.collection import Collection
+
+from sparqlslurper import GraphDBSlurpyGraph
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+LIST_LEN = 20
+
+
+class BNodeClosureTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        head = BNode()
+        Collection(g, head, [Literal(f"item {i}") for i in range(LIST_LEN)])
+        g.add((EX.root, EX['items'], head))
+        # An OWL restriction nested two blank nodes deep
+        restriction = BNode()
+        inner = BNode()
+        g.add((EX.Class, OWL.equivalentClass, restriction))
+        g.add((restriction, RDF.type, OWL.Restriction))
+        g.add((restriction, OWL.onProperty, EX.prop))
+        g.add((restriction, OWL.someValuesFrom, inner))
+        g.add((inner, OWL.unionOf, RDF.nil))
+        return g
+
+    @staticmethod
+    def walk(g: GraphDBSlurpyGraph):
+        items = list(Collection(g, g.value(EX.root, EX['items'])))
+        restriction = g.value(EX.Class, OWL.equivalentClass)
+        inner = g.value(restriction, OWL.someValuesFrom)
+        return items, g.value(restriction, OWL.onProperty), g.value(inner, OWL.unionOf)
+
+    def test_closure(self):
+        """ Blank node structures come back in a query per nesting level rather than one per node """
+        with LocalSPARQLEndpoint(self.source_graph(), graphdb=True) as ep:
+            plain = GraphDBSlurpyGraph(ep.url)
+            expected = ([Literal(f"item {i}") for i in range(LIST_LEN)], EX.prop, RDF.nil)
+            self.assertEqual(expected, self.walk(plain))
+            self.assertGreater(plain.total_queries, 2 * LIST_LEN)
+
+            g = GraphDBSlurpyGraph(ep.url)
+            g.prefetch_closures = True
+            self.assertEqual(expected, self.walk(g))
+            # root/items + list closure + Collection looking at rdf:nil twice, Class/equivalentClass + restriction
+            # closure + inner closure
+            self.assertEqual(['sp?', 'closure', 'sp?', 'sp?', 'sp?', 'closure', 'closure'],
+                             [m.shape for m in g.metrics.records])
+            # ... and they include everything that the node by node walk found
+            self.assertLessEqual(set(plain), set(g))
+
+
+if __name__ == '__main__':
+    unittest.main()
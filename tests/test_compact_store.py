@@ -0,0 +1,123 @@
+import io
+import itertools
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from rdflib import Graph, Namespace, Literal, XSD, RDF
+
+from sparqlslurper import SlurpyGraph, CompactStore, QueryResultPrinter
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class CompactStoreTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph(g: Graph) -> Graph:
+        for i in range(20):
+            s = EX[f"s{i}"]
+            g.add((s, EX.type, EX[f"Class{i % 3}"]))
+            g.add((s, EX.value, Literal(i, datatype=XSD.integer)))
+            g.add((s, EX.label, Literal(f"label {i}", lang='en')))
+            g.add((s, EX.link, EX[f"s{(i * 7) % 20}"]))
+        g.add((EX.s0, EX.value, Literal("0")))
+        return g
+
+    def test_drop_in(self):
+        """ Every pattern shape gives the same answer as the default store """
+        memory = self.source_graph(Graph())
+        compact = self.source_graph(Graph(store=CompactStore()))
+        self.assertEqual(len(memory), len(compact))
+        # Adding a triple that is already there is a no-op
+        compact.add((EX.s1, EX.link, EX.s7))
+        self.assertEqual(len(memory), len(compact))
+
+        terms = [EX.s0, EX.s7, EX.link, EX.value, EX.Class1, Literal(0, datatype=XSD.integer), Literal("0"),
+                 EX.unknown]
+        for s, p, o in itertools.product([None] + terms, repeat=3):
+            self.assertEqual(set(memory.triples((s, p, o))), set(compact.triples((s, p, o))), (s, p, o))
+
+        for pattern in [(EX.s0, None, None), (None, EX.type, EX.Class1), (None, None, EX.s7)]:
+            memory.remove(pattern)
+            compact.remove(pattern)
+            self.assertEqual(set(memory), set(compact))
+            self.assertEqual(len(memory), len(compact))
+        compact.remove((None, None, None))
+        self.assertEqual(0, len(compact))
+        self.assertEqual([], list(compact.triples((None, EX.link, None))))
+        # Every term went with its last triple
+        self.assertEqual({}, compact.store._ids)
+
+    def test_term_reuse(self):
+        """ The ids of terms that are no longer used are reused """
+        store = CompactStore()
+        g = Graph(store=store)
+        for i in range(100):
+            g.add((EX[f"s{i}"], EX.value, Literal(i)))
+            g.add((EX[f"s{i}"], EX.link, EX.s0))
+            if i:
+                g.remove((EX[f"s{i - 1}"], None, None))
+        self.assertEqual({(EX.s99, EX.value, Literal(99)), (EX.s99, EX.link, EX.s0)}, set(g))
+        # s99, 99, s0, value and link plus the terms of the last triples removed
+        self.assertLessEqual(len(store._terms), 8)
+        self.assertEqual({EX.s99, Literal(99), EX.s0, EX.value, EX.link}, set(store._ids))
+        self.assertEqual([(EX.s99, EX.link, EX.s0)], list(g.triples((None, None, EX.s0))))
+
+    def test_high_fanout(self):
+        """ Adding and removing the triples of a key with a large fan-out doesn't scan its entry """
+        n = 20000
+        g = Graph(store=CompactStore())
+        start = time.perf_counter()
+        for i in range(n):
+            g.add((EX[f"s{i}"], RDF.type, EX.C))
+        g.add((EX.s0, RDF.type, EX.C))
+        self.assertEqual(n, len(g))
+        self.assertIn((EX[f"s{n - 1}"], RDF.type, EX.C), g)
+        # Latest first, so each subject is at the far end of an array entry
+        for i in reversed(range(0, n, 2)):
+            g.remove((EX[f"s{i}"], None, None))
+        self.assertEqual(n // 2, len(g))
+        self.assertEqual({EX[f"s{i}"] for i in range(1, n, 2)}, set(g.subjects(RDF.type, EX.C)))
+        self.assertNotIn((EX.s0, RDF.type, EX.C), g)
+        g.remove((None, RDF.type, EX.C))
+        self.assertEqual(0, len(g))
+        # Scanning the entry on every removal takes tens of seconds
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_update_while_iterating(self):
+        g = self.source_graph(Graph(store=CompactStore()))
+        for s, p, o in g.triples((None, EX.link, None)):
+            g.remove((s, None, None))
+            g.add((o, EX.seen, Literal(True)))
+        self.assertEqual(0, len(list(g.triples((None, EX.link, None)))))
+
+    def test_serialize(self):
+        g = self.source_graph(Graph(store=CompactStore()))
+        g.bind('ex', EX)
+        ttl = g.serialize(format='turtle')
+        ttl = ttl.decode() if isinstance(ttl, bytes) else ttl
+        self.assertIn('@prefix ex: <http://example.org/>', ttl)
+        self.assertEqual(set(self.source_graph(Graph())), set(Graph().parse(data=ttl, format='turtle')))
+
+    def test_slurpy_graph(self):
+        """ SlurpyGraph, its result hooks and eviction all work on top of the compact store """
+        with LocalSPARQLEndpoint(self.source_graph(Graph())) as ep:
+            g = SlurpyGraph(ep.url, store=CompactStore(), memory_budget=4000)
+            self.assertIsInstance(g.store, CompactStore)
+            g.add_result_hook(QueryResultPrinter)
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(EX.s7, g.value(EX.s1, EX.link))
+            self.assertIn('ns1:s1 ns1:link ns1:s7', output.getvalue())
+            g._query_result_hook = None
+            for i in range(1, 20):
+                self.assertEqual(Literal(i, datatype=XSD.integer), g.value(EX[f"s{i}"], EX.value))
+            self.assertGreater(g.total_evictions, 0)
+            self.assertLess(len(g), 20 * 4)
+            # The terms of evicted triples are dropped too
+            self.assertEqual({t for triple in g for t in triple}, set(g.store._ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
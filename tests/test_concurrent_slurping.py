@@ -0,0 +1,81 @@
+import threading
+import time
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+NSUBJECTS = 8
+LATENCY = 0.2
+
+
+class ConcurrentSlurpingTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(NSUBJECTS):
+            for j in range(3):
+                g.add((EX[f"s{i}"], EX[f"p{j}"], Literal(i * j)))
+        return g
+
+    def test_speedup(self):
+        """ Parallel resolution of high latency queries should take a fraction of the sequential time """
+        patterns = [(EX[f"s{i}"], None, None) for i in range(NSUBJECTS)]
+        with LocalSPARQLEndpoint(self.source_graph(), latency=LATENCY) as ep:
+            g1 = SlurpyGraph(ep.url)
+            start = time.time()
+            g1.resolve(patterns)
+            sequential = time.time() - start
+
+            g2 = SlurpyGraph(ep.url, max_workers=NSUBJECTS)
+            start = time.time()
+            g2.resolve(patterns)
+            concurrent = time.time() - start
+            g2.close()
+
+        self.assertEqual(set(g1), set(g2))
+        self.assertEqual((NSUBJECTS, NSUBJECTS * 3), (g2.total_queries, g2.total_triples))
+        self.assertGreater(sequential, NSUBJECTS * LATENCY)
+        self.assertLess(concurrent, sequential / 2)
+
+    def test_threaded_callers(self):
+        """ Several threads sharing one graph get complete and consistent answers """
+        with LocalSPARQLEndpoint(self.source_graph(), latency=0.05) as ep:
+            g = SlurpyGraph(ep.url, max_workers=4)
+            results = {}
+            errors = []
+
+            def worker(i: int) -> None:
+                try:
+                    results[i] = set(g.predicate_objects(EX[f"s{i}"]))
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=worker, args=(i, )) for i in range(NSUBJECTS)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual([], errors)
+            self.assertEqual(NSUBJECTS * 3, len(g))
+            for i in range(NSUBJECTS):
+                self.assertEqual(3, len(results[i]))
+            self.assertEqual(NSUBJECTS, g.total_calls)
+
+    def test_sparql_lock_per_thread(self):
+        g = SlurpyGraph("http://example.org/sparql")
+        g.sparql_locked = True
+        other = []
+        t = threading.Thread(target=lambda: other.append(g.sparql_locked))
+        t.start()
+        t.join()
+        self.assertEqual([False], other)
+        self.assertTrue(g.already_resolved((EX.s1, None, None)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal, BNode
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, TM_NS
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class CountTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(10):
+            for j in range(3):
+                g.add((EX[f"s{i}"], EX[f"p{j}"], Literal(i * j)))
+        return g
+
+    def test_count(self):
+        """ Counts come from the endpoint without loading any triples and are cached """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            self.assertEqual(30, g.count())
+            self.assertEqual(10, g.count((None, EX.p1, None)))
+            self.assertEqual(3, g.count((EX.s2, None, None)))
+            self.assertEqual(0, g.count((EX.s2, EX.p1, Literal(3))))
+            self.assertEqual(0, g.total_triples)
+            self.assertEqual(0, len(g))
+            self.assertTrue(ep.queries[0].startswith('SELECT (COUNT(*) AS ?count) {SELECT ?s ?p ?o {'))
+            self.assertEqual(4, len(ep.queries))
+            self.assertEqual(10, g.count((None, EX.p1, None)))
+            self.assertEqual(4, len(ep.queries))
+            self.assertEqual('count:?p?', g.metrics.records[1].shape)
+
+            # Resolved patterns are counted locally
+            _ = list(g.predicate_objects(EX.s4))
+            self.assertEqual(3, g.count((EX.s4, None, None)))
+            self.assertEqual(1, g.count((EX.s4, EX.p2, None)))
+            self.assertEqual(5, len(ep.queries))
+
+    def test_remote_len(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.remote_len = True
+            self.assertEqual(30, len(g))
+            self.assertEqual(0, g.total_triples)
+            g.sparql_locked = True
+            self.assertEqual(0, len(g))
+            g.sparql_locked = False
+            # Truth testing doesn't go to the endpoint
+            nqueries = len(ep.queries)
+            self.assertFalse(g)
+            _ = list(g.predicate_objects(EX.s1))
+            self.assertTrue(g)
+            self.assertEqual(nqueries + 1, len(ep.queries))
+
+    def test_eviction(self):
+        """ The remote counts go when the memory budget evicts patterns """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url, memory_budget=2000)
+            for i in range(10):
+                self.assertEqual(3, g.count((EX[f"s{i}"], None, None)))
+            self.assertEqual(10, len(g.counts))
+            for i in range(10):
+                _ = list(g.predicate_objects(EX[f"s{i}"]))
+            self.assertGreater(g.total_evictions, 0)
+            self.assertEqual({}, g.counts)
+
+    def test_graph_name(self):
+        """ The count honors graph_name """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.graph_name = '<http://example.org/nosuchgraph>'
+            self.assertEqual(0, g.count((None, EX.p1, None)))
+
+    def test_graphdb_count(self):
+        src = Graph()
+        node = BNode()
+        src.add((EX.s, EX.p, node))
+        for i in range(4):
+            src.add((node, EX.value, Literal(i)))
+        with LocalSPARQLEndpoint(src, graphdb=True) as ep:
+            g = GraphDBSlurpyGraph(ep.url)
+            self.assertEqual(4, g.count((TM_NS[str(ep.ids[node])], EX.value, None)))
+            self.assertEqual(1, g.count((None, None, TM_NS[str(ep.ids[node])])))
+
+
+if __name__ == '__main__':
+    unittest.main()
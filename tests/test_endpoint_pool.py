@@ -0,0 +1,147 @@
+import unittest
+from typing import BinaryIO, List, Tuple
+
+from rdflib import Graph, Namespace, Literal, BNode
+from SPARQLWrapper import SPARQLWrapper
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, EndpointPool, Replica, LeastOutstandingPolicy, \
+    SPARQLWrapperTransport, TM_NS
+from sparqlslurper._user_agent import SlurpyGraphWithAgent
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class RecordingTransport(SPARQLWrapperTransport):
+    """ Remember where each query went """
+    def __init__(self) -> None:
+        self.sent: List[Tuple[str, dict]] = []
+
+    def query(self, sparql: SPARQLWrapper) -> BinaryIO:
+        self.sent.append((sparql.endpoint, {k: v for k, v in sparql.parameters.items() if k != 'query'}))
+        return super().query(sparql)
+
+
+class EndpointPoolTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(6):
+            g.add((EX[f"s{i}"], EX.p, Literal(i)))
+        return g
+
+    def test_round_robin(self):
+        """ Queries are spread evenly across the replicas and the answers are the same """
+        src = self.source_graph()
+        with LocalSPARQLEndpoint(src) as ep1, LocalSPARQLEndpoint(src) as ep2:
+            g = SlurpyGraph([ep1.url, ep2.url])
+            for i in range(6):
+                self.assertEqual(Literal(i), g.value(EX[f"s{i}"], EX.p))
+            self.assertEqual(3, len(ep1.queries))
+            self.assertEqual(3, len(ep2.queries))
+            stats = g.endpoint_pool.stats()
+            self.assertEqual([ep1.url, ep2.url], [s['endpoint'] for s in stats])
+            self.assertEqual([3, 3], [s['queries'] for s in stats])
+            self.assertTrue(all(s['healthy'] and s['mean_latency'] > 0 for s in stats))
+
+    def test_least_outstanding(self):
+        """ Once it has been tried, a slow replica is passed over for a faster one """
+        src = self.source_graph()
+        with LocalSPARQLEndpoint(src, latency=0.2) as slow, LocalSPARQLEndpoint(src) as fast:
+            g = SlurpyGraph([slow.url, fast.url], endpoint_policy=LeastOutstandingPolicy())
+            for i in range(6):
+                self.assertEqual(Literal(i), g.value(EX[f"s{i}"], EX.p))
+            self.assertEqual(1, len(slow.queries))
+            self.assertEqual(5, len(fast.queries))
+
+        # Replicas with requests in progress come last
+        pool = EndpointPool([Replica('http://a', []), Replica('http://b', [])], LeastOutstandingPolicy())
+        a = pool.acquire()
+        self.assertIsNot(a, pool.acquire())
+        pool.release(a, 0.1, True)
+        self.assertIs(a, pool.acquire())
+
+    def test_failover(self):
+        """ A failing replica's queries go to the next one, and it is taken out of rotation """
+        src = self.source_graph()
+        with LocalSPARQLEndpoint(src) as ep1, LocalSPARQLEndpoint(src) as ep2:
+            ep1.failures = [(500, {})] * 10
+            g = SlurpyGraph([ep1.url, ep2.url])
+            g.endpoint_pool.max_failures = 2
+            for i in range(6):
+                self.assertEqual(Literal(i), g.value(EX[f"s{i}"], EX.p))
+            self.assertEqual(0, len(ep1.queries))
+            self.assertEqual(6, len(ep2.queries))
+            down, up = g.endpoint_pool.replicas
+            self.assertEqual(2, down.failures)
+            self.assertFalse(down.healthy)
+            self.assertTrue(up.healthy)
+            self.assertEqual(8, len(ep1.failures))
+
+    def test_all_down(self):
+        """ When every replica fails, so does the query """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep1, LocalSPARQLEndpoint(self.source_graph()) as ep2:
+            ep1.failures = [(500, {})]
+            ep2.failures = [(503, {})]
+            g = SlurpyGraph([ep1.url, ep2.url])
+            with self.assertRaises(Exception):
+                g.value(EX.s0, EX.p)
+            self.assertEqual([1, 1], [s['failures'] for s in g.endpoint_pool.stats()])
+
+    def test_bad_query(self):
+        """ A query the endpoint rejects isn't retried elsewhere or held against the replica """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep1, LocalSPARQLEndpoint(self.source_graph()) as ep2:
+            ep1.failures = [(400, {})]
+            g = SlurpyGraph([ep1.url, ep2.url])
+            with self.assertRaises(Exception):
+                g.value(EX.s0, EX.p)
+            self.assertEqual(0, len(ep2.queries))
+            self.assertEqual([0, 0], [s['failures'] for s in g.endpoint_pool.stats()])
+
+    def test_replica_parameters(self):
+        """ Each replica gets its own URL parameters """
+        transport = RecordingTransport()
+        with LocalSPARQLEndpoint(self.source_graph()) as ep1, LocalSPARQLEndpoint(self.source_graph()) as ep2:
+            g = SlurpyGraph([ep1.url + '?infer=false', ep2.url + '?timeout=5'], transport=transport)
+            g.value(EX.s0, EX.p)
+            g.value(EX.s1, EX.p)
+            self.assertEqual([(ep1.url, {'infer': ['false']}), (ep2.url, {'timeout': ['5']})], transport.sent)
+
+    def test_graphdb(self):
+        """ The GraphDB slurper and SlurpyGraphWithAgent accept a list of endpoints too """
+        src = Graph()
+        node = BNode()
+        src.add((EX.s, EX.p, node))
+        src.add((node, EX.value, Literal("x")))
+        with LocalSPARQLEndpoint(src, graphdb=True) as ep1, LocalSPARQLEndpoint(src, graphdb=True) as ep2:
+            g = GraphDBSlurpyGraph([ep1.url, ep2.url])
+            bnode = g.value(EX.s, EX.p)
+            self.assertEqual(TM_NS[str(ep1.ids[node])], bnode)
+            self.assertEqual(Literal("x"), g.value(bnode, EX.value))
+            self.assertEqual(1, len(ep1.queries))
+            self.assertEqual(1, len(ep2.queries))
+
+            g = SlurpyGraphWithAgent([ep1.url, ep2.url], agent="pool-test", gdb_slurper=True)
+            self.assertIsInstance(g, GraphDBSlurpyGraph)
+            self.assertEqual(2, len(g.endpoint_pool))
+
+    def test_pool(self):
+        pool = EndpointPool([Replica('http://a', []), Replica('http://b', [])], max_failures=1, cooldown=60)
+        a = pool.acquire()
+        pool.release(a, 0.1, False)
+        self.assertFalse(a.healthy)
+        # An unhealthy replica is skipped
+        b = pool.acquire()
+        self.assertEqual('http://b', b.endpoint)
+        self.assertEqual(1, b.outstanding)
+        pool.release(b, 0.2, True)
+        self.assertEqual('http://b', pool.acquire().endpoint)
+        # ... unless there is nothing else left
+        self.assertIs(a, pool.acquire(exclude=[b]))
+        self.assertIsNone(pool.acquire(exclude=[a, b]))
+        with self.assertRaises(ValueError):
+            EndpointPool([])
+
+
+if __name__ == '__main__':
+    unittest.main()
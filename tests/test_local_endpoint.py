@@ -0,0 +1,40 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal, BNode, RDF
+from rdflib.collection import Collection
+
+from sparqlslurper import GraphDBSlurpyGraph, TM_NS
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class LocalEndpointTestCase(unittest.TestCase):
+    def test_graphdb_emulation(self):
+        """ GraphDBSlurpyGraph can cross blank nodes using the emulated entity ids """
+        src = Graph()
+        ident = BNode()
+        src.add((EX.pat4, EX.identifier, ident))
+        src.add((ident, EX.value, Literal("pat4")))
+        Collection(src, BNode(), [Literal(i) for i in range(3)])
+        src.add((EX.pat4, EX.list, next(src.subjects(RDF.first, Literal(0)))))
+
+        with LocalSPARQLEndpoint(src, graphdb=True) as ep:
+            g = GraphDBSlurpyGraph(ep.url)
+            obj = g.value(EX.pat4, EX.identifier)
+            self.assertEqual(TM_NS[str(ep.ids[ident])], obj)
+            self.assertEqual(Literal("pat4"), g.value(obj, EX.value))
+            lst = g.value(EX.pat4, EX.list)
+            self.assertEqual([Literal(i) for i in range(3)], list(Collection(g, lst)))
+            # The id triples never leak into the results
+            self.assertEqual(2, len(list(g.predicate_objects(EX.pat4))))
+            g = GraphDBSlurpyGraph(ep.url)
+            list_nodes = [TM_NS[str(ep.ids[n])] for n in src.subjects(RDF.first, None)]
+            g.prefetch([(n, None, None) for n in list_nodes])
+            self.assertEqual(1, g.total_queries)
+            self.assertEqual({Literal(i) for i in range(3)}, {g.value(n, RDF.first) for n in list_nodes})
+            self.assertEqual(1, g.total_queries)
+
+
+if __name__ == '__main__':
+    unittest.main()
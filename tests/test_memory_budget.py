@@ -0,0 +1,84 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph
+from sparqlslurper._memory_budget import triple_size
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+NSUBJECTS = 10
+NPROPS = 5
+
+
+class MemoryBudgetTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.source = Graph()
+        for i in range(NSUBJECTS):
+            for j in range(NPROPS):
+                cls.source.add((EX[f"s{i}"], EX[f"p{j}"], Literal(f"value {i}.{j}")))
+        # Room for (a bit more than) two subjects worth of triples
+        cls.budget = 2 * max(sum(triple_size(t) for t in cls.source.triples((EX[f"s{i}"], None, None)))
+                             for i in range(NSUBJECTS)) + 100
+
+    def test_eviction(self):
+        """ The graph stays within its budget and evicted patterns are fetched again when needed """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url, memory_budget=self.budget)
+            for i in range(NSUBJECTS):
+                self.assertEqual(NPROPS, len(list(g.predicate_objects(EX[f"s{i}"]))))
+                self.assertLessEqual(g.memory_budget.size, self.budget)
+                self.assertLessEqual(len(g), 2 * NPROPS)
+            self.assertEqual(NSUBJECTS, g.total_queries)
+            self.assertEqual(NSUBJECTS - 2, g.total_evictions)
+            self.assertEqual((NSUBJECTS - 2) * NPROPS, g.total_evicted_triples)
+            self.assertFalse(g.already_resolved((EX.s0, None, None)))
+            self.assertTrue(g.already_resolved((EX[f"s{NSUBJECTS - 1}"], None, None)))
+
+            # s0 was evicted -- it has to come back in full
+            self.assertEqual(set(self.source.predicate_objects(EX.s0)), set(g.predicate_objects(EX.s0)))
+            self.assertEqual(NSUBJECTS + 1, g.total_queries)
+
+            summary = g.metrics.summary()
+            self.assertEqual((NSUBJECTS - 1, (NSUBJECTS - 1) * NPROPS),
+                             (summary['evictions'], summary['evicted_triples']))
+
+    def test_least_recently_used(self):
+        """ Patterns that are in use stay in the graph """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url, memory_budget=self.budget)
+            for i in range(1, NSUBJECTS):
+                _ = list(g.predicate_objects(EX.s0))
+                _ = list(g.predicate_objects(EX[f"s{i}"]))
+            self.assertTrue(g.already_resolved((EX.s0, EX.p1, None)))
+            self.assertEqual(NSUBJECTS, g.total_queries)
+
+    def test_shared_triples(self):
+        """ Evicting a pattern doesn't remove triples that another resolved pattern still needs """
+        budget = sum(triple_size(t) for t in self.source.triples((None, EX.p0, None))) + \
+            sum(triple_size(t) for t in self.source.triples((EX.s0, None, None))) + 100
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url, memory_budget=budget)
+            _ = list(g.predicate_objects(EX.s0))
+            _ = list(g.subject_objects(EX.p0))
+            _ = list(g.predicate_objects(EX.s1))
+            self.assertFalse(g.already_resolved((EX.s0, None, None)))
+            self.assertEqual((1, NPROPS - 1), (g.total_evictions, g.total_evicted_triples))
+            queries = g.total_queries
+            self.assertEqual(set(self.source.subject_objects(EX.p0)), set(g.subject_objects(EX.p0)))
+            self.assertEqual(queries, g.total_queries)
+
+    def test_no_budget(self):
+        """ Without a budget nothing is evicted """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            for i in range(NSUBJECTS):
+                _ = list(g.predicate_objects(EX[f"s{i}"]))
+            self.assertEqual((NSUBJECTS * NPROPS, 0), (len(g), g.total_evictions))
+            self.assertIsNone(g.memory_budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, QueryMetrics, QueryCache
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class MetricsTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(5):
+            for j in range(10):
+                g.add((EX[f"s{i}"], EX[f"p{j}"], Literal(i * j)))
+        return g
+
+    def test_metrics(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            for streaming in (False, True):
+                g = SlurpyGraph(ep.url)
+                g.streaming_results = streaming
+                exported = []
+                g.metrics.add_listener(exported.append)
+
+                _ = list(g.predicate_objects(EX.s0))
+                _ = list(g.objects(EX.s0, EX.p1))
+                _ = list(g.objects(EX.s1, EX.p1))
+                g.prefetch([(EX.s2, None, None), (EX.s3, None, None)])
+
+                self.assertEqual(3, len(exported))
+                m: QueryMetrics = exported[0]
+                self.assertEqual(('s??', 10, False), (m.shape, m.rows, m.cached))
+                self.assertIn('<http://example.org/s0> ?p ?o', m.query)
+                self.assertGreater(m.bytes_received, 100)
+                self.assertTrue(all(m.timings[phase] >= 0 for phase in ('network', 'decode', 'map', 'add')))
+                self.assertGreater(m.timings['network'], 0)
+                self.assertEqual('sp?', exported[1].shape)
+                self.assertEqual(('values:s??', 20), (exported[2].shape, exported[2].rows))
+
+                summary = g.metrics.summary()
+                json.dumps(summary)
+                self.assertEqual((3, 1, 3, 31), (summary['calls'], summary['resolved_calls'], summary['queries'],
+                                                 summary['rows']))
+                self.assertAlmostEqual(1 / 3, g.metrics.hit_ratio)
+                self.assertEqual(3, summary['phases']['network']['count'])
+                self.assertEqual(3, sum(summary['phases']['total']['buckets'].values()))
+                self.assertEqual(exported, list(g.metrics.records))
+
+    def test_cached_metrics(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            cache = QueryCache()
+            for _ in range(2):
+                g = SlurpyGraph(ep.url, query_cache=cache)
+                _ = list(g.predicate_objects(EX.s0))
+            self.assertTrue(g.metrics.records[-1].cached)
+            self.assertEqual(0, g.metrics.records[-1].bytes_received)
+
+
+if __name__ == '__main__':
+    unittest.main()
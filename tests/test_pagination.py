@@ -0,0 +1,59 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class PaginationTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph(n: int) -> Graph:
+        g = Graph()
+        for i in range(n):
+            g.add((EX.s, EX[f"p{i}"], Literal(i)))
+        return g
+
+    def test_paging(self):
+        with LocalSPARQLEndpoint(self.source_graph(25)) as ep:
+            g = SlurpyGraph(ep.url)
+            g.page_size = 10
+            self.assertEqual(25, len(list(g.predicate_objects(EX.s))))
+            self.assertEqual((3, 25), (g.total_queries, g.total_triples))
+            self.assertTrue(ep.queries[-1].endswith('ORDER BY ?p ?o LIMIT 10 OFFSET 20'))
+            self.assertTrue(g.already_resolved((EX.s, None, None)))
+
+            # An exact multiple needs one (empty) page to find the end.  Fully bound patterns aren't paged
+            g = SlurpyGraph(ep.url)
+            g.page_size = 5
+            _ = list(g.predicate_objects(EX.s))
+            self.assertEqual(6, g.total_queries)
+            _ = (EX.t, EX.p1, Literal(1)) in g
+            self.assertEqual(7, g.total_queries)
+            self.assertFalse(ep.queries[-1].endswith('OFFSET 0'))
+
+    def test_progressive(self):
+        with LocalSPARQLEndpoint(self.source_graph(25)) as ep:
+            for workers in (1, 2):
+                g = SlurpyGraph(ep.url, max_workers=workers)
+                g.page_size = 10
+                g.progressive_paging = True
+                triples = g.triples((EX.s, None, None))
+                first = next(triples)
+                self.assertEqual(EX.s, first[0])
+                self.assertLessEqual(g.total_queries, 2)
+                self.assertFalse(g.already_resolved((EX.s, None, None)))
+                rest = list(triples)
+                self.assertEqual(25, len({first, *rest}))
+                self.assertEqual(24, len(rest))
+                self.assertTrue(g.already_resolved((EX.s, None, None)))
+                self.assertEqual(3, g.total_queries)
+                self.assertEqual(25, len(list(g.triples((EX.s, None, None)))))
+                self.assertEqual(3, g.total_queries)
+                g.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
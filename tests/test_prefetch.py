@@ -0,0 +1,55 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, TM_NS
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class PrefetchTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(10):
+            g.add((EX[f"s{i}"], EX.p1, Literal(i)))
+            g.add((EX[f"s{i}"], EX.p2, EX[f"o{i % 3}"]))
+        return g
+
+    def test_prefetch(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            subjects = [EX[f"s{i}"] for i in range(10)]
+            g.prefetch([(s, None, None) for s in subjects], chunk_size=4)
+            self.assertEqual(3, g.total_queries)
+            self.assertEqual(20, len(g))
+            for s in subjects:
+                self.assertEqual(2, len(list(g.predicate_objects(s))))
+            self.assertEqual(3, len(ep.queries))
+
+            # Mixed shapes are grouped, duplicates and resolved patterns skipped
+            g.prefetch([(None, EX.p2, EX.o0), (None, EX.p2, EX.o1), (None, EX.p2, EX.o1), (None, None, EX.o2),
+                        (EX.s1, EX.p1, None)])
+            self.assertEqual(5, g.total_queries)
+            self.assertEqual({EX.s0, EX.s3, EX.s6, EX.s9}, set(g.subjects(EX.p2, EX.o0)))
+            self.assertEqual(5, g.total_queries)
+
+    def test_prefetch_literals(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.prefetch([(None, EX.p1, Literal(i)) for i in range(3)])
+            self.assertEqual(1, g.total_queries)
+            self.assertEqual({EX.s0, EX.s1, EX.s2}, {s for i in range(3) for s in g.subjects(EX.p1, Literal(i))})
+            self.assertEqual(1, g.total_queries)
+
+    def test_graphdb_values_query(self):
+        g = GraphDBSlurpyGraph("http://example.org/sparql")
+        query = g.gen_values_query([(TM_NS['17'], None, None), (TM_NS['42'], None, None)], '', '')
+        self.assertIn('VALUES (?sid) {(17) (42)}', query)
+        self.assertIn('?s <http://www.ontotext.com/owlim/entity#id> ?sid', query)
+        self.assertNotEqual(g._values_key((TM_NS['17'], None, None)), g._values_key((EX.s1, None, None)))
+
+
+if __name__ == '__main__':
+    unittest.main()
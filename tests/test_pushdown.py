@@ -0,0 +1,180 @@
+import unittest
+
+from rdflib import Graph, ConjunctiveGraph, Namespace, Literal, BNode
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, TM_NS
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+NPEOPLE = 20
+
+JOIN = """SELECT ?name ?friend WHERE {
+    ?s ex:knows ?f .
+    ?f ex:name ?friend .
+    ?s ex:name ?name .
+}"""
+
+
+class PushdownTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(NPEOPLE):
+            g.add((EX[f"person{i}"], EX.name, Literal(f"Person {i}")))
+            g.add((EX[f"person{i}"], EX.knows, EX[f"person{(i + 1) % NPEOPLE}"]))
+            if i % 2:
+                g.add((EX[f"person{i}"], EX.age, Literal(i)))
+        return g
+
+    @staticmethod
+    def rows(result) -> set:
+        return {tuple(row) for row in result}
+
+    def expected(self, query: str) -> set:
+        return self.rows(self.source_graph().query(query, initNs={'ex': EX}))
+
+    def test_bgp(self):
+        """ A join is one query rather than one per triple pattern per solution """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.bind('ex', EX)
+            self.assertEqual(self.expected(JOIN), self.rows(g.query(JOIN)))
+            triple_at_a_time = len(ep.queries)
+            self.assertGreater(triple_at_a_time, NPEOPLE)
+
+            g = SlurpyGraph(ep.url)
+            g.bind('ex', EX)
+            g.pushdown = True
+            self.assertEqual(self.expected(JOIN), self.rows(g.query(JOIN)))
+            self.assertEqual(triple_at_a_time + 1, len(ep.queries))
+            self.assertTrue(ep.queries[-1].startswith('SELECT DISTINCT'))
+            self.assertEqual(['bgp'], [m.shape for m in g.metrics.records])
+            self.assertEqual(NPEOPLE, g.metrics.records[0].rows)
+            # Nothing was cached
+            self.assertEqual(0, len(g))
+
+    def test_optional_and_filter(self):
+        """ Everything that isn't a BGP is still evaluated by rdflib """
+        query = """SELECT ?s ?age WHERE {
+            ?s ex:name ?name .
+            OPTIONAL { ?s ex:age ?age }
+            FILTER (?name != "Person 3")
+        }"""
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.pushdown = True
+            self.assertEqual(self.expected(query), self.rows(g.query(query, initNs={'ex': EX})))
+
+    def test_fallback(self):
+        """ Property paths are resolved a triple at a time, as are BGPs whose patterns are already cached """
+        query = "SELECT ?f WHERE { ex:person0 ex:knows+ ?f }"
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.pushdown = True
+            self.assertEqual(self.expected(query), self.rows(g.query(query, initNs={'ex': EX})))
+            self.assertTrue(all(not q.startswith('SELECT DISTINCT') for q in ep.queries))
+
+            list(g.predicate_objects(EX.person1))
+            nqueries = len(ep.queries)
+            query = "SELECT ?n ?f WHERE { ex:person1 ex:name ?n ; ex:knows ?f }"
+            self.assertEqual(self.expected(query), self.rows(g.query(query, initNs={'ex': EX})))
+            self.assertEqual(nqueries, len(ep.queries))
+
+    def test_cache(self):
+        """ With pushdown_cache, the triples that matched are kept """
+        query = "SELECT ?f WHERE { ex:person0 ex:knows ?f . ?f ex:name ?n }"
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.pushdown = True
+            g.pushdown_cache = True
+            self.assertEqual({(EX.person1, )}, self.rows(g.query(query, initNs={'ex': EX})))
+            g.sparql_locked = True
+            self.assertEqual({(EX.person0, EX.knows, EX.person1), (EX.person1, EX.name, Literal("Person 1"))},
+                             set(g))
+
+    def test_fully_bound(self):
+        query = "ASK { ex:person0 ex:knows ex:person1 . ex:person1 ex:knows ex:person2 }"
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.pushdown = True
+            self.assertTrue(g.query(query, initNs={'ex': EX}).askAnswer)
+            self.assertFalse(g.query(query.replace('person2', 'person3'), initNs={'ex': EX}).askAnswer)
+            self.assertEqual(2, len(ep.queries))
+            self.assertTrue(ep.queries[0].startswith('ASK'))
+
+    def test_graph_name(self):
+        src = ConjunctiveGraph()
+        src.get_context(EX.g1).add((EX.s, EX.p, EX.o1))
+        src.get_context(EX.g1).add((EX.o1, EX.p, EX.x))
+        src.get_context(EX.g2).add((EX.s, EX.p, EX.o2))
+        src.get_context(EX.g2).add((EX.o2, EX.p, EX.y))
+        query = "SELECT ?x WHERE { ex:s ex:p ?o . ?o ex:p ?x }"
+        with LocalSPARQLEndpoint(src) as ep:
+            g = SlurpyGraph(ep.url)
+            g.pushdown = True
+            g.graph_name = EX.g1.n3()
+            self.assertEqual({(EX.x, )}, self.rows(g.query(query, initNs={'ex': EX})))
+            self.assertIn(f"graph {EX.g1.n3()}", ep.queries[-1])
+            g.graph_name = ''
+            self.assertEqual({(EX.x, ), (EX.y, )}, self.rows(g.query(query, initNs={'ex': EX})))
+
+        # With no graph name, the patterns of a BGP can match in different graphs
+        src = ConjunctiveGraph()
+        src.get_context(EX.g1).add((EX.s, EX.p, EX.o1))
+        src.get_context(EX.g2).add((EX.o1, EX.p, EX.x))
+        with LocalSPARQLEndpoint(src) as ep:
+            g = SlurpyGraph(ep.url)
+            g.graph_name = ''
+            self.assertEqual({(EX.x, )}, self.rows(g.query(query, initNs={'ex': EX})))
+            g = SlurpyGraph(ep.url)
+            g.graph_name = ''
+            g.pushdown = True
+            self.assertEqual({(EX.x, )}, self.rows(g.query(query, initNs={'ex': EX})))
+            self.assertIn("graph ?g1 {", ep.queries[-1])
+
+    def test_graphdb(self):
+        """ Blank nodes come back as GraphDB identifiers and identifiers are translated on the way out """
+        src = Graph()
+        node = BNode()
+        src.add((EX.s, EX.p, node))
+        src.add((node, EX.value, Literal("x")))
+        with LocalSPARQLEndpoint(src, graphdb=True) as ep:
+            g = GraphDBSlurpyGraph(ep.url)
+            g.pushdown = True
+            g.pushdown_queries = True
+            bnode_id = TM_NS[str(ep.ids[node])]
+            self.assertEqual({(bnode_id, Literal("x"))},
+                             self.rows(g.query("SELECT ?b ?v WHERE { ex:s ex:p ?b . ?b ex:value ?v }",
+                                               initNs={'ex': EX})))
+            self.assertEqual(1, len(ep.queries))
+            self.assertEqual({(Literal("x"), )},
+                             self.rows(g.query(f"SELECT ?v WHERE {{ {bnode_id.n3()} ex:value ?v }}",
+                                               initNs={'ex': EX})))
+            self.assertIn(f"{ep.ids[node]} .", ep.queries[-1])
+
+    def test_whole_query(self):
+        """ SELECT and ASK queries go to the endpoint as they are """
+        query = "SELECT (COUNT(*) AS ?n) WHERE { ?s ex:knows ?f . ?f ex:age ?age FILTER (?age > 10) }"
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.bind('ex', EX)
+            g.pushdown_queries = True
+            result = g.query(query)
+            self.assertEqual(self.expected(query), self.rows(result))
+            self.assertEqual(['n'], [str(v) for v in result.vars])
+            self.assertEqual(1, len(ep.queries))
+            self.assertTrue(ep.queries[0].endswith(query))
+            self.assertTrue(g.query("ASK { ex:person0 ex:knows ex:person1 }").askAnswer)
+            self.assertEqual(['query', 'query'], [m.shape for m in g.metrics.records])
+
+            # Anything else is evaluated locally
+            constructed = g.query("CONSTRUCT { ?s ex:knows ?f } WHERE { ?s ex:knows ?f }")
+            self.assertEqual(NPEOPLE, len(constructed.graph))
+            g.graph_name = ''
+            self.assertEqual(self.expected(query), self.rows(g.query(query)))
+            self.assertFalse(ep.queries[-1].endswith(query))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, QueryCache
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class QueryCacheTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(5):
+            g.add((EX.s1, EX[f"p{i}"], Literal(i)))
+        g.add((EX.s2, EX.p0, EX.s1))
+        return g
+
+    def test_persistent_cache(self):
+        """ A second graph (or process) reuses the responses of the first """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, 'cache.db')
+            with LocalSPARQLEndpoint(self.source_graph()) as ep:
+                g = SlurpyGraph(ep.url, query_cache=QueryCache(cache_file))
+                self.assertEqual(5, len(list(g.predicate_objects(EX.s1))))
+                self.assertEqual((0, 1, 1), (g.cache_hits, g.cache_misses, g.total_queries))
+
+                g2 = SlurpyGraph(ep.url, query_cache=QueryCache(cache_file))
+                self.assertEqual(set(g.predicate_objects(EX.s1)), set(g2.predicate_objects(EX.s1)))
+                self.assertEqual((1, 0, 0), (g2.cache_hits, g2.cache_misses, g2.total_queries))
+                self.assertEqual(1, len(ep.queries))
+
+                # Different parameters or graph names are different entries
+                g3 = SlurpyGraph(ep.url + '?infer=false', query_cache=QueryCache(cache_file))
+                _ = list(g3.predicate_objects(EX.s1))
+                g4 = SlurpyGraph(ep.url, query_cache=QueryCache(cache_file))
+                g4.graph_name = ''
+                _ = list(g4.predicate_objects(EX.s1))
+                self.assertEqual((0, 0), (g3.cache_hits, g4.cache_hits))
+                self.assertEqual(3, len(ep.queries))
+
+    def test_ttl(self):
+        cache = QueryCache(ttl=0.1)
+        cache.put('k', [{'s': {'type': 'uri', 'value': str(EX.s1)}}])
+        self.assertIsNotNone(cache.get('k'))
+        time.sleep(0.2)
+        self.assertIsNone(cache.get('k'))
+        self.assertEqual(0, len(cache))
+
+    def test_lru_eviction(self):
+        binding = [{'o': {'type': 'literal', 'value': 'x' * 100}}]
+        cache = QueryCache(max_bytes=450)
+        cache.put('a', binding)
+        cache.put('b', binding)
+        cache.put('c', binding)
+        self.assertEqual(3, len(cache))
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.get('a'))            # 'b' is now the least recently used
+        cache.put('d', binding)
+        self.assertEqual(3, len(cache))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
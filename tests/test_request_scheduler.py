@@ -0,0 +1,98 @@
+import time
+import unittest
+import urllib.error
+
+from SPARQLWrapper.SPARQLExceptions import QueryBadFormed
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, RequestScheduler, PooledHTTPTransport
+from sparqlslurper._scheduler import retry_after
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class RequestSchedulerTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(8):
+            g.add((EX[f"s{i}"], EX.p, Literal(i)))
+        return g
+
+    def test_retry_after(self):
+        """ A 429 with Retry-After is waited out and retried, whichever transport is used """
+        for transport in (None, PooledHTTPTransport()):
+            with LocalSPARQLEndpoint(self.source_graph()) as ep:
+                scheduler = RequestScheduler()
+                g = SlurpyGraph(ep.url, scheduler=scheduler, transport=transport)
+                ep.failures.append((429, {'Retry-After': '1'}))
+                start = time.time()
+                self.assertEqual(Literal(1), g.value(EX.s1, EX.p))
+                self.assertGreater(time.time() - start, 0.9)
+                self.assertEqual((2, 1, 1), (scheduler.requests, scheduler.retries, scheduler.throttled))
+                self.assertGreater(g.metrics.records[0].timings['schedule'], 0.9)
+                self.assertLess(g.metrics.records[0].timings['network'], 0.9)
+                self.assertGreater(g.metrics.summary()['phases']['schedule']['total'], 0.9)
+
+    def test_no_scheduler(self):
+        """ Without a scheduler the error gets through, as before """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            ep.failures.append((429, {'Retry-After': '1'}))
+            with self.assertRaises(urllib.error.HTTPError):
+                g.value(EX.s1, EX.p)
+
+    def test_backoff(self):
+        """ Transient errors without Retry-After back off and retry, up to max_retries """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            scheduler = RequestScheduler(max_retries=2, backoff=0.01)
+            g = SlurpyGraph(ep.url, scheduler=scheduler)
+            ep.failures += [(503, {}), (502, {})]
+            self.assertEqual(Literal(2), g.value(EX.s2, EX.p))
+            self.assertEqual(2, scheduler.retries)
+
+            ep.failures += [(503, {})] * 3
+            with self.assertRaises(urllib.error.HTTPError):
+                g.value(EX.s3, EX.p)
+            self.assertEqual(4, scheduler.retries)
+
+    def test_permanent_errors(self):
+        """ Errors that retrying won't fix aren't retried """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            scheduler = RequestScheduler(backoff=0.01)
+            g = SlurpyGraph(ep.url, scheduler=scheduler)
+            ep.failures.append((400, {}))
+            with self.assertRaises(QueryBadFormed):
+                g.value(EX.s1, EX.p)
+            self.assertEqual((1, 0), (scheduler.requests, scheduler.retries))
+
+    def test_rate_limit(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            scheduler = RequestScheduler(rate=20)
+            g = SlurpyGraph(ep.url, scheduler=scheduler)
+            start = time.time()
+            for i in range(8):
+                _ = g.value(EX[f"s{i}"], EX.p)
+            self.assertGreater(time.time() - start, 7 / 20 - 0.05)
+            self.assertGreater(scheduler.wait_time, 0.2)
+
+    def test_concurrency_cap(self):
+        with LocalSPARQLEndpoint(self.source_graph(), latency=0.2) as ep:
+            g = SlurpyGraph(ep.url, max_workers=8, scheduler=RequestScheduler(max_concurrent=2))
+            start = time.time()
+            g.resolve([(EX[f"s{i}"], None, None) for i in range(8)])
+            self.assertGreater(time.time() - start, 4 * 0.2 - 0.05)
+            g.close()
+
+    def test_retry_after_header(self):
+        class Error:
+            def __init__(self, value):
+                self.headers = {'Retry-After': value}
+        self.assertEqual(5.0, retry_after(Error("5")))
+        self.assertIsNone(retry_after(Error("soon")))
+        self.assertEqual(0.0, retry_after(Error("Wed, 21 Oct 2015 07:28:00 GMT")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import time
+import unittest
+
+from rdflib import Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, ResolvedPatterns
+
+EX = Namespace("http://example.org/")
+
+
+class ResolvedPatternsTestCase(unittest.TestCase):
+    def test_list_behavior(self):
+        """ The index has to follow every way that the resolved_nodes list can be changed """
+        g = SlurpyGraph("endpoint")
+        self.assertIsInstance(g.resolved_nodes, ResolvedPatterns)
+        self.assertEqual([(None, None, None)], g.resolved_nodes)
+        self.assertFalse(g.already_resolved((EX.s1, EX.p1, None)))
+
+        g.resolved_nodes.append((EX.s1, None, None))
+        self.assertTrue(g.already_resolved((EX.s1, EX.p1, None)))
+        g.resolved_nodes.remove((EX.s1, None, None))
+        self.assertFalse(g.already_resolved((EX.s1, EX.p1, None)))
+
+        g.resolved_nodes += [(None, EX.p2, None), (None, EX.p2, None)]
+        self.assertTrue(g.already_resolved((EX.s1, EX.p2, Literal(1))))
+        g.resolved_nodes.pop()
+        self.assertTrue(g.already_resolved((EX.s1, EX.p2, Literal(1))))
+        del g.resolved_nodes[-1]
+        self.assertFalse(g.already_resolved((EX.s1, EX.p2, Literal(1))))
+
+        g.resolved_nodes[0] = (None, None, EX.o3)
+        self.assertTrue(g.already_resolved((EX.s3, EX.p3, EX.o3)))
+        g.resolved_nodes.clear()
+        self.assertFalse(g.already_resolved((EX.s3, EX.p3, EX.o3)))
+
+        # Assigning a plain list still works
+        g.resolved_nodes = [(EX.s4, EX.p4, None)]
+        self.assertIsInstance(g.resolved_nodes, ResolvedPatterns)
+        self.assertTrue(g.already_resolved((EX.s4, EX.p4, Literal("x"))))
+        self.assertEqual((EX.s4, EX.p4, None), g.resolved_nodes.covering((EX.s4, EX.p4, Literal("x"))))
+
+    def test_flat_lookup_cost(self):
+        """ Lookup cost should not grow with the number of resolved patterns """
+        def lookup_time(n: int) -> float:
+            rp = ResolvedPatterns((EX[f"s{i}"], EX[f"p{i % 10}"], None) for i in range(n))
+            probes = [(EX[f"s{i}"], EX[f"p{i % 10}"], Literal(i)) for i in range(0, n, max(1, n // 1000))]
+            probes += [(EX[f"x{i}"], EX.p1, None) for i in range(len(probes))]
+            start = time.perf_counter()
+            for _ in range(5):
+                for probe in probes:
+                    rp.covers(probe)
+            return (time.perf_counter() - start) / (5 * len(probes))
+
+        small = lookup_time(100)
+        large = lookup_time(100000)
+        # A linear scan would be ~1000 times slower -- allow plenty of room for timer noise
+        self.assertLess(large, small * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
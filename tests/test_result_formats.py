@@ -0,0 +1,116 @@
+import io
+import json
+import unittest
+
+from rdflib import Graph, Namespace, Literal, BNode, XSD
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, TSVResultDecoder, BinaryResultDecoder, \
+    JSONResultDecoder, QueryCache, TM_NS
+from sparqlslurper._result_formats import tsv_term
+from tests.local_endpoint import LocalSPARQLEndpoint, encode_tsv, encode_binary, TSV_RESULTS, BINARY_RESULTS, \
+    JSON_RESULTS
+
+EX = Namespace("http://example.org/")
+
+
+class ResultFormatsTestCase(unittest.TestCase):
+    results = {'head': {'vars': ['s', 'p', 'o']},
+               'results': {'bindings': [
+                   {'s': {'type': 'uri', 'value': str(EX.s1)}, 'p': {'type': 'uri', 'value': str(EX.p)},
+                    'o': {'type': 'literal', 'value': 'tab\there, "quoted"\nnew line \\ é中'}},
+                   {'s': {'type': 'uri', 'value': str(EX.s1)}, 'p': {'type': 'uri', 'value': str(EX.p)},
+                    'o': {'type': 'literal', 'value': 'chat', 'xml:lang': 'fr'}},
+                   {'s': {'type': 'uri', 'value': str(EX.s2)}, 'p': {'type': 'uri', 'value': str(EX.q)},
+                    'o': {'type': 'literal', 'value': '42', 'datatype': str(XSD.integer)}},
+                   {'s': {'type': 'bnode', 'value': 'b0'}, 'p': {'type': 'uri', 'value': 'urn:noslash'}},
+                   {}]}}
+
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(20):
+            g.add((EX.s, EX[f"p{i}"], Literal(i)))
+            g.add((EX.s, EX[f"p{i}"], Literal(f"text {i}\twith\ttabs")))
+        return g
+
+    def test_decoders(self):
+        """ Every format decodes to the same bindings, at any chunk size """
+        expected = self.results['results']['bindings']
+        for decoder_type, encode in ((TSVResultDecoder, encode_tsv), (BinaryResultDecoder, encode_binary),
+                                     (JSONResultDecoder, lambda r: json.dumps(r).encode())):
+            for chunk_size in (1, 5, 100000):
+                decoder = decoder_type(chunk_size)
+                self.assertEqual(expected, list(decoder.decode(io.BytesIO(encode(self.results)))), decoder_type)
+
+    def test_tsv_terms(self):
+        """ Turtle shorthand for numbers and booleans """
+        self.assertEqual({'type': 'literal', 'value': '17', 'datatype': str(XSD.integer)}, tsv_term('17'))
+        self.assertEqual(str(XSD.decimal), tsv_term('1.5')['datatype'])
+        self.assertEqual(str(XSD.double), tsv_term('1.5E3')['datatype'])
+        self.assertEqual(str(XSD.boolean), tsv_term('true')['datatype'])
+        self.assertEqual('Aé', tsv_term('"A\\u00E9"')['value'])
+        self.assertIsNone(tsv_term(''))
+
+    def test_binary_errors(self):
+        with self.assertRaises(ValueError):
+            list(BinaryResultDecoder().decode(io.BytesIO(b'{"head": {}}')))
+        with self.assertRaises(ValueError):
+            list(BinaryResultDecoder().decode(io.BytesIO(encode_binary(self.results)[:-10])))
+        error = b'BRTR\x00\x00\x00\x04\x00\x00\x00\x00\x7e\x02\x00\x00\x00\x04oops'
+        with self.assertRaisesRegex(ValueError, 'oops'):
+            list(BinaryResultDecoder().decode(io.BytesIO(error)))
+
+    def test_negotiation(self):
+        """ The preferred format that the endpoint offers is used, and the graph is the same whatever the format """
+        expected = set(self.source_graph())
+        for offered, asked, used in (((TSV_RESULTS, BINARY_RESULTS), [BinaryResultDecoder(), TSVResultDecoder()],
+                                      BINARY_RESULTS),
+                                     ((TSV_RESULTS, ), [BinaryResultDecoder(), TSVResultDecoder()], TSV_RESULTS),
+                                     ((), [BinaryResultDecoder(), TSVResultDecoder()], JSON_RESULTS),
+                                     ((TSV_RESULTS, BINARY_RESULTS), [], JSON_RESULTS)):
+            for streaming in (False, True):
+                with LocalSPARQLEndpoint(self.source_graph(), result_formats=offered) as ep:
+                    g = SlurpyGraph(ep.url)
+                    g.result_formats = asked
+                    g.streaming_results = streaming
+                    self.assertEqual(expected, set(g.triples((EX.s, None, None))))
+                    self.assertEqual([used], ep.content_types)
+
+    def test_ask_and_count(self):
+        """ ASK stays in JSON, COUNT goes through the negotiated format """
+        with LocalSPARQLEndpoint(self.source_graph(), result_formats=(TSV_RESULTS, )) as ep:
+            g = SlurpyGraph(ep.url)
+            g.result_formats = [TSVResultDecoder()]
+            g.ask_bound_patterns = True
+            self.assertIn((EX.s, EX.p1, Literal(1)), g)
+            self.assertEqual(40, g.count((EX.s, None, None)))
+            self.assertEqual([JSON_RESULTS, TSV_RESULTS], ep.content_types)
+
+    def test_query_cache(self):
+        """ Cached results are format independent """
+        cache = QueryCache()
+        with LocalSPARQLEndpoint(self.source_graph(), result_formats=(BINARY_RESULTS, )) as ep:
+            g = SlurpyGraph(ep.url, query_cache=cache)
+            g.result_formats = [BinaryResultDecoder()]
+            list(g.triples((EX.s, None, None)))
+            g2 = SlurpyGraph(ep.url, query_cache=cache)
+            self.assertEqual(set(g), set(g2.triples((EX.s, None, None))))
+            self.assertEqual(1, len(ep.queries))
+
+    def test_graphdb(self):
+        """ GraphDB identifiers come through the binary format """
+        src = Graph()
+        node = BNode()
+        src.add((EX.s, EX.p, node))
+        src.add((node, EX.value, Literal("x")))
+        with LocalSPARQLEndpoint(src, graphdb=True, result_formats=(BINARY_RESULTS, )) as ep:
+            g = GraphDBSlurpyGraph(ep.url)
+            g.result_formats = [BinaryResultDecoder()]
+            bnode = g.value(EX.s, EX.p)
+            self.assertEqual(TM_NS[str(ep.ids[node])], bnode)
+            self.assertEqual(Literal("x"), g.value(bnode, EX.value))
+            self.assertEqual({BINARY_RESULTS}, set(ep.content_types))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import io
+import time
+import unittest
+from typing import List
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, ResultPipeline, ResultSink, StreamingTriplePrinter, QueryResultHook, RDFTriple
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class CollectingSink(ResultSink):
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.triples = []
+        self.queries = []
+        self.closed = False
+
+    def write(self, triples) -> None:
+        time.sleep(self.delay)
+        self.triples += triples
+
+    def done(self, query: str) -> None:
+        self.queries.append(query)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FailingSink(ResultSink):
+    def write(self, triples) -> None:
+        raise ValueError("sink failure")
+
+
+class ResultPipelineTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(5):
+            for j in range(3):
+                g.add((EX[f"s{i}"], EX[f"p{j}"], Literal(f"value {i}.{j}")))
+        return g
+
+    def test_streaming_printer(self):
+        """ The printer writes N-Triples (or Turtle with prefixes) as the results arrive """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.bind('ex', EX)
+            nt, ttl = io.StringIO(), io.StringIO()
+            g.result_pipeline = ResultPipeline(StreamingTriplePrinter(nt),
+                                               StreamingTriplePrinter(ttl, g.namespace_manager))
+            _ = list(g.predicate_objects(EX.s1))
+            _ = list(g.predicate_objects(EX.s2))
+            g.result_pipeline.flush()
+
+            expected = set(g.triples((None, None, None)))
+            self.assertEqual(expected, set(Graph().parse(data=nt.getvalue(), format='nt')))
+            self.assertTrue(ttl.getvalue().startswith('ex:s1 ex:p'))
+            self.assertEqual(expected, set(Graph().parse(data=f"@prefix ex: <{EX}> .\n" + ttl.getvalue(),
+                                                         format='turtle')))
+            g.close()
+
+    def test_background_sinks(self):
+        """ A slow sink doesn't hold up the slurp """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            sink = CollectingSink(delay=0.5)
+            g.result_pipeline = pipeline = ResultPipeline(sink, FailingSink())
+            start = time.time()
+            for i in range(3):
+                _ = list(g.predicate_objects(EX[f"s{i}"]))
+            self.assertLess(time.time() - start, 0.5)
+            g.close()
+            self.assertTrue(sink.closed)
+            self.assertEqual(9, len(sink.triples))
+            self.assertEqual(3, len(sink.queries))
+            self.assertEqual(3, len(pipeline.errors))
+            self.assertIsNone(g.result_pipeline)
+
+    def test_dropping(self):
+        """ A non-blocking pipeline drops batches rather than wait for a full queue """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            sink = CollectingSink(delay=0.2)
+            g.result_pipeline = pipeline = ResultPipeline(sink, max_batches=1, block=False)
+            for i in range(5):
+                _ = list(g.predicate_objects(EX[f"s{i}"]))
+            pipeline.close()
+            self.assertGreater(pipeline.dropped, 0)
+            self.assertLess(len(sink.triples), 15)
+
+    def test_hook_batches(self):
+        """ Query result hooks can take the triples a batch at a time """
+        batches: List[List[RDFTriple]] = []
+
+        class BatchHook(QueryResultHook):
+            def add_batch(self, triples: List[RDFTriple]) -> None:
+                batches.append(triples)
+
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.add_result_hook(BatchHook)
+            _ = list(g.predicate_objects(EX.s1))
+            self.assertEqual(1, len(batches))
+            self.assertEqual(3, len(batches[0]))
+
+    def test_chained_hook_batches(self):
+        """ A batch hook further down the chain gets the whole batch, and a triple at a time hook gets every triple """
+        batches: List[List[RDFTriple]] = []
+        added: List[RDFTriple] = []
+
+        class BatchHook(QueryResultHook):
+            def add_batch(self, triples: List[RDFTriple]) -> None:
+                batches.append(triples)
+                super().add_batch(triples)
+
+        class TripleHook(QueryResultHook):
+            def add(self, t: RDFTriple) -> None:
+                added.append(t)
+                super().add(t)
+
+        class FirstHook(TripleHook):
+            pass
+
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            g = SlurpyGraph(ep.url)
+            g.add_result_hook(TripleHook)
+            g.add_result_hook(BatchHook)
+            g.add_result_hook(FirstHook)
+            _ = list(g.predicate_objects(EX.s1))
+            self.assertEqual(1, len(batches))
+            self.assertEqual(3, len(batches[0]))
+            self.assertEqual(6, len(added))
+            self.assertEqual(set(batches[0]), set(added))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph, Transport
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+NCALLERS = 8
+LATENCY = 0.3
+
+
+class FailingTransport(Transport):
+    """ A slow transport that always fails """
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def query(self, sparql):
+        self.calls += 1
+        time.sleep(LATENCY)
+        raise ConnectionError("endpoint is down")
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(3):
+            for j in range(3):
+                g.add((EX[f"s{i}"], EX[f"p{j}"], Literal(i * j)))
+        return g
+
+    @staticmethod
+    def run_callers(fn, n: int = NCALLERS) -> list:
+        """ Run fn(i) on n threads that all start at once, returning the results (or exceptions) """
+        barrier = threading.Barrier(n)
+        results = [None] * n
+
+        def caller(i: int) -> None:
+            barrier.wait()
+            try:
+                results[i] = fn(i)
+            except Exception as e:
+                results[i] = e
+        threads = [threading.Thread(target=caller, args=(i, )) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_identical_patterns(self):
+        """ Concurrent requests for the same pattern share a single query """
+        with LocalSPARQLEndpoint(self.source_graph(), latency=LATENCY) as ep:
+            g = SlurpyGraph(ep.url, max_workers=4)
+            results = self.run_callers(lambda _: set(g.predicate_objects(EX.s1)))
+            self.assertEqual([set(self.source_graph().predicate_objects(EX.s1))] * NCALLERS, results)
+            self.assertEqual(1, len(ep.queries))
+            self.assertEqual(NCALLERS - 1, g.total_coalesced)
+
+    def test_covered_patterns(self):
+        """ Requests covered by a query that is already in flight wait for it """
+        with LocalSPARQLEndpoint(self.source_graph(), latency=LATENCY) as ep:
+            g = SlurpyGraph(ep.url, max_workers=4)
+
+            def caller(i: int):
+                if i:
+                    # Give the wide query time to get going
+                    time.sleep(LATENCY / 3)
+                    return g.value(EX.s2, EX[f"p{i % 3}"])
+                return set(g.predicate_objects(EX.s2))
+            results = self.run_callers(caller)
+            self.assertEqual([Literal(2 * (i % 3)) for i in range(1, NCALLERS)], results[1:])
+            self.assertEqual(1, len(ep.queries))
+
+    def test_shared_failure(self):
+        """ When the in-flight query fails, everybody waiting on it gets the error """
+        transport = FailingTransport()
+        g = SlurpyGraph("http://example.org/sparql", max_workers=4, transport=transport)
+        results = self.run_callers(lambda _: list(g.predicate_objects(EX.s1)))
+        self.assertTrue(all(isinstance(r, ConnectionError) for r in results))
+        self.assertEqual(1, transport.calls)
+        self.assertFalse(g.already_resolved((EX.s1, None, None)))
+
+        # Nothing is left in flight, so the next request tries again
+        with self.assertRaises(ConnectionError):
+            g.value(EX.s1, EX.p1)
+        self.assertEqual(2, transport.calls)
+
+    def test_asyncio(self):
+        """ asyncio callers are coalesced too """
+        with LocalSPARQLEndpoint(self.source_graph(), latency=LATENCY) as ep:
+            g = SlurpyGraph(ep.url, max_workers=4)
+
+            async def main():
+                return await asyncio.gather(*[g.atriples((EX.s0, None, None)) for _ in range(NCALLERS)],
+                                            g.atriples((EX.s1, EX.p1, None)))
+            results = asyncio.run(main())
+            self.assertEqual([set(self.source_graph().triples((EX.s0, None, None)))] * NCALLERS,
+                             [set(r) for r in results[:-1]])
+            self.assertEqual([(EX.s1, EX.p1, Literal(1))], results[-1])
+            self.assertEqual(2, len(ep.queries))
+
+
+if __name__ == '__main__':
+    unittest.main()
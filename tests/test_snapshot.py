@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+
+from rdflib import Graph, Namespace, Literal, BNode, XSD
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, CompactStore, SnapshotReader
+from sparqlslurper._memory_budget import triple_size
+from sparqlslurper._snapshot import write_snapshot
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+NSUBJECTS = 10
+NPROPS = 5
+
+
+class SnapshotTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.source = Graph()
+        for i in range(NSUBJECTS):
+            for j in range(NPROPS):
+                cls.source.add((EX[f"s{i}"], EX[f"p{j}"], Literal(f"value {i}.{j}")))
+        cls.source.add((EX.s0, EX.label, Literal("chat", lang="fr")))
+        cls.source.add((EX.s0, EX.size, Literal(17)))
+        cls.source.add((EX.s0, EX.weight, Literal("1.5", datatype=XSD.decimal)))
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'graph.snapshot')
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_warm_start(self):
+        """ A graph loaded from a snapshot has the same contents and only queries for what is missing """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            for i in range(5):
+                list(g.predicate_objects(EX[f"s{i}"]))
+            g.save_snapshot(self.path)
+            self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+            g2 = SlurpyGraph(ep.url)
+            metadata = g2.load_snapshot(self.path)
+            self.assertEqual(len(g), metadata['triples'])
+            self.assertEqual(5, metadata['patterns'])
+            self.assertEqual(set(g.resolved_nodes), set(g2.resolved_nodes))
+            nqueries = len(ep.queries)
+            for i in range(5):
+                self.assertEqual(set(g.predicate_objects(EX[f"s{i}"])), set(g2.predicate_objects(EX[f"s{i}"])))
+            self.assertEqual(nqueries, len(ep.queries))
+            # ... and the terms come back intact
+            for p in (EX.label, EX.size, EX.weight):
+                self.assertEqual(g.value(EX.s0, p), g2.value(EX.s0, p))
+
+            self.assertEqual(NPROPS, len(list(g2.predicate_objects(EX.s7))))
+            self.assertEqual(nqueries + 1, len(ep.queries))
+
+    def test_wrong_endpoint(self):
+        """ A snapshot is only ever applied to the endpoint that it was taken from """
+        with LocalSPARQLEndpoint(self.source) as ep, LocalSPARQLEndpoint(self.source) as other:
+            g = SlurpyGraph(ep.url)
+            list(g.predicate_objects(EX.s0))
+            g.save_snapshot(self.path)
+            for wrong in (SlurpyGraph(other.url), SlurpyGraph(ep.url + '?infer=false'), GraphDBSlurpyGraph(ep.url),
+                          SlurpyGraph([ep.url, other.url])):
+                with self.assertRaises(ValueError):
+                    wrong.load_snapshot(self.path)
+                self.assertEqual(0, len(wrong))
+            # Same replicas, listed in a different order
+            g = SlurpyGraph([ep.url, other.url])
+            g.save_snapshot(self.path)
+            SlurpyGraph([other.url, ep.url]).load_snapshot(self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        with self.assertRaises(ValueError):
+            SnapshotReader(self.path)
+
+    def test_terms(self):
+        """ Every kind of term round trips """
+        triples = [(EX.s, EX.label, Literal("chat", lang="fr")), (EX.s, EX.size, Literal(17)),
+                   (EX.s, EX.weight, Literal("1.5", datatype=XSD.decimal)), (EX.s, EX.name, Literal("x\u00e9\n")),
+                   (BNode("b1"), EX.p, EX.o)]
+        write_snapshot(self.path, {}, triples, [(EX.s, None, None), (None, EX.p, EX.o)])
+        with SnapshotReader(self.path) as snapshot:
+            self.assertEqual(triples, next(snapshot.triple_batches()))
+            self.assertEqual([(EX.s, None, None), (None, EX.p, EX.o)], snapshot.patterns())
+
+    def test_graph_name(self):
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            g.graph_name = ''
+            g.save_snapshot(self.path)
+            g2 = SlurpyGraph(ep.url)
+            g2.load_snapshot(self.path)
+            self.assertEqual('', g2.graph_name)
+
+            # A graph that already has a graph name of its own, or has cached anything, keeps it
+            g3 = SlurpyGraph(ep.url)
+            g3.graph_name = EX.g.n3()
+            with self.assertRaises(ValueError):
+                g3.load_snapshot(self.path)
+            g4 = SlurpyGraph(ep.url)
+            list(g4.predicate_objects(EX.s0))
+            with self.assertRaises(ValueError):
+                g4.load_snapshot(self.path)
+            self.assertIsNone(g4.graph_name)
+
+    def test_bnodes(self):
+        src = Graph()
+        node = BNode()
+        src.add((EX.s, EX.p, node))
+        src.add((node, EX.value, Literal("x")))
+        with LocalSPARQLEndpoint(src) as ep:
+            g = SlurpyGraph(ep.url, persistent_bnodes=True)
+            list(g.triples((EX.s, None, None)))
+            g.save_snapshot(self.path)
+            g2 = SlurpyGraph(ep.url, persistent_bnodes=True, store=CompactStore())
+            g2.load_snapshot(self.path)
+            self.assertEqual(set(g), set(g2))
+
+    def test_streamed(self):
+        """ Triples are read a batch at a time """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            for i in range(NSUBJECTS):
+                list(g.predicate_objects(EX[f"s{i}"]))
+            g.save_snapshot(self.path)
+            with SnapshotReader(self.path) as snapshot:
+                batches = list(snapshot.triple_batches(7))
+                self.assertEqual(len(g), snapshot.ntriples)
+                self.assertTrue(all(len(batch) == 7 for batch in batches[:-1]))
+                self.assertEqual(set(g), {t for batch in batches for t in batch})
+                self.assertEqual(ep.url, snapshot.metadata['endpoint'][0][0])
+
+    def test_memory_budget(self):
+        """ Loading a snapshot into a graph with a memory budget evicts what doesn't fit """
+        budget = 3 * sum(triple_size(t) for t in self.source.triples((EX.s1, None, None))) + 100
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            for i in range(1, NSUBJECTS):
+                list(g.predicate_objects(EX[f"s{i}"]))
+            g.save_snapshot(self.path)
+            g2 = SlurpyGraph(ep.url, memory_budget=budget)
+            g2.load_snapshot(self.path)
+            self.assertLessEqual(g2.memory_budget.size, budget)
+            self.assertLessEqual(len(g2), 3 * NPROPS)
+            self.assertEqual(NSUBJECTS - 4, g2.total_evictions)
+
+
+if __name__ == '__main__':
+    unittest.main()
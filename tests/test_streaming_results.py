@@ -0,0 +1,70 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from rdflib import Graph, Namespace, Literal
+
+from sparqlslurper import SlurpyGraph
+from sparqlslurper._streaming import iter_json_bindings
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class GuardedStream(io.BytesIO):
+    """ A stream that records how far it has been read """
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.max_pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        rval = super().read(size)
+        self.max_pos = self.tell()
+        return rval
+
+
+class StreamingResultsTestCase(unittest.TestCase):
+    bindings = [{'s': {'type': 'uri', 'value': str(EX[f's{i}'])},
+                 'o': {'type': 'literal', 'value': f'value "{i}" ], ' + '{"bindings": [ é中'}}
+                for i in range(200)]
+
+    def doc(self) -> bytes:
+        return json.dumps({'head': {'vars': ['s', 'o']}, 'results': {'bindings': self.bindings}},
+                          ensure_ascii=False, indent=1).encode('utf-8')
+
+    def test_parse(self):
+        """ Bindings split at every possible chunk boundary come through intact """
+        for chunk_size in (1, 7, 64, 100000):
+            self.assertEqual(self.bindings, list(iter_json_bindings(io.BytesIO(self.doc()), chunk_size)))
+        self.assertEqual([], list(iter_json_bindings(io.BytesIO(b'{"head": {"vars": []}, '
+                                                                b'"results": {"bindings": []}}'))))
+        with self.assertRaises(ValueError):
+            list(iter_json_bindings(io.BytesIO(self.doc()[:500]), 64))
+
+    def test_incremental(self):
+        """ The first binding is available before the response has been read """
+        stream = GuardedStream(self.doc())
+        rows = iter_json_bindings(stream, 256)
+        self.assertEqual(self.bindings[0], next(rows))
+        self.assertLess(stream.max_pos, 1024)
+
+    def test_streaming_slurp(self):
+        src = Graph()
+        for i in range(50):
+            src.add((EX.s, EX[f"p{i}"], Literal(i)))
+        with LocalSPARQLEndpoint(src) as ep:
+            g = SlurpyGraph(ep.url)
+            g.streaming_results = True
+            g.debug_slurps = True
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(50, len(list(g.predicate_objects(EX.s))))
+            self.assertEqual((1, 1, 50), (g.total_calls, g.total_queries, g.total_triples))
+            self.assertEqual(set(src), set(g))
+            self.assertTrue(output.getvalue().startswith('SPARQL: (SELECT ?s ?p ?o {<http://example.org/s> ?p ?o})'))
+            self.assertTrue(output.getvalue().strip().endswith('- 50 triples'))
+
+
+if __name__ == '__main__':
+    unittest.main()
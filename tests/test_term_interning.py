@@ -0,0 +1,50 @@
+import unittest
+
+from rdflib import Namespace, Literal, XSD, BNode
+
+from sparqlslurper import SlurpyGraph, TermInterner, GraphDBSlurpyGraph, TM_NS
+
+EX = Namespace("http://example.org/")
+
+
+class TermInterningTestCase(unittest.TestCase):
+    def test_interner(self):
+        terms = TermInterner(max_size=3)
+        self.assertIs(terms.uri(str(EX.a)), terms.uri(str(EX.a)))
+        lit = terms.literal("17", str(XSD.integer))
+        self.assertEqual(Literal(17), lit)
+        self.assertIs(lit, terms.literal("17", str(XSD.integer)))
+        self.assertIsNot(lit, terms.literal("17"))
+        self.assertEqual(3, len(terms))
+        terms.uri(str(EX.b))
+        self.assertEqual(3, len(terms))
+        self.assertIsNot(lit, terms.uri(str(EX.a)))         # The oldest entry was dropped
+
+        disabled = TermInterner(max_size=0)
+        self.assertEqual(EX.a, disabled.uri(str(EX.a)))
+        self.assertEqual(0, len(disabled))
+
+    def test_map_rows(self):
+        rows = [{'s': {'type': 'uri', 'value': str(EX.s)},
+                 'p': {'type': 'uri', 'value': str(EX.p)},
+                 'o': {'type': 'literal', 'value': str(i % 2), 'datatype': str(XSD.integer)}} for i in range(4)]
+        g = SlurpyGraph("http://example.org/sparql")
+        triples = g._map_rows((None, None, None), rows)
+        self.assertEqual([(EX.s, EX.p, Literal(i % 2)) for i in range(4)], triples)
+        self.assertIs(triples[0].p, triples[3].p)
+        self.assertIs(triples[0].o, triples[2].o)
+        self.assertEqual([(EX.x, EX.p, Literal(0))] * 2, g._map_rows((EX.x, None, None), rows[:4:2]))
+
+        bnode_rows = [{'s': {'type': 'bnode', 'value': 'b1'}, 'p': rows[0]['p'], 'o': rows[0]['o']}]
+        with self.assertRaises(ValueError):
+            g._map_rows((None, None, None), bnode_rows)
+        g.persistent_bnodes = True
+        self.assertEqual(BNode('b1'), g._map_rows((None, None, None), bnode_rows)[0].s)
+
+        gdb = GraphDBSlurpyGraph("http://example.org/sparql")
+        bnode_rows[0]['sid'] = {'type': 'literal', 'value': '1234'}
+        self.assertEqual(TM_NS['1234'], gdb._map_rows((None, None, None), bnode_rows)[0].s)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from rdflib import Graph, Namespace, Literal
+from SPARQLWrapper import DIGEST
+from SPARQLWrapper.SPARQLExceptions import Unauthorized
+
+from sparqlslurper import SlurpyGraph, PooledHTTPTransport, SlurpyGraphWithAgent
+from sparqlslurper._user_agent import UserAgent
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+
+class TransportTestCase(unittest.TestCase):
+    @staticmethod
+    def source_graph() -> Graph:
+        g = Graph()
+        for i in range(10):
+            for j in range(20):
+                g.add((EX[f"s{i}"], EX[f"p{j}"], Literal(f"value {i} {j}")))
+        return g
+
+    def test_pooled_transport(self):
+        """ Queries share one compressed keep-alive connection and long queries are POSTed """
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            transport = PooledHTTPTransport(post_threshold=500)
+            g = SlurpyGraph(ep.url + '?infer=false', transport=transport, agent='slurper-test/1.0')
+            for i in range(5):
+                self.assertEqual(20, len(list(g.predicate_objects(EX[f"s{i}"]))))
+            g.streaming_results = True
+            self.assertEqual(20, len(list(g.predicate_objects(EX.s5))))
+            g.prefetch([(EX[f"s{i}"], None, None) for i in range(6, 10)] + [(EX[f"x{i}"], None, None)
+                                                                            for i in range(20)])
+            self.assertEqual(200, len(g))
+            self.assertEqual(1, ep.connections)
+            self.assertEqual(1, transport.connections_opened)
+            self.assertEqual(['GET'] * 6 + ['POST'], [r.method for r in ep.requests])
+            self.assertTrue(all('gzip' in r.accept_encoding for r in ep.requests))
+            self.assertTrue(all(r.user_agent == 'slurper-test/1.0' for r in ep.requests))
+            transport.close()
+
+    def test_agent_with_transport(self):
+        with LocalSPARQLEndpoint(self.source_graph()) as ep:
+            transport = PooledHTTPTransport(compress=False)
+            g = SlurpyGraphWithAgent(ep.url, transport=transport)
+            self.assertEqual(20, len(list(g.predicate_objects(EX.s1))))
+            self.assertEqual(UserAgent, ep.requests[0].user_agent)
+            self.assertNotIn('gzip', ep.requests[0].accept_encoding)
+            transport.close()
+
+    def test_credentials(self):
+        """ The SPARQLWrapper's credentials are sent with every request """
+        with LocalSPARQLEndpoint(self.source_graph(), credentials=('user', 'secret')) as ep:
+            transport = PooledHTTPTransport()
+            g = SlurpyGraph(ep.url, transport=transport)
+            with self.assertRaises(Unauthorized):
+                list(g.predicate_objects(EX.s1))
+            g.sparql.setCredentials('user', 'secret')
+            self.assertEqual(20, len(list(g.predicate_objects(EX.s1))))
+            self.assertEqual(20, len(list(g.predicate_objects(EX.s2))))
+
+            g = SlurpyGraph(ep.url, transport=transport)
+            g.sparql.setCredentials('user', 'secret')
+            g.sparql.setHTTPAuth(DIGEST)
+            with self.assertRaises(NotImplementedError):
+                list(g.predicate_objects(EX.s1))
+            transport.close()
+
+    def test_timeout(self):
+        """ The SPARQLWrapper's timeout applies unless the transport has one of its own """
+        with LocalSPARQLEndpoint(self.source_graph(), latency=1.5) as ep:
+            transport = PooledHTTPTransport()
+            g = SlurpyGraph(ep.url, transport=transport)
+            g.sparql.setTimeout(1)
+            with self.assertRaises(TimeoutError):
+                list(g.predicate_objects(EX.s1))
+            transport.timeout = 5
+            self.assertEqual(20, len(list(g.predicate_objects(EX.s1))))
+            self.assertEqual(2, transport.connections_opened)
+            transport.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from typing import List
+
+from rdflib import Graph, Namespace, Literal, BNode
+
+from sparqlslurper import SlurpyGraph, GraphDBSlurpyGraph, WideningPolicy, ResultPipeline, ResultSink, \
+    QueryResultHook, RDFTriple
+from tests.local_endpoint import LocalSPARQLEndpoint
+
+EX = Namespace("http://example.org/")
+
+NSUBJECTS = 5
+NPROPS = 6
+
+
+class CollectingSink(ResultSink):
+    def __init__(self) -> None:
+        self.triples = []
+        self.queries = []
+
+    def write(self, triples) -> None:
+        self.triples += triples
+
+    def done(self, query: str) -> None:
+        self.queries.append(query)
+
+
+class WideningTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.source = Graph()
+        for i in range(NSUBJECTS):
+            for j in range(NPROPS):
+                cls.source.add((EX[f"s{i}"], EX[f"p{j}"], Literal(i * j)))
+        # A subject with a large fan-out
+        for k in range(50):
+            cls.source.add((EX.hub, EX[f"p{k % NPROPS}"], Literal(f"hub {k}")))
+
+    def test_subject_widening(self):
+        """ Repeated (s, p, ?) lookups on one subject are widened to (s, ?, ?) """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            g.widening = WideningPolicy(threshold=3)
+            for j in range(NPROPS):
+                self.assertEqual(Literal(2 * j), g.value(EX.s2, EX[f"p{j}"]))
+            self.assertEqual(3, g.total_queries)
+            self.assertTrue(ep.queries[-1].endswith(f"LIMIT {g.widening.max_fanout + 1}"))
+            self.assertTrue(g.already_resolved((EX.s2, None, None)))
+            self.assertEqual(dict(widened=1, rejected=0, avoided=NPROPS - 3), g.widening.stats())
+
+    def test_predicate_widening(self):
+        """ The same predicate across many subjects is widened to (?, p, ?) """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            g.widening = WideningPolicy(threshold=3)
+            for i in range(NSUBJECTS):
+                self.assertEqual(Literal(i), g.value(EX[f"s{i}"], EX.p1))
+            self.assertEqual(3, g.total_queries)
+            self.assertTrue(g.already_resolved((None, EX.p1, None)))
+            self.assertEqual(dict(widened=1, rejected=0, avoided=NSUBJECTS - 3), g.widening.stats())
+
+    def test_fanout_guard(self):
+        """ Subjects with too many triples aren't widened """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            g.widening = WideningPolicy(threshold=2, max_fanout=20)
+            for j in range(NPROPS):
+                self.assertEqual(set(self.source.objects(EX.hub, EX[f"p{j}"])),
+                                 set(g.objects(EX.hub, EX[f"p{j}"])))
+                # The rejected probe's triples aren't kept
+                self.assertEqual(sum(len(list(self.source.objects(EX.hub, EX[f"p{k}"]))) for k in range(j + 1)),
+                                 len(g))
+            self.assertFalse(g.already_resolved((EX.hub, None, None)))
+            # Every narrow query plus the one rejected wide probe
+            self.assertEqual(NPROPS + 1, g.total_queries)
+            self.assertEqual(dict(widened=0, rejected=1, avoided=0), g.widening.stats())
+
+    def test_rejected_probe_results(self):
+        """ The result hooks and the result pipeline only see the triples of probes that are accepted """
+        hooked: List[RDFTriple] = []
+
+        class CollectingHook(QueryResultHook):
+            def add_batch(self, triples: List[RDFTriple]) -> None:
+                hooked.extend(triples)
+
+        with LocalSPARQLEndpoint(self.source) as ep:
+            g = SlurpyGraph(ep.url)
+            g.widening = WideningPolicy(threshold=2, max_fanout=20)
+            g.add_result_hook(CollectingHook)
+            sink = CollectingSink()
+            g.result_pipeline = pipeline = ResultPipeline(sink)
+            for j in range(2):
+                list(g.objects(EX.hub, EX[f"p{j}"]))
+            pipeline.close()
+            self.assertEqual(dict(widened=0, rejected=1, avoided=0), g.widening.stats())
+            self.assertEqual(set(g), set(sink.triples))
+            self.assertEqual(len(g), len(sink.triples))
+            self.assertEqual(sink.triples, hooked)
+            self.assertEqual(2, len(sink.queries))
+
+            # ... and an accepted probe's triples are passed on as they are kept
+            del hooked[:]
+            g.result_pipeline = pipeline = ResultPipeline(sink)
+            for j in range(2):
+                list(g.objects(EX.s1, EX[f"p{j + 2}"]))
+            pipeline.close()
+            self.assertEqual(dict(widened=1, rejected=1, avoided=0), g.widening.stats())
+            self.assertEqual(set(g), set(sink.triples))
+            self.assertEqual(4, len(sink.queries))
+            self.assertEqual(1 + NPROPS, len(hooked))
+
+    def test_graphdb(self):
+        """ GraphDB graphs widen too, and prefetch the closures of the blank nodes in a kept probe """
+        src = Graph()
+        for j in range(NPROPS):
+            node = BNode()
+            src.add((EX.s, EX[f"p{j}"], node))
+            src.add((node, EX.value, Literal(j)))
+        with LocalSPARQLEndpoint(src, graphdb=True) as ep:
+            g = GraphDBSlurpyGraph(ep.url)
+            g.widening = WideningPolicy(threshold=2)
+            g.prefetch_closures = True
+            for j in range(NPROPS):
+                self.assertEqual(Literal(j), g.value(g.value(EX.s, EX[f"p{j}"]), EX.value))
+            self.assertEqual(dict(widened=1, rejected=0, avoided=NPROPS - 2), g.widening.stats())
+            # One narrow lookup and its closure, then the probe and the closures of the rest of what it found
+            self.assertEqual(4, g.total_queries)
+
+    def test_complete_walk(self):
+        """ Widening doesn't change the answers """
+        with LocalSPARQLEndpoint(self.source) as ep:
+            narrow = SlurpyGraph(ep.url)
+            wide = SlurpyGraph(ep.url)
+            wide.widening = WideningPolicy(threshold=2)
+            for g in (narrow, wide):
+                for i in range(NSUBJECTS):
+                    for j in range(NPROPS):
+                        self.assertEqual(Literal(i * j), g.value(EX[f"s{i}"], EX[f"p{j}"]))
+            self.assertLess(wide.total_queries, narrow.total_queries / 2)
+            stats = wide.widening.stats()
+            self.assertEqual(narrow.total_queries - wide.total_queries, stats['avoided'] - stats['rejected'])
+
+
+if __name__ == '__main__':
+    unittest.main()